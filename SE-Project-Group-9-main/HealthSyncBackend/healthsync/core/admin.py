@@ -49,4 +49,5 @@ class PatientAdmin(admin.ModelAdmin):
 
 admin.site.register(TimeSlot)
 admin.site.register(Booking)
-admin.site.register(Authentication)
\ No newline at end of file
+admin.site.register(Authentication)
+admin.site.register(EmailOutbox)
\ No newline at end of file
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from django.utils import timezone
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+from core.models import Booking, BookingRollup, Doctor, TimeSlot
+
+# finished days are read from stored BookingRollup documents; only the rest run the live pipelines
+
+STATUSES = ['confirmed', 'cancelled', 'completed']
+GROUP_KEYS = {'doctor': 'doctor_id', 'specialization': 'specialization', 'day': 'date'}
+SLOT_MS = 30 * 60 * 1000
+
+def _midnight(day):
+    return (datetime(day.year, day.month, day.day))
+
+def _day_range(date_from, date_to):
+    return ([date_from + timedelta(days=n) for n in range((date_to - date_from).days + 1)])
+
+def _booking_counts(days):
+    pipeline = [
+        {'$match': {'date': {'$in': [_midnight(day) for day in days]}}},
+        {'$group': {'_id': {'doctor_id': '$doctor_id', 'date': '$date', 'status': '$appointment_status'}, 'count': {'$sum': 1}}},
+    ]
+    counts = defaultdict(dict)
+    for row in Booking.objects.mongo_aggregate(pipeline):
+        key = row['_id']
+        counts[(key['date'].date(), key['doctor_id'])][key['status']] = row['count']
+    return (counts)
+
+def _capacity(days):
+    pipeline = [
+        {'$match': {
+            'availability_status': 'available',
+            'start_time': {'$ne': None},
+            'end_time': {'$ne': None},
+            '$or': [{'date': None}, {'date': {'$in': [_midnight(day) for day in days]}}],
+        }},
+        {'$group': {
+            '_id': {'doctor_id': '$doctor_id', 'date': {'$ifNull': ['$date', None]}},
+            'windows': {'$sum': {'$floor': {'$divide': [{'$subtract': ['$end_time', '$start_time']}, SLOT_MS]}}},
+        }},
+    ]
+    capacity = {}
+    for row in TimeSlot.objects.mongo_aggregate(pipeline):
+        key = row['_id']
+        capacity[(key['date'].date() if key['date'] else None, key['doctor_id'])] = int(row['windows'])
+    return (capacity)
+
+def live_rows(days):
+    if not days:
+        return ({})
+    counts = _booking_counts(days)
+    capacity = _capacity(days)
+    daily = {doctor_id: windows for (day, doctor_id), windows in capacity.items() if day is None}
+    doctor_ids = {doctor_id for _, doctor_id in counts} | {doctor_id for _, doctor_id in capacity}
+    specializations = {
+        doc['doctor_id']: doc.get('specialization')
+        for doc in Doctor.objects.mongo_find({'doctor_id': {'$in': sorted(doctor_ids)}}, {'doctor_id': 1, 'specialization': 1})
+    }
+    rows = {}
+    for day in days:
+        rows[day] = []
+        for doctor_id in sorted(doctor_ids):
+            day_counts = counts.get((day, doctor_id), {})
+            windows = daily.get(doctor_id, 0) + capacity.get((day, doctor_id), 0)
+            if not day_counts and not windows:
+                continue
+            row = {'doctor_id': doctor_id, 'specialization': specializations.get(doctor_id), 'capacity': windows}
+            row.update({status: day_counts.get(status, 0) for status in STATUSES})
+            rows[day].append(row)
+    return (rows)
+
+def ensure_rollups(date_from, date_to):
+    last_complete = min(date_to, timezone.localdate() - timedelta(days=1))
+    if last_complete < date_from:
+        return (0)
+    stored = {
+        doc['date'].date()
+        for doc in BookingRollup.objects.mongo_find(
+            {'date': {'$gte': _midnight(date_from), '$lte': _midnight(last_complete)}}, {'date': 1})
+    }
+    missing = [day for day in _day_range(date_from, last_complete) if day not in stored]
+    if missing:
+        now = timezone.now()
+        try:
+            BookingRollup.objects.mongo_bulk_write([
+                ReplaceOne({'date': _midnight(day)}, {'date': _midnight(day), 'doctors': rows, 'computed_at': now}, upsert=True)
+                for day, rows in live_rows(missing).items()
+            ], ordered=False)
+        except BulkWriteError:
+            # a concurrent request stored the same days first; its rollups are equivalent
+            pass
+    return (len(missing))
+
+def invalidate(*days):
+    days = [day for day in days if day is not None and day < timezone.localdate()]
+    if days:
+        BookingRollup.objects.mongo_delete_many({'date': {'$in': [_midnight(day) for day in days]}})
+
+def invalidate_timeslots(*days):
+    # an undated slot repeats daily, so it changes the capacity of every stored day
+    if None in days:
+        BookingRollup.objects.mongo_delete_many({})
+    else:
+        invalidate(*days)
+
+def _rolled_up(date_from, date_to, group_by):
+    pipeline = [
+        {'$match': {'date': {'$gte': _midnight(date_from), '$lte': _midnight(date_to)}}},
+        {'$unwind': '$doctors'},
+        {'$group': dict(
+            {'_id': {name: ('$date' if name == 'day' else f"$doctors.{GROUP_KEYS[name]}") for name in group_by}},
+            **{field: {'$sum': f"$doctors.{field}"} for field in STATUSES + ['capacity']},
+        )},
+    ]
+    return (list(BookingRollup.objects.mongo_aggregate(pipeline)))
+
+def _key(values, group_by):
+    return (tuple(values[name].date() if name == 'day' else values[name] for name in group_by))
+
+def booking_rollups(date_from, date_to, group_by):
+    ensure_rollups(date_from, date_to)
+    today = timezone.localdate()
+    totals = defaultdict(lambda: dict.fromkeys(STATUSES + ['capacity'], 0))
+    if date_from < today:
+        for row in _rolled_up(date_from, min(date_to, today - timedelta(days=1)), group_by):
+            total = totals[_key(row['_id'], group_by)]
+            for field in total:
+                total[field] += row[field]
+    live_from = max(date_from, today)
+    live_days = _day_range(live_from, date_to) if live_from <= date_to else []
+    for day, rows in live_rows(live_days).items():
+        for row in rows:
+            values = dict(row, day=_midnight(day), doctor=row['doctor_id'])
+            total = totals[_key(values, group_by)]
+            for field in total:
+                total[field] += row[field]
+    results = []
+    for key in sorted(totals, key=lambda k: tuple('' if v is None else str(v) for v in k)):
+        total = totals[key]
+        booked = total['confirmed'] + total['completed']
+        result = {GROUP_KEYS[name]: (value.isoformat() if name == 'day' else value) for name, value in zip(group_by, key)}
+        result.update(total)
+        result['total'] = sum(total[status] for status in STATUSES)
+        result['utilization'] = round(booked / total['capacity'], 4) if total['capacity'] else None
+        results.append(result)
+    return (results)
@@ -1,4 +1,18 @@
+import threading
 from django.apps import AppConfig
+from django.conf import settings
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import signals  # noqa: F401
+        if getattr(settings, 'METRICS_ENABLED', True):
+            from pymongo import monitoring
+            from core.metrics import MongoCommandListener
+            # must be registered before the first MongoClient is created
+            monitoring.register(MongoCommandListener())
+        if getattr(settings, 'MONGO_INDEX_CHECK_ON_STARTUP', True):
+            from core.indexes import verify_indexes
+            # Off the main thread so an unreachable database never delays startup.
+            threading.Thread(target=verify_indexes, name='verify-indexes', daemon=True).start()
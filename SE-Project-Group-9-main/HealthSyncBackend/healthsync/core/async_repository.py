@@ -0,0 +1,93 @@
+import asyncio
+import weakref
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from pymongo import ASCENDING
+from core.conditional import make_etag
+from core.fastpath import parse_fieldset, row_columns, serialize_rows
+from core.metrics import timed
+from core.pagination import decode_cursor, encode_cursor, get_limit, page_data, wants_pagination
+from core.repository import to_match, to_row
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
+# motor clients belong to the event loop that created them, so there is one per loop
+
+_clients = weakref.WeakKeyDictionary()
+
+def _database():
+    if AsyncIOMotorClient is None:
+        raise ImproperlyConfigured('The async endpoints need the motor package.')
+    loop = asyncio.get_running_loop()
+    database = settings.DATABASES['default']
+    if loop not in _clients:
+        options = dict(database.get('CLIENT', {}))
+        options.setdefault('maxPoolSize', getattr(settings, 'ASYNC_MONGO_POOL_SIZE', 200))
+        _clients[loop] = AsyncIOMotorClient(**options)
+    return (_clients[loop][database['NAME']])
+
+def collection(model):
+    return (_database()[model._meta.db_table])
+
+def _projection(model, columns):
+    return ({model._meta.get_field(c).column: 1 for c in columns})
+
+async def find_rows(model, filters, columns, after=None, limit=None):
+    match = to_match(model, filters)
+    if after is not None:
+        match['_id'] = {'$gt': after}
+    cursor = collection(model).find(match, _projection(model, columns))
+    if limit is not None:
+        cursor = cursor.sort('_id', ASCENDING).limit(limit)
+    with timed('mongo'):
+        documents = await cursor.to_list(length=None)
+    return ([to_row(model, document, columns) for document in documents])
+
+async def find_row(model, filters, columns):
+    with timed('mongo'):
+        document = await collection(model).find_one(to_match(model, filters), _projection(model, columns))
+    return (None if document is None else to_row(model, document, columns))
+
+async def find_in(model, key, values, columns):
+    if not values:
+        return ({})
+    with timed('mongo'):
+        documents = await collection(model).find({key: {'$in': list(values)}}, _projection(model, columns)).to_list(length=None)
+    return ({document[key]: to_row(model, document, columns) for document in documents})
+
+async def get_page(request, model, filters, columns):
+    if not wants_pagination(request):
+        return (await find_rows(model, filters, columns), None)
+    limit = get_limit(request)
+    cursor = request.query_params.get('cursor')
+    rows = await find_rows(model, filters, columns, after=decode_cursor(cursor) if cursor else None, limit=limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return (rows, encode_cursor(rows[-1]['_id']))
+    return (rows, None)
+
+async def paginated_data(request, model, filters, serializer_class):
+    fields = parse_fieldset(request, serializer_class)
+    rows, next_token = await get_page(request, model, filters, row_columns(serializer_class, fields))
+    return (page_data(request, serialize_rows(rows, serializer_class, fields), next_token))
+
+async def document_etag(request, model, **lookup):
+    with timed('mongo'):
+        doc = await collection(model).find_one(lookup, {'updated_at': 1})
+    if doc is None:
+        return (None)
+    return (make_etag(model._meta.label, doc['_id'], doc.get('updated_at'), request.GET.urlencode()))
+
+async def collection_etag(request, model, match):
+    if not match:
+        return (None)
+    with timed('mongo'):
+        summaries = await collection(model).aggregate([
+            {'$match': match},
+            {'$group': {'_id': None, 'count': {'$sum': 1}, 'last': {'$max': '$updated_at'}}},
+        ]).to_list(length=1)
+    summary = summaries[0] if summaries else {}
+    return (make_etag(model._meta.label, summary.get('count', 0), summary.get('last'), request.GET.urlencode()))
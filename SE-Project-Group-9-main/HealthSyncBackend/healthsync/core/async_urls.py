@@ -0,0 +1,11 @@
+from django.urls import path
+from .views import async_views
+
+urlpatterns = [
+    path('doctors/', async_views.doctor_list, name='async-doctor-list'),
+    path('doctors/<str:doctor_id>/', async_views.doctor_detail, name='async-doctor-detail'),
+    path('timeslots/', async_views.timeslot_list, name='async-timeslot-list'),
+    path('timeslots/<str:timeslot_id>/', async_views.timeslot_detail, name='async-timeslot-detail'),
+    path('bookings/', async_views.booking_list, name='async-booking-list'),
+    path('bookings/<str:booking_id>/', async_views.booking_detail, name='async-booking-detail'),
+]
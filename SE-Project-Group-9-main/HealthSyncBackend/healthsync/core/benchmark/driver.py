@@ -0,0 +1,268 @@
+import math
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter as Tally
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import django
+from django.test import Client
+from django.utils import timezone
+from core.benchmark.monitor import install
+from core.benchmark.seed import BENCH_PASSWORD
+from core.models import Authentication, Booking, Doctor, Hospital, Patient, TimeSlot
+
+SAMPLE_SIZE = 500
+
+def _sample(model, field, match=None, projection=None):
+    docs = model.objects.mongo_find(match or {}, projection or {field: 1}).limit(SAMPLE_SIZE)
+    return ([doc for doc in docs if doc.get(field)])
+
+def load_context():
+    today = datetime.combine(timezone.localdate(), datetime.min.time())
+    return ({
+        'doctor_ids': [doc['doctor_id'] for doc in _sample(Doctor, 'doctor_id')],
+        'specializations': sorted({doc['specialization'] for doc in _sample(Doctor, 'specialization')}),
+        'patient_ids': [doc['patient_id'] for doc in _sample(Patient, 'patient_id')],
+        'timeslot_ids': [doc['timeslot_id'] for doc in _sample(TimeSlot, 'timeslot_id')],
+        'future_slots': _sample(
+            TimeSlot, 'timeslot_id',
+            {'date': {'$gt': today}, 'availability_status': 'available'},
+            {'timeslot_id': 1, 'doctor_id': 1, 'date': 1, 'start_time': 1, 'end_time': 1},
+        ),
+        'booking_ids': [doc['booking_id'] for doc in _sample(Booking, 'booking_id')],
+        'hospital_ids': [doc['hospital_id'] for doc in _sample(Hospital, 'hospital_id')],
+        'emails': [doc['email'] for doc in _sample(Authentication, 'email')],
+        'user_ids': [doc['user_id'] for doc in _sample(Authentication, 'user_id')],
+        'created_bookings': [],
+        'lock': threading.Lock(),
+    })
+
+def _new_booking(rng, ctx):
+    slot = rng.choice(ctx['future_slots'])
+    windows = max(1, (slot['end_time'] - slot['start_time']).seconds // 1800)
+    start = datetime.combine(slot['date'].date(), slot['start_time'].time()) + timedelta(minutes=30 * rng.randrange(windows))
+    return ({
+        'patient_id': rng.choice(ctx['patient_ids']),
+        'doctor_id': slot['doctor_id'],
+        'timeslot_id': slot['timeslot_id'],
+        'date': slot['date'].date().isoformat(),
+        'start_time': start.isoformat(),
+    })
+
+def _created_booking(rng, ctx):
+    with ctx['lock']:
+        return (ctx['created_bookings'].pop() if ctx['created_bookings'] else None)
+
+def _weekly_schedule(rng, ctx):
+    day = timezone.localdate() + timedelta(days=400 + rng.randrange(300))
+    return ({
+        'doctor_id': rng.choice(ctx['doctor_ids']),
+        'date_from': day.isoformat(),
+        'date_to': (day + timedelta(days=6)).isoformat(),
+        'fee': '2000.00',
+        'schedule': [{'weekday': weekday, 'start': '09:00', 'end': '12:00'} for weekday in range(5)],
+    })
+
+def _sick_week(rng, ctx):
+    day = timezone.localdate() + timedelta(days=1 + rng.randrange(14))
+    return ({'date_from': day.isoformat(), 'date_to': (day + timedelta(days=4)).isoformat()})
+
+# name -> (method, path(rng, ctx), body(rng, ctx) or None, context lists it needs, write)
+ENDPOINTS = {
+    'doctor-list': ('GET', lambda r, c: '/api/doctors/?limit=50', None, [], False),
+    'doctor-detail': ('GET', lambda r, c: f"/api/doctors/{r.choice(c['doctor_ids'])}/", None, ['doctor_ids'], False),
+    'doctor-summary': ('GET', lambda r, c: f"/api/doctors/{r.choice(c['doctor_ids'])}/summary/", None, ['doctor_ids'], False),
+    'doctor-calendar': ('GET', lambda r, c: f"/api/doctors/{r.choice(c['doctor_ids'])}/calendar/", None, ['doctor_ids'], False),
+    'doctor-multi-get': ('GET', lambda r, c: f"/api/doctors/?ids={','.join(r.sample(c['doctor_ids'], min(20, len(c['doctor_ids']))))}", None, ['doctor_ids'], False),
+    'doctor-search': ('GET', lambda r, c: f"/api/doctors/search/?q={r.choice('abfhikmnorsuz')}{r.choice('aehiloru')}", None, [], False),
+    'doctor-cache-stats': ('GET', lambda r, c: '/api/doctors/cache/stats/', None, [], False),
+    'patient-list': ('GET', lambda r, c: '/api/patients/?limit=50', None, [], False),
+    'patient-detail': ('GET', lambda r, c: f"/api/patients/{r.choice(c['patient_ids'])}/", None, ['patient_ids'], False),
+    'timeslot-list': ('GET', lambda r, c: f"/api/timeslots/?doctor_id={r.choice(c['doctor_ids'])}", None, ['doctor_ids'], False),
+    'timeslot-multi-get': ('GET', lambda r, c: f"/api/timeslots/?ids={','.join(r.sample(c['timeslot_ids'], min(20, len(c['timeslot_ids']))))}", None, ['timeslot_ids'], False),
+    'timeslot-detail': ('GET', lambda r, c: f"/api/timeslots/{r.choice(c['timeslot_ids'])}/", None, ['timeslot_ids'], False),
+    'booking-list': ('GET', lambda r, c: f"/api/bookings/?doctor_id={r.choice(c['doctor_ids'])}", None, ['doctor_ids'], False),
+    'booking-list-include': (
+        'GET', lambda r, c: f"/api/bookings/?patient_id={r.choice(c['patient_ids'])}&include=doctor,patient", None, ['patient_ids'], False,
+    ),
+    'booking-export': ('GET', lambda r, c: f"/api/bookings/export/?format=ndjson&doctor_id={r.choice(c['doctor_ids'])}", None, ['doctor_ids'], False),
+    'booking-detail': ('GET', lambda r, c: f"/api/bookings/{r.choice(c['booking_ids'])}/", None, ['booking_ids'], False),
+    'availability': (
+        'GET', lambda r, c: f"/api/availability/?specialization={r.choice(c['specializations'])}&limit=20", None, ['specializations'], False,
+    ),
+    'booking-analytics': ('GET', lambda r, c: f"/api/analytics/bookings/?group_by={r.choice(['doctor', 'specialization', 'day'])}", None, [], False),
+    'hospital-list': ('GET', lambda r, c: '/api/hospitals/?expand=doctors', None, [], False),
+    'hospital-detail': ('GET', lambda r, c: f"/api/hospitals/{r.choice(c['hospital_ids'])}/?expand=doctors", None, ['hospital_ids'], False),
+    'auth-list': ('GET', lambda r, c: '/api/authentication/?limit=50', None, [], False),
+    'auth-detail': ('GET', lambda r, c: f"/api/authentication/{r.choice(c['user_ids'])}/", None, ['user_ids'], False),
+    'auth-by-email': ('GET', lambda r, c: f"/api/authentication/email/{r.choice(c['emails'])}/", None, ['emails'], False),
+    'auth-login': ('POST', lambda r, c: '/api/authentication/login/', lambda r, c: {'email': r.choice(c['emails']), 'password': BENCH_PASSWORD}, ['emails'], False),
+    'booking-create': ('POST', lambda r, c: '/api/bookings/', _new_booking, ['future_slots', 'patient_ids'], True),
+    'booking-delete': ('DELETE', lambda r, c: f"/api/bookings/{_created_booking(r, c)}/", None, [], True),
+    'doctor-update': ('PUT', lambda r, c: f"/api/doctors/{r.choice(c['doctor_ids'])}/", lambda r, c: {'picture': None}, ['doctor_ids'], True),
+    'doctor-cancel-day': ('POST', lambda r, c: f"/api/doctors/{r.choice(c['doctor_ids'])}/cancel-day/", _sick_week, ['doctor_ids'], True),
+    'timeslot-bulk': ('POST', lambda r, c: '/api/timeslots/bulk/', _weekly_schedule, ['doctor_ids'], True),
+}
+
+# routes that also exist under /api/async/, for comparing the two stacks over HTTP
+ASYNC_ENDPOINTS = ['doctor-list', 'doctor-detail', 'timeslot-list', 'timeslot-detail', 'booking-list', 'booking-list-include', 'booking-detail']
+
+def percentile(values, pct):
+    if not values:
+        return (None)
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return (values[rank - 1])
+
+class _Worker(threading.local):
+    def __init__(self, counter):
+        self.client = Client(raise_request_exception=False)
+        self.counter = counter
+
+def _request(worker, rng, ctx, name):
+    method, path, body, _, _ = ENDPOINTS[name]
+    url = path(rng, ctx)
+    payload = body(rng, ctx) if body else None
+    queries = worker.counter.count
+    started = time.perf_counter()
+    if method == 'GET':
+        response = worker.client.get(url)
+    else:
+        response = getattr(worker.client, method.lower())(url, payload, content_type='application/json')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    elapsed = time.perf_counter() - started
+    if name == 'booking-create' and response.status_code == 201:
+        with ctx['lock']:
+            ctx['created_bookings'].append(response.json()['booking_id'])
+    return (elapsed, response.status_code, worker.counter.count - queries)
+
+def run_endpoint(name, ctx, counter, requests, concurrency, warmup, random_seed):
+    local = _Worker(counter)
+
+    def one(i):
+        # seeded per request so a run picks the same ids whatever the thread interleaving
+        return (_request(local, random.Random(f"{random_seed}:{name}:{i}"), ctx, name))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(-warmup * concurrency, 0)))
+        started = time.perf_counter()
+        samples = list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+    result = _summarize(ENDPOINTS[name][0], samples, wall)
+    result['queries_per_request'] = round(sum(q for _, _, q in samples) / len(samples), 2)
+    return (result)
+
+def _summarize(method, samples, wall):
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    statuses = Tally(str(code) for _, code, _ in samples)
+    return ({
+        'method': method,
+        'requests': len(samples),
+        'errors': sum(n for code, n in statuses.items() if code.startswith('5')),
+        'status': dict(sorted(statuses.items())),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'throughput_rps': round(len(samples) / wall, 1),
+    })
+
+def _http_get(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+            code = response.status
+    except urllib.error.HTTPError as e:
+        code = e.code
+    except OSError:
+        # refused or timed out; counted with the server errors
+        code = 599
+    return (time.perf_counter() - started, code, None)
+
+def run_http(base_url, prefix, name, ctx, requests, concurrency, warmup, random_seed):
+    def one(i):
+        path = ENDPOINTS[name][1](random.Random(f"{random_seed}:{name}:{i}"), ctx)
+        return (_http_get(base_url.rstrip('/') + prefix + path[len('/api/'):]))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(-warmup * concurrency, 0)))
+        started = time.perf_counter()
+        samples = list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+    return (_summarize('GET', samples, wall))
+
+def _git_commit():
+    try:
+        return (subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return (None)
+
+def run(names=None, requests=200, concurrency=8, warmup=2, writes=False, random_seed=0, progress=None):
+    counter = install()
+    ctx = load_context()
+    results = {}
+    skipped = {}
+    for name in names or ENDPOINTS:
+        _, _, _, needs, write = ENDPOINTS[name]
+        if write and not writes and not names:
+            continue
+        missing = [key for key in needs if not ctx[key]]
+        if name == 'booking-delete' and 'booking-create' not in results:
+            missing.append('booking-create')
+        if missing:
+            skipped[name] = f"no data for {', '.join(missing)}"
+            continue
+        count = min(requests, len(ctx['created_bookings'])) if name == 'booking-delete' else requests
+        if count == 0:
+            skipped[name] = 'no bookings were created'
+            continue
+        results[name] = run_endpoint(name, ctx, counter, count, concurrency, 0 if name == 'booking-delete' else warmup, random_seed)
+        if progress:
+            progress(name, results[name])
+    return ({
+        'meta': _meta(requests=requests, concurrency=concurrency, writes=writes),
+        'endpoints': results,
+        'skipped': skipped,
+    })
+
+def _meta(**options):
+    return (dict({
+        'git_commit': _git_commit(),
+        'started_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'dataset': {model.__name__: model.objects.mongo_estimated_document_count() for model in (Doctor, Patient, TimeSlot, Booking, Hospital, Authentication)},
+    }, **options))
+
+def run_stacks(sync_url, async_url, names=None, requests=500, concurrency=64, warmup=2, random_seed=0, progress=None):
+    ctx = load_context()
+    stacks = {'sync': (sync_url, '/api/'), 'async': (async_url, '/api/async/')}
+    results = {stack: {'endpoints': {}, 'skipped': {}} for stack in stacks}
+    for name in names or ASYNC_ENDPOINTS:
+        missing = [key for key in ENDPOINTS[name][3] if not ctx[key]]
+        for stack, (base_url, prefix) in stacks.items():
+            if missing:
+                results[stack]['skipped'][name] = f"no data for {', '.join(missing)}"
+                continue
+            results[stack]['endpoints'][name] = run_http(base_url, prefix, name, ctx, requests, concurrency, warmup, random_seed)
+            if progress:
+                progress(f"{name} ({stack})", results[stack]['endpoints'][name])
+    return (dict(results, meta=_meta(requests=requests, concurrency=concurrency, sync_url=sync_url, async_url=async_url)))
+
+def compare(baseline, current):
+    rows = []
+    for name, after in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request'):
+            old, new = before.get(metric), after.get(metric)
+            change = None if not old else round((new - old) / old * 100, 1)
+            rows.append((name, metric, old, new, change))
+    return (rows)
@@ -0,0 +1,31 @@
+import threading
+from django.db import connections
+from pymongo import monitoring
+
+class QueryCounter(monitoring.CommandListener):
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def count(self):
+        return (getattr(self._local, 'count', 0))
+
+    def started(self, event):
+        self._local.count = self.count + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+_counter = None
+
+def install():
+    global _counter
+    if _counter is None:
+        _counter = QueryCounter()
+        monitoring.register(_counter)
+        # listeners only attach to clients created after registration
+        connections.close_all()
+    return (_counter)
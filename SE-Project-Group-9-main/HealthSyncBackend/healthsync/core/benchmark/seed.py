@@ -0,0 +1,192 @@
+import random
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from core.search import name_tokens
+from core.models import normalize_email, Authentication, Booking, Counter, Doctor, DoctorReservation, Hospital, Patient, TimeSlot
+from core.utils import model_to_document, next_sequential_ids
+
+BENCH_PASSWORD = 'benchmark'
+BATCH_SIZE = 1000
+
+FIRST_NAMES = [
+    'Ahmed', 'Ali', 'Ayesha', 'Bilal', 'Fatima', 'Hamza', 'Hina', 'Imran', 'Maryam', 'Omar',
+    'Sana', 'Saad', 'Usman', 'Zainab', 'Zara', 'Hassan', 'Nida', 'Kamran', 'Rabia', 'Farhan',
+]
+LAST_NAMES = [
+    'Khan', 'Malik', 'Butt', 'Qureshi', 'Sheikh', 'Chaudhry', 'Raza', 'Siddiqui', 'Iqbal', 'Hussain',
+    'Mirza', 'Abbasi', 'Javed', 'Aslam', 'Tariq',
+]
+CITIES = ['Lahore', 'Karachi', 'Islamabad', 'Rawalpindi', 'Faisalabad', 'Multan']
+# weights roughly follow how often each specialty is booked
+SPECIALIZATIONS = {'Pediatrics': 25, 'Cardiology': 20, 'Orthopedics': 20, 'Dermatology': 20, 'Neurology': 15}
+FEES = {'Pediatrics': (1500, 3000), 'Cardiology': (3000, 6000), 'Orthopedics': (2500, 5000), 'Dermatology': (2000, 4000), 'Neurology': (3000, 6000)}
+BLOOD_TYPES = {'O+': 35, 'B+': 28, 'A+': 22, 'AB+': 7, 'O-': 3, 'B-': 2, 'A-': 2, 'AB-': 1}
+DEGREES = ['MBBS', 'MBBS, FCPS', 'MBBS, MRCP', 'MBBS, FRCS', 'MBBS, MD']
+SEEDED_MODELS = [Authentication, Booking, Doctor, DoctorReservation, Hospital, Patient, TimeSlot]
+
+def _pick(rng, weights):
+    return (rng.choices(list(weights), weights=list(weights.values()))[0])
+
+def _age_and_birthday(rng, today, mean, spread, lowest, highest):
+    age = int(min(highest, max(lowest, rng.gauss(mean, spread))))
+    return (age, today - timedelta(days=age * 365 + rng.randrange(365)))
+
+def _cnic(kind, sequence_id):
+    # unique per collection: a type digit followed by the numeric part of the id
+    return (f"{kind}{int(sequence_id[1:]):012d}")
+
+def _insert(model, instances):
+    for start in range(0, len(instances), BATCH_SIZE):
+        batch = instances[start:start + BATCH_SIZE]
+        model.objects.mongo_insert_many([model_to_document(obj) for obj in batch], ordered=False)
+
+def flush():
+    for model in SEEDED_MODELS:
+        model.objects.mongo_delete_many({})
+    Counter.objects.mongo_delete_many({})
+
+def _hospitals(rng, count):
+    ids = next_sequential_ids(Hospital, 'hospital_id', 'H', count)
+    return ([
+        Hospital(
+            hospital_id=hospital_id,
+            name=f"{rng.choice(LAST_NAMES)} {'Clinic' if i % 4 == 3 else 'Hospital'} {i + 1}",
+            address=f"{rng.randrange(1, 300)} Main Boulevard, {rng.choice(CITIES)}",
+            phone_number=f"042{rng.randrange(10 ** 7):07d}",
+            email=f"{hospital_id.lower()}@bench.healthsync.test",
+            type='clinic' if i % 4 == 3 else 'hospital',
+            opening_time=time(8), closing_time=time(22),
+            doctor_ids=[],
+        )
+        for i, hospital_id in enumerate(ids)
+    ])
+
+def _doctors(rng, count, hospitals, today):
+    doctors = []
+    for doctor_id in next_sequential_ids(Doctor, 'doctor_id', 'D', count):
+        age, birthday = _age_and_birthday(rng, today, 45, 10, 27, 75)
+        hospital = rng.choice(hospitals) if hospitals else None
+        doctor = Doctor(
+            doctor_id=doctor_id, first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            gender=rng.choice(['Male', 'Female']), date_of_birth=birthday, age=age, cnic=_cnic(2, doctor_id),
+            picture=None, education={'degree': rng.choice(DEGREES), 'year': today.year - age + 24},
+            specialization=_pick(rng, SPECIALIZATIONS), hospital_name=hospital.name if hospital else None,
+        )
+        # inserted without save(), so the pre_save signal does not fill this
+        doctor.name_tokens = name_tokens(doctor.first_name, doctor.last_name)
+        if hospital:
+            hospital.doctor_ids.append(str(doctor._id))
+        doctors.append(doctor)
+    return (doctors)
+
+def _patients(rng, count, today):
+    patients = []
+    for patient_id in next_sequential_ids(Patient, 'patient_id', 'P', count):
+        age, birthday = _age_and_birthday(rng, today, 35, 18, 1, 95)
+        patients.append(Patient(
+            patient_id=patient_id, first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            gender=rng.choice(['Male', 'Female']), date_of_birth=birthday, age=age, cnic=_cnic(1, patient_id),
+            address=f"{rng.randrange(1, 999)} Street {rng.randrange(1, 50)}, {rng.choice(CITIES)}",
+            blood_type=_pick(rng, BLOOD_TYPES), emergency_contact=f"03{rng.randrange(10 ** 9):09d}",
+            medical_history=rng.choice(['', '', 'Hypertension', 'Type 2 diabetes', 'Asthma', 'Penicillin allergy']),
+        ))
+    return (patients)
+
+def _timeslots(rng, doctors, per_doctor, days, today):
+    slots = []
+    wanted = [(doctor, rng.randrange(-days, days + 1)) for doctor in doctors for _ in range(per_doctor)]
+    ids = next_sequential_ids(TimeSlot, 'timeslot_id', 'T', len(wanted))
+    taken = set()
+    for timeslot_id, (doctor, offset) in zip(ids, wanted):
+        day = today + timedelta(days=offset)
+        hours = rng.choice([1, 2, 2, 3])
+        start = rng.randrange(8, 21 - hours)
+        if any((doctor.doctor_id, day, hour) in taken for hour in range(start, start + hours)):
+            continue
+        taken.update((doctor.doctor_id, day, hour) for hour in range(start, start + hours))
+        low, high = FEES[doctor.specialization]
+        slots.append(TimeSlot(
+            timeslot_id=timeslot_id, doctor_id=doctor.doctor_id, date=day,
+            start_time=time(start), end_time=time(start + hours),
+            fee=Decimal(rng.randrange(low, high + 1, 500)), availability_status='available',
+        ))
+    return (slots)
+
+def _bookings(rng, count, doctors, patients, slots, today):
+    by_doctor = defaultdict(list)
+    for slot in slots:
+        by_doctor[slot.doctor_id].append(slot)
+    candidates = [doctor for doctor in doctors if by_doctor[doctor.doctor_id]]
+    if not candidates or not patients:
+        return ([], [])
+    # Zipf-like: a few doctors get most of the bookings
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(candidates))]
+    now = timezone.now()
+    booked, chosen = set(), []
+    for _ in range(count * 3):
+        if len(chosen) == count:
+            break
+        doctor = rng.choices(candidates, weights=weights)[0]
+        slot = rng.choice(by_doctor[doctor.doctor_id])
+        windows = (slot.end_time.hour - slot.start_time.hour) * 2
+        start = timezone.make_aware(datetime.combine(slot.date, slot.start_time), timezone.utc) + timedelta(minutes=30 * rng.randrange(windows))
+        if (doctor.doctor_id, start) in booked:
+            continue
+        booked.add((doctor.doctor_id, start))
+        if start < now:
+            appointment_status = 'completed' if rng.random() < 0.85 else 'cancelled'
+        else:
+            appointment_status = 'confirmed' if rng.random() < 0.9 else 'cancelled'
+        chosen.append((doctor, slot, start, appointment_status))
+    bookings, reservations = [], {}
+    ids = next_sequential_ids(Booking, 'booking_id', 'B', len(chosen))
+    for booking_id, (doctor, slot, start, appointment_status) in zip(ids, chosen):
+        end = start + timedelta(minutes=30)
+        bookings.append(Booking(
+            booking_id=booking_id, patient_id=rng.choice(patients).patient_id, doctor_id=doctor.doctor_id,
+            timeslot_id=slot.timeslot_id, date=slot.date, start_time=start, end_time=end,
+            appointment_status=appointment_status,
+        ))
+        if appointment_status == 'confirmed':
+            key = f"{doctor.doctor_id}:{slot.date.isoformat()}"
+            reservation = reservations.setdefault(key, DoctorReservation(key=key, doctor_id=doctor.doctor_id, date=slot.date, intervals=[]))
+            reservation.intervals.append({'booking_id': booking_id, 'start': timezone.make_naive(start, timezone.utc), 'end': timezone.make_naive(end, timezone.utc)})
+    return (bookings, list(reservations.values()))
+
+def _accounts(doctors, patients):
+    # hashing once keeps seeding fast; every account logs in with BENCH_PASSWORD
+    password = make_password(BENCH_PASSWORD)
+    accounts = []
+    for user_type, users, key in (('doctor', doctors, 'doctor_id'), ('patient', patients, 'patient_id')):
+        for user in users:
+            user_id = getattr(user, key)
+            email = f"{user_id.lower()}@bench.healthsync.test"
+            accounts.append(Authentication(
+                user_id=user_id, user_type=user_type, phone_number=f"0300{int(user_id[1:]):07d}",
+                email=email, email_key=normalize_email(email), password=password,
+            ))
+    return (accounts)
+
+def seed(doctors=200, patients=5000, hospitals=10, timeslots_per_doctor=20, bookings=20000, days=30, random_seed=0):
+    rng = random.Random(random_seed)
+    today = timezone.localdate()
+    hospital_objs = _hospitals(rng, hospitals)
+    doctor_objs = _doctors(rng, doctors, hospital_objs, today)
+    patient_objs = _patients(rng, patients, today)
+    slot_objs = _timeslots(rng, doctor_objs, timeslots_per_doctor, days, today)
+    booking_objs, reservation_objs = _bookings(rng, bookings, doctor_objs, patient_objs, slot_objs, today)
+    written = [
+        (Hospital, hospital_objs),
+        (Doctor, doctor_objs),
+        (Patient, patient_objs),
+        (TimeSlot, slot_objs),
+        (Booking, booking_objs),
+        (DoctorReservation, reservation_objs),
+        (Authentication, _accounts(doctor_objs, patient_objs)),
+    ]
+    for model, instances in written:
+        _insert(model, instances)
+    return ({model.__name__: len(instances) for model, instances in written})
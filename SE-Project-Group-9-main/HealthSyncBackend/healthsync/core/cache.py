@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+class LRUCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return (False, None)
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return (False, None)
+            self._data.move_to_end(key)
+            return (True, value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return (len(self._data))
+
+class ReadThroughCache:
+    def __init__(self, name, maxsize, ttl, backend_alias=None):
+        self.name = name
+        # the ttl bounds how long another worker serves a value invalidated here
+        self.ttl = ttl
+        self.local = LRUCache(maxsize, ttl)
+        self.backend_alias = backend_alias
+        self._counts = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return (caches[self.backend_alias] if self.backend_alias else None)
+
+    def _key(self, key):
+        return (f"{self.name}:{key}")
+
+    def _count(self, counter):
+        with self._lock:
+            self._counts[counter] += 1
+
+    def get_or_load(self, key, loader):
+        key = self._key(key)
+        found, value = self.local.get(key)
+        if found:
+            self._count('local_hits')
+            return (value)
+        shared = self.shared
+        if shared is not None:
+            value = shared.get(key)
+            if value is not None:
+                self._count('shared_hits')
+                self.local.set(key, value)
+                return (value)
+        self._count('misses')
+        value = loader()
+        self.local.set(key, value)
+        if shared is not None:
+            shared.set(key, value, self.ttl)
+        return (value)
+
+    def invalidate(self, *keys):
+        keys = [self._key(key) for key in keys]
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete_many(keys)
+        self._count('invalidations')
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['local_hits'] + counts['shared_hits'] + counts['misses']
+        counts['hit_ratio'] = round((lookups - counts['misses']) / lookups, 4) if lookups else None
+        counts['size'] = len(self.local)
+        counts['maxsize'] = self.local.maxsize
+        return (counts)
+
+doctor_cache = ReadThroughCache(
+    'doctor',
+    maxsize=getattr(settings, 'DOCTOR_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'DOCTOR_CACHE_TTL', 60),
+    backend_alias=getattr(settings, 'DOCTOR_CACHE_BACKEND', None),
+)
+
+def invalidate_doctor(*doctor_ids):
+    keys = []
+    for doctor_id in doctor_ids:
+        keys += [f"detail:{doctor_id}", f"summary:{doctor_id}"]
+    doctor_cache.invalidate(*keys)
@@ -0,0 +1,38 @@
+import hashlib
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+# tags come from updated_at, so a 304 needs no serialization; the query string changes the representation
+
+def make_etag(*parts):
+    return ('"' + hashlib.sha1(repr(parts).encode()).hexdigest() + '"')
+
+def document_etag(request, model, **lookup):
+    doc = model.objects.mongo_find_one(lookup, {'updated_at': 1})
+    if doc is None:
+        return (None)
+    return (make_etag(model._meta.label, doc['_id'], doc.get('updated_at'), request.GET.urlencode()))
+
+def collection_etag(request, model, match):
+    # an empty match would aggregate over the whole collection on every request
+    if not match:
+        return (None)
+    summary = next(model.objects.mongo_aggregate([
+        {'$match': match},
+        {'$group': {'_id': None, 'count': {'$sum': 1}, 'last': {'$max': '$updated_at'}}},
+    ]), {})
+    return (make_etag(model._meta.label, summary.get('count', 0), summary.get('last'), request.GET.urlencode()))
+
+def content_etag(request, data):
+    return (make_etag(data, request.GET.urlencode()))
+
+def conditional_response(request, etag, render):
+    if etag is not None:
+        client_tags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in client_tags or '*' in client_tags:
+            return (Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}))
+    response = render()
+    if etag is not None and response.status_code == status.HTTP_200_OK:
+        response['ETag'] = etag
+    return (response)
@@ -0,0 +1,125 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from django.db.models import Q
+from django.utils import timezone
+from pymongo import ReplaceOne
+from pymongo.errors import PyMongoError
+from core.fastpath import row_columns, serialize_row
+from core.models import Booking, Doctor, DoctorCalendar, TimeSlot
+from core.serializers.booking_serializers import BookingSerializer
+from core.serializers.timeslot_serializers import TimeSlotSerializer
+
+logger = logging.getLogger(__name__)
+
+# one pre-serialized document per doctor per day; missing days are built on first read
+
+SLOT_FIELDS = ['timeslot_id', 'date', 'start_time', 'end_time', 'fee', 'availability_status']
+BOOKING_FIELDS = ['booking_id', 'patient_id', 'timeslot_id', 'start_time', 'end_time', 'appointment_status']
+
+def calendar_key(doctor_id, day):
+    return (f"{doctor_id}:{day.isoformat()}")
+
+def _midnight(day):
+    return (datetime(day.year, day.month, day.day))
+
+def slot_entry(timeslot):
+    return (serialize_row(timeslot, TimeSlotSerializer, SLOT_FIELDS))
+
+def booking_entry(booking):
+    return (serialize_row(booking, BookingSerializer, BOOKING_FIELDS))
+
+def _document(doctor_id, day, slots, bookings):
+    return ({
+        'key': calendar_key(doctor_id, day),
+        'doctor_id': doctor_id,
+        'date': _midnight(day),
+        'slots': sorted((slot_entry(s) for s in slots), key=lambda e: e['start_time'] or ''),
+        'bookings': sorted((booking_entry(b) for b in bookings), key=lambda e: e['start_time']),
+        'updated_at': timezone.now(),
+    })
+
+def build_days(doctor_id, days):
+    days = sorted(set(days))
+    if not days:
+        return (0)
+    slots = TimeSlot.objects.filter(doctor_id=doctor_id).filter(Q(date__isnull=True) | Q(date__in=days))
+    bookings = Booking.objects.filter(doctor_id=doctor_id, date__in=days)
+    recurring, dated, booked = [], defaultdict(list), defaultdict(list)
+    for slot in slots.values(*row_columns(TimeSlotSerializer, SLOT_FIELDS)):
+        (dated[slot['date']] if slot['date'] else recurring).append(slot)
+    for booking in bookings.values(*row_columns(BookingSerializer, BOOKING_FIELDS + ['date'])):
+        booked[booking['date']].append(booking)
+    DoctorCalendar.objects.mongo_bulk_write([
+        ReplaceOne({'key': calendar_key(doctor_id, day)}, _document(doctor_id, day, recurring + dated[day], booked[day]), upsert=True)
+        for day in days
+    ], ordered=False)
+    return (len(days))
+
+def get_day(doctor_id, day):
+    document = DoctorCalendar.objects.mongo_find_one({'key': calendar_key(doctor_id, day)}, {'_id': 0, 'key': 0})
+    if document is None:
+        if not Doctor.objects.filter(doctor_id=doctor_id).exists():
+            return (None)
+        build_days(doctor_id, [day])
+        document = DoctorCalendar.objects.mongo_find_one({'key': calendar_key(doctor_id, day)}, {'_id': 0, 'key': 0})
+    return (document)
+
+def _patch(match, updates, many=False, **options):
+    # the source write already succeeded; a failed patch is logged and left to rebuild_calendar
+    try:
+        for update in updates:
+            update.setdefault('$set', {})['updated_at'] = timezone.now()
+            if many:
+                DoctorCalendar.objects.mongo_update_many(match, update, **options)
+            else:
+                DoctorCalendar.objects.mongo_update_one(match, update, **options)
+    except PyMongoError as e:
+        logger.warning(f"Could not update doctor calendar {match}: {e}")
+
+def _push(field, entries):
+    return ({'$push': {field: {'$each': entries, '$sort': {'start_time': 1}}}})
+
+def booking_saved(booking, previous=None):
+    if previous and previous != (booking.doctor_id, booking.date):
+        booking_removed(booking.booking_id, *previous)
+    if booking.date is None:
+        return
+    match = {'key': calendar_key(booking.doctor_id, booking.date)}
+    _patch(match, [
+        {'$pull': {'bookings': {'booking_id': booking.booking_id}}},
+        _push('bookings', [booking_entry(booking)]),
+    ])
+
+def booking_removed(booking_id, doctor_id, day):
+    if day is None:
+        return
+    _patch({'key': calendar_key(doctor_id, day)}, [{'$pull': {'bookings': {'booking_id': booking_id}}}])
+
+def bookings_cancelled(doctor_id, date_from, date_to, booking_ids):
+    _patch(
+        {'doctor_id': doctor_id, 'date': {'$gte': _midnight(date_from), '$lte': _midnight(date_to)}},
+        [{'$set': {'bookings.$[booking].appointment_status': 'cancelled'}}],
+        many=True,
+        array_filters=[{'booking.booking_id': {'$in': list(booking_ids)}}],
+    )
+
+def timeslots_saved(timeslots, previous=None):
+    for timeslot in timeslots:
+        if previous and previous != (timeslot.doctor_id, timeslot.date):
+            timeslot_removed(timeslot.timeslot_id, *previous)
+    groups = defaultdict(list)
+    for timeslot in timeslots:
+        groups[(timeslot.doctor_id, timeslot.date)].append(timeslot)
+    for (doctor_id, day), group in groups.items():
+        # undated timeslots repeat daily, so they go on every stored day of the doctor
+        match = {'doctor_id': doctor_id} if day is None else {'key': calendar_key(doctor_id, day)}
+        ids = [timeslot.timeslot_id for timeslot in group]
+        _patch(match, [
+            {'$pull': {'slots': {'timeslot_id': {'$in': ids}}}},
+            _push('slots', [slot_entry(timeslot) for timeslot in group]),
+        ], many=day is None)
+
+def timeslot_removed(timeslot_id, doctor_id, day):
+    match = {'doctor_id': doctor_id} if day is None else {'key': calendar_key(doctor_id, day)}
+    _patch(match, [{'$pull': {'slots': {'timeslot_id': timeslot_id}}}], many=day is None)
@@ -0,0 +1,34 @@
+import csv
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+from core.fastpath import row_serializer, serialize_row
+from core.renderers import FastJSONRenderer
+
+def export_chunk_size():
+    return (getattr(settings, 'EXPORT_CHUNK_SIZE', 1000))
+
+def _serialized(rows, serializer_class, fields):
+    encode = row_serializer(serializer_class, fields)
+    for row in rows.iterator(chunk_size=export_chunk_size()):
+        yield (encode(row) if isinstance(row, dict) else serialize_row(row, serializer_class, fields))
+
+def stream_ndjson(rows, serializer_class, fields=None):
+    renderer = FastJSONRenderer()
+    for item in _serialized(rows, serializer_class, fields):
+        yield (renderer.render(item) + b'\n')
+
+class _Echo:
+    def write(self, value):
+        return (value)
+
+def _csv_value(value):
+    # nested values (JSON fields) are written as JSON text instead of Python repr
+    if isinstance(value, (dict, list)):
+        return (JSONEncoder(ensure_ascii=False).encode(value))
+    return (value)
+
+def stream_csv(rows, serializer_class, fields=None):
+    writer = csv.writer(_Echo())
+    yield (writer.writerow(row_serializer(serializer_class, fields).names))
+    for item in _serialized(rows, serializer_class, fields):
+        yield (writer.writerow([_csv_value(value) for value in item.values()]))
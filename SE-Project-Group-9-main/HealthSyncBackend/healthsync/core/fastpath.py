@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ParseError
+from rest_framework.fields import ModelField
+
+# serializes queryset.values() rows with the ModelSerializer's own fields
+
+class _Row:
+    def __init__(self, attname, value):
+        setattr(self, attname, value)
+
+class RowSerializer:
+    def __init__(self, serializer_class, fields=None):
+        self.plan = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            if isinstance(field, ModelField):
+                # ModelField reads the whole instance, so hand it a one-attribute stand-in
+                attname = field.model_field.attname
+                convert = (lambda value, f=field, a=attname: f.to_representation(_Row(a, value)))
+            else:
+                attname = field.source
+                convert = field.to_representation
+            self.plan.append((name, attname, convert))
+        self.names = [name for name, _, _ in self.plan]
+        self.columns = [attname for _, attname, _ in self.plan]
+
+    def __call__(self, row):
+        return ({
+            name: None if row[attname] is None else convert(row[attname])
+            for name, attname, convert in self.plan
+        })
+
+_row_serializers = {}
+
+def row_serializer(serializer_class, fields=None):
+    key = (serializer_class, tuple(fields) if fields is not None else None)
+    if key not in _row_serializers:
+        _row_serializers[key] = RowSerializer(serializer_class, fields)
+    return (_row_serializers[key])
+
+def fast_path_enabled():
+    return (getattr(settings, 'FAST_LIST_SERIALIZATION', True))
+
+def _split(value):
+    return ([name.strip() for name in (value or '').split(',') if name.strip()])
+
+def parse_fieldset(request, serializer_class):
+    fields = _split(request.query_params.get('fields'))
+    exclude = _split(request.query_params.get('exclude'))
+    if not fields and not exclude:
+        return (None)
+    available = row_serializer(serializer_class).names
+    unknown = [name for name in fields + exclude if name not in available]
+    if unknown:
+        raise ParseError({'error': f'Unknown fields: {", ".join(unknown)}'})
+    return ([name for name in available if (not fields or name in fields) and name not in exclude])
+
+def parse_ids(request):
+    if 'ids' not in request.query_params:
+        return (None)
+    ids = list(dict.fromkeys(_split(request.query_params.get('ids'))))
+    maximum = getattr(settings, 'API_MAX_IDS', 100)
+    if not ids:
+        raise ParseError({'error': 'ids must list at least one id'})
+    if len(ids) > maximum:
+        raise ParseError({'error': f'At most {maximum} ids per request'})
+    return (ids)
+
+def row_columns(serializer_class, fields=None, extra=()):
+    # _id is always read for keyset pagination
+    return (list(dict.fromkeys(['_id'] + row_serializer(serializer_class, fields).columns + list(extra))))
+
+def as_rows(queryset, serializer_class, fields=None, extra=()):
+    columns = row_columns(serializer_class, fields, extra)
+    if fast_path_enabled():
+        return (queryset.values(*columns))
+    if fields is not None:
+        return (queryset.only(*columns))
+    return (queryset)
+
+def serialize_row(row, serializer_class, fields=None):
+    if isinstance(row, dict):
+        return (row_serializer(serializer_class, fields)(row))
+    data = serializer_class(row).data
+    if fields is not None:
+        data = {name: data[name] for name in fields}
+    return (data)
+
+def serialize_rows(rows, serializer_class, fields=None):
+    rows = list(rows)
+    if rows and isinstance(rows[0], dict):
+        encode = row_serializer(serializer_class, fields)
+        return ([encode(row) for row in rows])
+    data = serializer_class(rows, many=True).data
+    if fields is not None:
+        data = [{name: item[name] for name in fields} for item in data]
+    return (data)
+
+def get_serialized_or_404(queryset, serializer_class, fields=None, **lookup):
+    return (serialize_row(get_object_or_404(as_rows(queryset, serializer_class, fields), **lookup), serializer_class, fields))
+
+def row_value(row, name):
+    return (row[name] if isinstance(row, dict) else getattr(row, name))
+
+def serialized_by_ids(queryset, serializer_class, key, ids, fields=None):
+    rows = as_rows(queryset.filter(**{f'{key}__in': ids}), serializer_class, fields, [key])
+    found = {row_value(row, key): row for row in rows}
+    return ({
+        'results': serialize_rows([found[i] for i in ids if i in found], serializer_class, fields),
+        'missing': [i for i in ids if i not in found],
+    })
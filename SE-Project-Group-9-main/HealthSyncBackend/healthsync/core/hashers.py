@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from core.metrics import timed
+
+# The pool only bounds how many hashes run at once; the request thread still
+# waits on the result. Past the queue limit a login gets a quick 503.
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return (getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations))
+
+class HashingBusy(Exception):
+    pass
+
+_lock = threading.Lock()
+_pool = None
+_slots = None
+
+def _executor():
+    global _pool, _slots
+    with _lock:
+        if _pool is None:
+            workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 0)
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            # one slot per running hash plus one per queued hash
+            _slots = threading.BoundedSemaphore(workers + getattr(settings, 'PASSWORD_HASH_QUEUE', 32))
+    return (_pool)
+
+def _run(function, *args):
+    with timed('hash'):
+        if getattr(settings, 'PASSWORD_HASH_WORKERS', 0) <= 0:
+            return (function(*args))
+        pool = _executor()
+        if not _slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = pool.submit(function, *args)
+        except Exception:
+            _slots.release()
+            raise
+        future.add_done_callback(lambda f: _slots.release())
+        return (future.result())
+
+def _verify(password, encoded):
+    upgraded = []
+    # Django calls the setter only for a correct password whose hash is outdated
+    password_ok = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return (password_ok, upgraded[0] if upgraded else None)
+
+def hash_password(password):
+    return (_run(make_password, password))
+
+def verify_password(password, encoded):
+    return (_run(_verify, password, encoded))
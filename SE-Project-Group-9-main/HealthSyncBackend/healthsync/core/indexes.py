@@ -0,0 +1,66 @@
+import logging
+from pymongo import ASCENDING, IndexModel
+from core.models import Authentication, Booking, Doctor, DoctorCalendar, EmailOutbox, TimeSlot
+
+logger = logging.getLogger(__name__)
+
+# the unique *_id indexes come from the migrations
+MANAGED_INDEXES = {
+    Booking: [
+        IndexModel(
+            [('doctor_id', ASCENDING), ('date', ASCENDING), ('appointment_status', ASCENDING), ('start_time', ASCENDING)],
+            name='booking_doctor_date_status_start',
+        ),
+        # updated_at keeps the ETag aggregate for ?doctor_id= and ?patient_id= inside the index
+        IndexModel([('doctor_id', ASCENDING), ('updated_at', ASCENDING)], name='booking_doctor_updated'),
+        IndexModel([('patient_id', ASCENDING), ('updated_at', ASCENDING)], name='booking_patient_updated'),
+        # the reminder scheduler scans only the due window: one status, a day or two, a start_time range
+        IndexModel([('appointment_status', ASCENDING), ('date', ASCENDING), ('start_time', ASCENDING)], name='booking_status_date_start'),
+    ],
+    Doctor: [
+        IndexModel([('specialization', ASCENDING), ('hospital_name', ASCENDING)], name='doctor_specialization_hospital'),
+        # multikey: one entry per normalized name word, for prefix search
+        IndexModel([('name_tokens', ASCENDING)], name='doctor_name_tokens'),
+    ],
+    TimeSlot: [
+        IndexModel([('doctor_id', ASCENDING), ('updated_at', ASCENDING)], name='timeslot_doctor_updated'),
+    ],
+    Authentication: [
+        IndexModel([('user_id', ASCENDING)], name='auth_user'),
+        IndexModel([('email_key', ASCENDING)], name='auth_email_key'),
+    ],
+    DoctorCalendar: [
+        # undated timeslot writes patch every stored day of the doctor
+        IndexModel([('doctor_id', ASCENDING), ('date', ASCENDING)], name='calendar_doctor_date'),
+    ],
+    EmailOutbox: [
+        IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)], name='outbox_status_due'),
+    ],
+}
+
+def ensure_indexes():
+    created = {}
+    for model, indexes in MANAGED_INDEXES.items():
+        created[model._meta.db_table] = model.objects.mongo_create_indexes(indexes)
+    return (created)
+
+def missing_indexes():
+    missing = {}
+    for model, indexes in MANAGED_INDEXES.items():
+        existing = model.objects.mongo_index_information()
+        names = [index.document['name'] for index in indexes if index.document['name'] not in existing]
+        if names:
+            missing[model._meta.db_table] = names
+    return (missing)
+
+def verify_indexes():
+    try:
+        missing = missing_indexes()
+    except Exception as e:
+        logger.warning(f"Could not verify MongoDB indexes: {e}")
+        return
+    for collection, names in missing.items():
+        logger.warning(
+            f"Collection {collection} is missing indexes {', '.join(names)}; "
+            "run 'python manage.py ensure_indexes'"
+        )
@@ -0,0 +1,52 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmark.driver import ENDPOINTS, compare, run
+
+class Command(BaseCommand):
+    help = 'Drive every API route concurrently and report latency percentiles, throughput and MongoDB commands per request.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per worker before each endpoint.')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append', help='Only these endpoints (repeatable).')
+        parser.add_argument('--writes', action='store_true', help='Also run the routes that create, update or delete data.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Results file from an earlier run to diff against.')
+
+    def _progress(self, name, result):
+        self.stdout.write(
+            f"{name:22} {result['method']:6} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+            f"p99 {result['p99_ms']:>9.2f}ms  {result['throughput_rps']:>8.1f} req/s  "
+            f"{result['queries_per_request']:>6.2f} queries  {result['status']}"
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+        results = run(
+            names=options['endpoint'],
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            warmup=options['warmup'],
+            writes=options['writes'],
+            random_seed=options['seed'],
+            progress=self._progress,
+        )
+        for name, reason in results['skipped'].items():
+            self.stdout.write(self.style.WARNING(f"{name:22} skipped: {reason}"))
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline is not None:
+            self.stdout.write(f"\nCompared with {baseline.get('meta', {}).get('git_commit') or options['compare']}:")
+            for name, metric, old, new, change in compare(baseline, results):
+                change = 'n/a' if change is None else f"{change:+.1f}%"
+                self.stdout.write(f"{name:22} {metric:20} {old!s:>10} -> {new!s:>10}  {change}")
@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand
+from core.benchmark.driver import ASYNC_ENDPOINTS, compare, run_stacks
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync API on a WSGI server with the /api/async/ endpoints on an ASGI server, '
+        'e.g. "gunicorn healthsync.wsgi" on :8000 and "gunicorn healthsync.asgi -k uvicorn.workers.UvicornWorker" on :8001 '
+        'with the same number of workers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--async-url', default='http://127.0.0.1:8001')
+        parser.add_argument('--requests', type=int, default=500, help='Measured requests per endpoint and stack.')
+        parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight at once.')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per client thread before each endpoint.')
+        parser.add_argument('--endpoint', choices=ASYNC_ENDPOINTS, action='append', help='Only these endpoints (repeatable).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def _progress(self, name, result):
+        self.stdout.write(
+            f"{name:30} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+            f"p99 {result['p99_ms']:>9.2f}ms  {result['throughput_rps']:>8.1f} req/s  {result['status']}"
+        )
+
+    def handle(self, *args, **options):
+        results = run_stacks(
+            options['sync_url'],
+            options['async_url'],
+            names=options['endpoint'],
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            warmup=options['warmup'],
+            random_seed=options['seed'],
+            progress=self._progress,
+        )
+        for name, reason in results['sync']['skipped'].items():
+            self.stdout.write(self.style.WARNING(f"{name:30} skipped: {reason}"))
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+        self.stdout.write('\nasync compared with sync:')
+        for name, metric, old, new, change in compare(results['sync'], results['async']):
+            change = 'n/a' if change is None else f"{change:+.1f}%"
+            self.stdout.write(f"{name:22} {metric:20} {old!s:>10} -> {new!s:>10}  {change}")
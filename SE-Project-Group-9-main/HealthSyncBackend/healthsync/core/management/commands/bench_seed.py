@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmark.seed import flush, seed
+from core.indexes import ensure_indexes
+
+class Command(BaseCommand):
+    help = 'Fill the configured MongoDB with synthetic doctors, patients, timeslots and bookings for load tests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=200)
+        parser.add_argument('--patients', type=int, default=5000)
+        parser.add_argument('--hospitals', type=int, default=10)
+        parser.add_argument('--timeslots-per-doctor', type=int, default=20)
+        parser.add_argument('--bookings', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=30, help='Timeslots span this many days either side of today.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed on an empty database gives the same data.')
+        parser.add_argument('--flush', action='store_true', help='Delete all doctors, patients, timeslots, bookings, hospitals and accounts first.')
+        parser.add_argument('--yes', action='store_true', help='Do not ask before --flush.')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            if not options['yes'] and input('This deletes every document in the seeded collections. Type "yes" to continue: ') != 'yes':
+                raise CommandError('Aborted')
+            flush()
+        ensure_indexes()
+        written = seed(
+            doctors=options['doctors'],
+            patients=options['patients'],
+            hospitals=options['hospitals'],
+            timeslots_per_doctor=options['timeslots_per_doctor'],
+            bookings=options['bookings'],
+            days=options['days'],
+            random_seed=options['seed'],
+        )
+        for model, count in written.items():
+            self.stdout.write(f"{model:18} {count:>8}")
+        self.stdout.write(self.style.SUCCESS('Seeded benchmark data'))
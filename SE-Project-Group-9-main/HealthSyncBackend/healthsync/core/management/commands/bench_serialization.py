@@ -0,0 +1,94 @@
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from core.fastpath import RowSerializer
+from core.models import Authentication, Booking, Doctor, Patient, TimeSlot
+from core.renderers import FastJSONRenderer
+from core.serializers.authentication_serializers import AuthenticationSerializer
+from core.serializers.booking_serializers import BookingSerializer
+from core.serializers.doctor_serializers import DoctorSerializer
+from core.serializers.patient_serializers import PatientSerializer
+from core.serializers.timeslot_serializers import TimeSlotSerializer
+
+def _doctor(i):
+    return (Doctor(
+        doctor_id=f"D{i}", first_name=f"First{i}", last_name=f"Last{i}", gender=random.choice(['Male', 'Female']),
+        date_of_birth=date(1960, 1, 1) + timedelta(days=i % 12000), age=30 + i % 35, cnic=f"{i:013d}",
+        picture=None, education={'degree': 'MBBS', 'school': 'KEMU', 'year': 2000 + i % 20},
+        specialization=random.choice(['Cardiology', 'Dermatology', 'Neurology']), hospital_name='City Hospital',
+    ))
+
+def _patient(i):
+    return (Patient(
+        patient_id=f"P{i}", first_name=f"First{i}", last_name=f"Last{i}", gender='Female',
+        date_of_birth=date(1980, 5, 1) + timedelta(days=i % 9000), age=20 + i % 50, cnic=f"{i:013d}",
+        address=f"{i} Main Street, Lahore", blood_type='O+', emergency_contact='03001234567',
+        medical_history='No known allergies. ' * 10,
+    ))
+
+def _timeslot(i):
+    return (TimeSlot(
+        timeslot_id=f"T{i}", doctor_id=f"D{i % 200}", date=date(2026, 1, 1) + timedelta(days=i % 90),
+        start_time=dtime(9 + i % 8, 0), end_time=dtime(9 + i % 8, 30), fee=Decimal('1500.00'),
+    ))
+
+def _booking(i):
+    start = timezone.make_aware(datetime(2026, 1, 1, 9) + timedelta(minutes=30 * i))
+    return (Booking(
+        booking_id=f"B{i}", patient_id=f"P{i % 5000}", doctor_id=f"D{i % 200}", timeslot_id=f"T{i % 3000}",
+        date=start.date(), start_time=start, end_time=start + timedelta(minutes=30), appointment_status='confirmed',
+    ))
+
+def _authentication(i):
+    return (Authentication(
+        user_id=f"P{i}", user_type='patient', phone_number=f"0300{i:07d}", email=f"user{i}@example.com",
+        password='pbkdf2_sha256$260000$salt$hash',
+    ))
+
+CASES = {
+    'doctor': (_doctor, DoctorSerializer),
+    'patient': (_patient, PatientSerializer),
+    'timeslot': (_timeslot, TimeSlotSerializer),
+    'booking': (_booking, BookingSerializer),
+    'authentication': (_authentication, AuthenticationSerializer),
+}
+
+class Command(BaseCommand):
+    help = 'Compare rows/second of the ModelSerializer list path against the read-only fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--model', choices=sorted(CASES), action='append')
+
+    def _best(self, fn, repeat):
+        best, out = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            out = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return (best, out)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        rows = options['rows']
+        for name in options['model'] or sorted(CASES):
+            build, serializer_class = CASES[name]
+            instances = [build(i) for i in range(rows)]
+            fast = RowSerializer(serializer_class)
+            # the fast path receives what queryset.values() would return
+            dict_rows = [{column: getattr(obj, column) for column in fast.columns} for obj in instances]
+            baseline_time, baseline = self._best(
+                lambda: JSONRenderer().render(serializer_class(instances, many=True).data), options['repeat'])
+            fast_time, fast_out = self._best(
+                lambda: FastJSONRenderer().render([fast(row) for row in dict_rows]), options['repeat'])
+            self.stdout.write(
+                f"{name:15} serializer {rows / baseline_time:>10,.0f} rows/s   "
+                f"fast path {rows / fast_time:>10,.0f} rows/s   "
+                f"x{baseline_time / fast_time:.1f}   identical={baseline == fast_out}"
+            )
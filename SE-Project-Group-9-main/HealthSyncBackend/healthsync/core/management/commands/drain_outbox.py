@@ -0,0 +1,23 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.outbox import drain_once
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails in batches over a reused SMTP connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50))
+        parser.add_argument('--interval', type=float, default=getattr(settings, 'EMAIL_OUTBOX_POLL_SECONDS', 5))
+        parser.add_argument('--once', action='store_true', help='Drain the due messages once and exit.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            claimed, sent = drain_once(batch_size)
+            if claimed:
+                self.stdout.write(f"Sent {sent}/{claimed} outbox emails")
+            if options['once'] and claimed < batch_size:
+                break
+            if claimed < batch_size:
+                time.sleep(options['interval'])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.indexes import ensure_indexes, missing_indexes
+
+class Command(BaseCommand):
+    help = 'Create the MongoDB indexes declared in core.indexes.MANAGED_INDEXES.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report missing indexes; exit 1 if any.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            missing = missing_indexes()
+            for collection, names in missing.items():
+                self.stdout.write(f"{collection}: missing {', '.join(names)}")
+            if missing:
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS('All managed indexes present'))
+            return
+        for collection, names in ensure_indexes().items():
+            self.stdout.write(f"{collection}: {', '.join(names)}")
+        self.stdout.write(self.style.SUCCESS('Indexes are up to date'))
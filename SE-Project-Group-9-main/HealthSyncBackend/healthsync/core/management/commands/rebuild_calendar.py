@@ -0,0 +1,45 @@
+from collections import defaultdict
+from datetime import date, datetime
+from django.core.management.base import BaseCommand, CommandError
+from core.doctor_calendar import build_days
+from core.models import Booking, DoctorCalendar, TimeSlot
+
+def _days(model, match):
+    pairs = model.objects.mongo_aggregate([
+        {'$match': dict(match, date={**match.get('date', {}), '$ne': None})},
+        {'$group': {'_id': {'doctor_id': '$doctor_id', 'date': '$date'}}},
+    ])
+    return ([(pair['_id']['doctor_id'], pair['_id']['date'].date()) for pair in pairs])
+
+class Command(BaseCommand):
+    help = 'Rebuild doctor calendar days from timeslots and bookings, for backfill or repair.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctor', action='append', help='Only this doctor_id (repeatable).')
+        parser.add_argument('--date-from', help='YYYY-MM-DD; defaults to the earliest day with data.')
+        parser.add_argument('--date-to', help='YYYY-MM-DD; defaults to the latest day with data.')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options['date_from']) if options['date_from'] else None
+            date_to = date.fromisoformat(options['date_to']) if options['date_to'] else None
+        except ValueError:
+            raise CommandError('Dates must be YYYY-MM-DD')
+        match = {}
+        if options['doctor']:
+            match['doctor_id'] = {'$in': options['doctor']}
+        if date_from or date_to:
+            match['date'] = {}
+            if date_from:
+                match['date']['$gte'] = datetime(date_from.year, date_from.month, date_from.day)
+            if date_to:
+                match['date']['$lte'] = datetime(date_to.year, date_to.month, date_to.day)
+        # every day with a booking or a dated timeslot, plus days already materialized
+        days = defaultdict(set)
+        for model in (Booking, TimeSlot, DoctorCalendar):
+            for doctor_id, day in _days(model, match):
+                days[doctor_id].add(day)
+        total = 0
+        for doctor_id in sorted(days):
+            total += build_days(doctor_id, days[doctor_id])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} calendar days for {len(days)} doctors"))
@@ -0,0 +1,22 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.reminders import run_once, scheduler_token
+
+class Command(BaseCommand):
+    help = 'Queue 24h and 1h appointment reminders as they fall due. Several instances can run side by side.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'REMINDER_BATCH_SIZE', 200))
+        parser.add_argument('--interval', type=float, default=getattr(settings, 'REMINDER_POLL_SECONDS', 60))
+        parser.add_argument('--once', action='store_true', help='Queue the reminders due now and exit.')
+
+    def handle(self, *args, **options):
+        token = scheduler_token()
+        while True:
+            queued = run_once(options['batch_size'], token)
+            if any(queued.values()):
+                self.stdout.write(', '.join(f"{count} {name} reminders" for name, count in queued.items()) + ' queued')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pymongo import monitoring
+
+# timings are per request (thread or task); histograms are per worker process
+
+_request = ContextVar('healthsync_request_timings', default=(None, None))
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def start_request():
+    _request.set((defaultdict(float), defaultdict(int)))
+
+def finish_request():
+    timings, counts = _current()
+    _request.set((None, None))
+    return (timings or {}, counts or {})
+
+def _current():
+    return (_request.get())
+
+def add(phase, seconds, count=1):
+    timings, counts = _current()
+    if timings is not None:
+        timings[phase] += seconds
+        counts[phase] += count
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(phase, time.perf_counter() - started)
+
+def orm_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return (execute(sql, params, many, context))
+    finally:
+        add('orm', time.perf_counter() - started)
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        add('mongo', event.duration_micros / 1e6)
+
+    def failed(self, event):
+        add('mongo', event.duration_micros / 1e6)
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.setdefault(label_values, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, [list(value[0]), value[1], value[2]]) for key, value in self._series.items())
+        for label_values, (bucket_counts, total, count) in series:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            prefix = labels + ',' if labels else ''
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return (lines)
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+
+REQUEST_SECONDS = Histogram(
+    'healthsync_request_duration_seconds', 'Total time spent handling a request.',
+    ('method', 'route', 'status'), DURATION_BUCKETS,
+)
+PHASE_SECONDS = Histogram(
+    'healthsync_request_phase_seconds', 'Time per request spent in one phase (orm, mongo, email, hash).',
+    ('method', 'route', 'phase'), DURATION_BUCKETS,
+)
+MONGO_COMMANDS = Histogram(
+    'healthsync_request_mongo_commands', 'MongoDB commands issued per request.',
+    ('method', 'route'), COUNT_BUCKETS,
+)
+HISTOGRAMS = [REQUEST_SECONDS, PHASE_SECONDS, MONGO_COMMANDS]
+
+def record(method, route, status, total, timings, counts):
+    REQUEST_SECONDS.observe(total, method, route, str(status))
+    for phase, seconds in timings.items():
+        PHASE_SECONDS.observe(seconds, method, route, phase)
+    MONGO_COMMANDS.observe(counts.get('mongo', 0), method, route)
+
+def server_timing(total, timings, counts):
+    entries = [
+        f'{phase};dur={seconds * 1000:.2f};desc="{counts[phase]} call{"s" if counts[phase] != 1 else ""}"'
+        for phase, seconds in sorted(timings.items())
+    ]
+    entries.append(f'total;dur={total * 1000:.2f}')
+    return (', '.join(entries))
+
+def exposition():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    return ('\n'.join(lines) + '\n')
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from contextlib import ExitStack
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+from core import metrics
+
+def metrics_enabled():
+    return (getattr(settings, 'METRICS_ENABLED', True))
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return (self.__acall__(request))
+        if not metrics_enabled():
+            return (self.get_response(request))
+        metrics.start_request()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.orm_wrapper))
+                response = self.get_response(request)
+        finally:
+            total = time.perf_counter() - started
+            timings, counts = metrics.finish_request()
+        return (self._finish(request, response, total, timings, counts))
+
+    async def __acall__(self, request):
+        # async views query through motor, which they time themselves; the ORM wrapper is not needed
+        if not metrics_enabled():
+            return (await self.get_response(request))
+        metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            total = time.perf_counter() - started
+            timings, counts = metrics.finish_request()
+        return (self._finish(request, response, total, timings, counts))
+
+    def _finish(self, request, response, total, timings, counts):
+        match = getattr(request, 'resolver_match', None)
+        route = '/' + match.route if match is not None and match.route else 'unmatched'
+        metrics.record(request.method, route, response.status_code, total, timings, counts)
+        response['Server-Timing'] = metrics.server_timing(total, timings, counts)
+        return (response)
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    # whitenoise is sync-only; serving from its in-memory file table needs no I/O
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return (self.__acall__(request))
+        return (super().__call__(request))
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return (self.serve(static_file, request))
+        return (await self.get_response(request))
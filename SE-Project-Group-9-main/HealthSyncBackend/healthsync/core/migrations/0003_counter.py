@@ -0,0 +1,23 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:09
+
+import bson.objectid
+from django.db import migrations, models
+import djongo.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, default=bson.objectid.ObjectId, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('seq', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:11
+
+from datetime import datetime, timezone
+import bson.objectid
+from django.db import migrations, models
+import djongo.models.fields
+
+
+def _to_datetime(value):
+    if not isinstance(value, str):
+        return value
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def convert_booking_times(apps, schema_editor):
+    db = schema_editor.connection.cursor().db_conn
+    bookings = db['core_booking']
+    reservations = {}
+    for doc in bookings.find({}, {'booking_id': 1, 'doctor_id': 1, 'date': 1, 'start_time': 1, 'end_time': 1, 'appointment_status': 1}):
+        start, end = _to_datetime(doc.get('start_time')), _to_datetime(doc.get('end_time'))
+        if start is not doc.get('start_time') or end is not doc.get('end_time'):
+            bookings.update_one({'_id': doc['_id']}, {'$set': {'start_time': start, 'end_time': end}})
+        if doc.get('appointment_status') == 'confirmed' and doc.get('date') and start and end:
+            day = doc['date']
+            key = f"{doc['doctor_id']}:{day.date().isoformat()}"
+            entry = reservations.setdefault(key, {'doctor_id': doc['doctor_id'], 'date': day, 'intervals': []})
+            entry['intervals'].append({'booking_id': doc['booking_id'], 'start': start, 'end': end})
+    for key, entry in reservations.items():
+        db['core_doctorreservation'].update_one({'key': key}, {'$set': entry}, upsert=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorReservation',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, default=bson.objectid.ObjectId, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('doctor_id', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('intervals', djongo.models.fields.JSONField(default=list)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='end_time',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='start_time',
+            field=models.DateTimeField(),
+        ),
+        migrations.RunPython(convert_booking_times, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_booking_datetimes_reservations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeslot',
+            name='date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
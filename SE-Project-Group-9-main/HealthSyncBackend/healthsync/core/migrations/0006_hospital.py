@@ -0,0 +1,30 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:14
+
+import bson.objectid
+from django.db import migrations, models
+import djongo.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_timeslot_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hospital',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, default=bson.objectid.ObjectId, primary_key=True, serialize=False)),
+                ('hospital_id', models.CharField(max_length=50, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('address', models.TextField()),
+                ('phone_number', models.CharField(max_length=20)),
+                ('email', models.EmailField(max_length=254)),
+                ('type', models.CharField(choices=[('clinic', 'Clinic'), ('hospital', 'Hospital')], max_length=10)),
+                ('opening_time', models.TimeField()),
+                ('closing_time', models.TimeField()),
+                ('doctor_ids', djongo.models.fields.JSONField(default=list)),
+            ],
+        ),
+    ]
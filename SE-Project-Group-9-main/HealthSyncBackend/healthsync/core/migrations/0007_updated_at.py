@@ -0,0 +1,52 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:18
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_updated_at(apps, schema_editor):
+    db = schema_editor.connection.cursor().db_conn
+    now = timezone.now()
+    for name in ('authentication', 'booking', 'doctor', 'hospital', 'patient', 'timeslot'):
+        db[f'core_{name}'].update_many({'updated_at': None}, {'$set': {'updated_at': now}})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_hospital'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authentication',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='hospital',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='timeslot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
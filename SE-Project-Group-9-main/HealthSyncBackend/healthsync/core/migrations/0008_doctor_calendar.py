@@ -0,0 +1,27 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:27
+
+import bson.objectid
+from django.db import migrations, models
+import djongo.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorCalendar',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, default=bson.objectid.ObjectId, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('doctor_id', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('slots', djongo.models.fields.JSONField(default=list)),
+                ('bookings', djongo.models.fields.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:29
+
+import bson.objectid
+from django.db import migrations, models
+import django.utils.timezone
+import djongo.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_doctor_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, default=bson.objectid.ObjectId, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('doctors', djongo.models.fields.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
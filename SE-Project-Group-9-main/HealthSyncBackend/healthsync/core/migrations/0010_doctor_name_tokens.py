@@ -0,0 +1,41 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:30
+
+import re
+import unicodedata
+from django.db import migrations
+from pymongo import UpdateOne
+import djongo.models.fields
+
+
+def _normalize(value):
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return (re.findall(r'\w+', stripped.casefold()))
+
+
+def backfill_name_tokens(apps, schema_editor):
+    db = schema_editor.connection.cursor().db_conn
+    updates = [
+        UpdateOne({'_id': doc['_id']}, {'$set': {
+            'name_tokens': list(dict.fromkeys(_normalize(doc.get('first_name')) + _normalize(doc.get('last_name')))),
+        }})
+        for doc in db['core_doctor'].find({}, {'first_name': 1, 'last_name': 1})
+    ]
+    if updates:
+        db['core_doctor'].bulk_write(updates, ordered=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_booking_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='name_tokens',
+            field=djongo.models.fields.JSONField(default=list),
+        ),
+        migrations.RunPython(backfill_name_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:32
+
+from django.db import migrations, models
+from pymongo import UpdateOne
+
+
+def backfill_email_key(apps, schema_editor):
+    db = schema_editor.connection.cursor().db_conn
+    updates = [
+        UpdateOne({'_id': doc['_id']}, {'$set': {'email_key': (doc.get('email') or '').strip().lower()}})
+        for doc in db['core_authentication'].find({}, {'email': 1})
+    ]
+    if updates:
+        db['core_authentication'].bulk_write(updates, ordered=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_doctor_name_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authentication',
+            name='email_key',
+            field=models.CharField(default='', max_length=254),
+        ),
+        migrations.RunPython(backfill_email_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:38
+
+from django.db import migrations
+import djongo.models.fields
+
+
+def backfill_reminded_at(apps, schema_editor):
+    db = schema_editor.connection.cursor().db_conn
+    db['core_booking'].update_many({'reminded_at': {'$exists': False}}, {'$set': {'reminded_at': {}}})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_authentication_email_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='reminded_at',
+            field=djongo.models.fields.JSONField(default=dict),
+        ),
+        migrations.RunPython(backfill_reminded_at, migrations.RunPython.noop),
+    ]
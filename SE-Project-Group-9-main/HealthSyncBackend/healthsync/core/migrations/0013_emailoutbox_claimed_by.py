@@ -0,0 +1,18 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_booking_reminded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
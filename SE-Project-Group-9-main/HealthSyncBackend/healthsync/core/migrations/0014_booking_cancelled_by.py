@@ -0,0 +1,18 @@
+# Generated by Django 3.1.12 on 2026-10-18 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_emailoutbox_claimed_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='cancelled_by',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from bson import ObjectId
 from djongo import models
+from django.utils import timezone
 from django.core.validators import RegexValidator
 
 cnic_validator = RegexValidator(
@@ -7,6 +8,18 @@ cnic_validator = RegexValidator(
     message='CNIC must be exactly 13 digits (numbers only).'
 )
 
+def object_ids(values):
+    ids = []
+    for value in values or []:
+        if isinstance(value, ObjectId):
+            ids.append(value)
+        elif ObjectId.is_valid(str(value)):
+            ids.append(ObjectId(str(value)))
+    return (ids)
+
+def normalize_email(value):
+    return ((value or '').strip().lower())
+
 class Patient(models.Model):
     _id = models.ObjectIdField(default = ObjectId, primary_key = True)
     patient_id = models.CharField(max_length = 50, unique = True)
@@ -20,6 +33,9 @@ class Patient(models.Model):
     blood_type = models.CharField(max_length = 3, blank = True, null = True)
     emergency_contact = models.CharField(max_length = 20)
     medical_history = models.TextField(default = "", blank = True)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    objects = models.DjongoManager()
 
     def __str__(self):
         return (f"{self.first_name} {self.last_name}")
@@ -35,11 +51,14 @@ class Hospital(models.Model):
     opening_time = models.TimeField()
     closing_time = models.TimeField()
     doctor_ids = models.JSONField(default = list)
+    updated_at = models.DateTimeField(auto_now = True)
 
     @property
     def doctors(self):
         """Get related doctors using stored IDs"""
-        return (Doctor.objects.filter(_id__in = [ObjectId(did) for did in self.doctor_ids]))
+        return (Doctor.objects.filter(_id__in = object_ids(self.doctor_ids)))
+
+    objects = models.DjongoManager()
 
     def __str__(self):
         return (self.name)
@@ -57,6 +76,11 @@ class Doctor(models.Model):
     education = models.JSONField()
     specialization = models.CharField(max_length = 100)
     hospital_name = models.CharField(max_length = 100, null = True)
+    # normalized name words for prefix search, kept in sync by core.signals
+    name_tokens = models.JSONField(default = list)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    objects = models.DjongoManager()
 
     def __str__(self):
         return (f"Dr. {self.first_name} {self.last_name}")
@@ -65,11 +89,15 @@ class TimeSlot(models.Model):
     _id = models.ObjectIdField(default=ObjectId, primary_key=True)
     timeslot_id = models.CharField(max_length=50, unique=True)
     doctor_id = models.CharField(max_length=50)
+    date = models.DateField(null=True, blank=True)
     start_time = models.TimeField(null=True)
     end_time = models.TimeField(null=True)
     fee = models.DecimalField(max_digits=10, decimal_places=2, null=True)
     availability_status = models.CharField(max_length = 20, choices = [('available', 'Available'), ('unavailable', 'Unavailable')], default = 'available')
+    updated_at = models.DateTimeField(auto_now=True)
     
+    objects = models.DjongoManager()
+
     def __str__(self):
         return (f"{self.doctor} - {self.start_time} to {self.end_time}")
 
@@ -80,9 +108,16 @@ class Booking(models.Model):
     doctor_id = models.CharField(max_length=50)
     timeslot_id = models.CharField(max_length=50)
     date = models.DateField(null=True)
-    start_time = models.CharField(max_length=50)
-    end_time = models.CharField(max_length=50)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
     appointment_status = models.CharField(max_length = 20, choices = [('confirmed', 'confirmed'), ('cancelled', 'cancelled'), ('completed', 'completed')])
+    # reminder name -> {'at': claimed at, 'by': scheduler}; written by core.reminders
+    reminded_at = models.JSONField(default = dict)
+    # token of the cancel-day call that cancelled this booking
+    cancelled_by = models.CharField(max_length = 32, default = "", blank = True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = models.DjongoManager()
 
     def __str__(self):
         return (f"Booking {self.booking_id} - {self.appointment_status}")
@@ -93,7 +128,79 @@ class Authentication(models.Model):
     user_type = models.CharField(max_length = 20, choices = [('doctor', 'doctor'), ('patient', 'patient')], default = 'patient')
     phone_number = models.CharField(max_length = 20)
     email = models.EmailField()
+    # normalize_email(email), the indexed login/uniqueness key; kept in sync by core.signals
+    email_key = models.CharField(max_length = 254, default = '')
     password = models.CharField(max_length = 255)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    objects = models.DjongoManager()
+
+    def __str__(self):
+        return (self.email)
+
+class EmailOutbox(models.Model):
+    _id = models.ObjectIdField(default = ObjectId, primary_key = True)
+    subject = models.CharField(max_length = 255)
+    message = models.TextField()
+    from_email = models.CharField(max_length = 255)
+    recipient_list = models.JSONField(default = list)
+    status = models.CharField(max_length = 20, choices = [('pending', 'pending'), ('sending', 'sending'), ('sent', 'sent'), ('failed', 'failed')], default = 'pending')
+    attempts = models.IntegerField(default = 0)
+    next_attempt_at = models.DateTimeField(default = timezone.now)
+    created_at = models.DateTimeField(default = timezone.now)
+    sent_at = models.DateTimeField(null = True, blank = True)
+    last_error = models.TextField(default = "", blank = True)
+    claimed_by = models.CharField(max_length = 32, default = "", blank = True)
+
+    objects = models.DjongoManager()
+
+    def __str__(self):
+        return (f"{self.subject} -> {', '.join(self.recipient_list)} ({self.status})")
+
+class Counter(models.Model):
+    _id = models.ObjectIdField(default = ObjectId, primary_key = True)
+    name = models.CharField(max_length = 50, unique = True)
+    seq = models.IntegerField(default = 0)
+
+    objects = models.DjongoManager()
+
+    def __str__(self):
+        return (f"{self.name}: {self.seq}")
+
+
+class DoctorReservation(models.Model):
+    _id = models.ObjectIdField(default = ObjectId, primary_key = True)
+    key = models.CharField(max_length = 100, unique = True)
+    doctor_id = models.CharField(max_length = 50)
+    date = models.DateField()
+    intervals = models.JSONField(default = list)
+
+    objects = models.DjongoManager()
+
+    def __str__(self):
+        return (f"{self.doctor_id} on {self.date}: {len(self.intervals)} booked")
+
+class DoctorCalendar(models.Model):
+    _id = models.ObjectIdField(default = ObjectId, primary_key = True)
+    key = models.CharField(max_length = 100, unique = True)
+    doctor_id = models.CharField(max_length = 50)
+    date = models.DateField()
+    slots = models.JSONField(default = list)
+    bookings = models.JSONField(default = list)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    objects = models.DjongoManager()
+
+    def __str__(self):
+        return (f"{self.doctor_id} on {self.date}: {len(self.slots)} slots, {len(self.bookings)} bookings")
+
+class BookingRollup(models.Model):
+    _id = models.ObjectIdField(default = ObjectId, primary_key = True)
+    date = models.DateField(unique = True)
+    doctors = models.JSONField(default = list)
+    computed_at = models.DateTimeField(default = timezone.now)
+
+    objects = models.DjongoManager()
 
     def __str__(self):
-        return (self.email)
\ No newline at end of file
+        return (f"Booking rollup for {self.date}")
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+import logging
+import uuid
+from core.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FROM_EMAIL = 'healthsync009@yourdomain.com'
+
+def _setting(name, default):
+    return (getattr(settings, name, default))
+
+def enqueue_email(subject, message, recipient_list, from_email=DEFAULT_FROM_EMAIL):
+    return (EmailOutbox.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient_list=list(recipient_list),
+    ))
+
+def claim_batch(batch_size):
+    now = timezone.now()
+    lease = timedelta(seconds=_setting('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+    max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    # next_attempt_at doubles as the lease expiry, so a dead worker's messages come due again
+    due = {'status': {'$in': ['pending', 'sending']}, 'next_attempt_at': {'$lte': now}}
+    EmailOutbox.objects.mongo_update_many(
+        dict(due, attempts={'$gte': max_attempts}),
+        {'$set': {'status': 'failed', 'last_error': 'Lease expired on the last attempt'}},
+    )
+    due['attempts'] = {'$lt': max_attempts}
+    ids = [doc['_id'] for doc in EmailOutbox.objects.mongo_find(due, {'_id': 1}).sort('next_attempt_at', 1).limit(batch_size)]
+    if not ids:
+        return ([])
+    token = uuid.uuid4().hex
+    EmailOutbox.objects.mongo_update_many(
+        dict(due, _id={'$in': ids}),
+        {'$set': {'status': 'sending', 'next_attempt_at': now + lease, 'claimed_by': token}, '$inc': {'attempts': 1}},
+    )
+    return (list(EmailOutbox.objects.mongo_find({'_id': {'$in': ids}, 'claimed_by': token})))
+
+def _mark_sent(doc):
+    EmailOutbox.objects.mongo_update_one(
+        {'_id': doc['_id']},
+        {'$set': {'status': 'sent', 'sent_at': timezone.now(), 'last_error': ''}},
+    )
+
+def _mark_failed_attempt(doc, error):
+    attempts = doc['attempts']
+    max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    update = {'attempts': attempts, 'last_error': str(error)}
+    if attempts >= max_attempts:
+        update['status'] = 'failed'
+        logger.error(f"Giving up on outbox email {doc['_id']} after {attempts} attempts: {error}")
+    else:
+        base = _setting('EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+        cap = _setting('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+        delay = min(base * (2 ** (attempts - 1)), cap)
+        update['status'] = 'pending'
+        update['next_attempt_at'] = timezone.now() + timedelta(seconds=delay)
+        logger.warning(f"Outbox email {doc['_id']} failed (attempt {attempts}), retrying in {delay}s: {error}")
+    EmailOutbox.objects.mongo_update_one({'_id': doc['_id']}, {'$set': update})
+
+def deliver_batch(docs):
+    if not docs:
+        return (0)
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for doc in docs:
+            _mark_failed_attempt(doc, e)
+        return (0)
+    sent = 0
+    try:
+        for doc in docs:
+            email = EmailMessage(
+                subject=doc['subject'],
+                body=doc['message'],
+                from_email=doc.get('from_email') or DEFAULT_FROM_EMAIL,
+                to=doc['recipient_list'],
+                connection=connection,
+            )
+            try:
+                email.send()
+                _mark_sent(doc)
+                sent += 1
+            except Exception as e:
+                _mark_failed_attempt(doc, e)
+    finally:
+        connection.close()
+    return (sent)
+
+def drain_once(batch_size=None):
+    batch_size = batch_size or _setting('EMAIL_OUTBOX_BATCH_SIZE', 50)
+    docs = claim_batch(batch_size)
+    return (len(docs), deliver_batch(docs))
@@ -0,0 +1,62 @@
+import base64
+import binascii
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from core.fastpath import as_rows, parse_fieldset, row_value, serialize_rows
+
+def encode_cursor(object_id):
+    return (base64.urlsafe_b64encode(ObjectId(object_id).binary).decode().rstrip('='))
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        return (ObjectId(raw))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise ParseError({'error': 'Invalid cursor'})
+
+def wants_pagination(request):
+    return ('limit' in request.query_params or 'cursor' in request.query_params)
+
+def get_limit(request):
+    default = getattr(settings, 'API_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+    raw = request.query_params.get('limit')
+    if not raw:
+        return (default)
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ParseError({'error': 'limit must be a positive integer'})
+    if limit < 1:
+        raise ParseError({'error': 'limit must be a positive integer'})
+    return (min(limit, maximum))
+
+def paginate_queryset(request, queryset):
+    # keyset on _id, so a deep page costs the same index range scan as the first
+    limit = get_limit(request)
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_id__gt=decode_cursor(cursor))
+    rows = list(queryset.order_by('_id')[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return (rows, encode_cursor(row_value(rows[-1], '_id')))
+    return (rows, None)
+
+def get_page(request, queryset):
+    # without ?limit= or ?cursor= the current clients get the whole list, as before
+    if not wants_pagination(request):
+        return (queryset, None)
+    return (paginate_queryset(request, queryset))
+
+def page_data(request, results, next_token):
+    if not wants_pagination(request):
+        return (results)
+    return ({'results': results, 'next': next_token})
+
+def paginated_data(request, queryset, serializer_class):
+    fields = parse_fieldset(request, serializer_class)
+    rows, next_token = get_page(request, as_rows(queryset, serializer_class, fields))
+    return (page_data(request, serialize_rows(rows, serializer_class, fields), next_token))
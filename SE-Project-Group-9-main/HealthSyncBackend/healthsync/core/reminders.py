@@ -0,0 +1,97 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from django.utils import timezone
+from core.models import Authentication, Booking, Doctor, Patient
+from core.repository import to_row
+from core.utils import send_custom_emails
+
+# the 24h reminder is due for start_time in (now+1h, now+24h], the 1h one in (now, now+1h]
+
+REMINDERS = [('24h', timedelta(hours=24)), ('1h', timedelta(hours=1))]
+COLUMNS = ['_id', 'booking_id', 'patient_id', 'doctor_id', 'date', 'start_time']
+
+def scheduler_token():
+    return (f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
+
+def due_window(name, now):
+    leads = [lead for _, lead in REMINDERS] + [timedelta(0)]
+    i = [reminder for reminder, _ in REMINDERS].index(name)
+    return (now + leads[i + 1], now + leads[i])
+
+def _days(after, until):
+    # Booking.date is the local day of start_time; take one day of slack on both sides
+    first = timezone.localtime(after).date() - timedelta(days=1)
+    last = timezone.localtime(until).date() + timedelta(days=1)
+    return ([datetime(day.year, day.month, day.day) for day in (first + timedelta(days=n) for n in range((last - first).days + 1))])
+
+def claim_due(name, now, batch_size, token):
+    after, until = due_window(name, now)
+    # several schedulers may run; each sends only the bookings stamped with its token
+    unclaimed = {f'reminded_at.{name}': {'$exists': False}}
+    candidates = Booking.objects.mongo_find(dict({
+        'appointment_status': 'confirmed',
+        'date': {'$in': _days(after, until)},
+        'start_time': {'$gt': after, '$lte': until},
+    }, **unclaimed), {'_id': 1}).limit(batch_size)
+    ids = [doc['_id'] for doc in candidates]
+    if not ids:
+        return ([])
+    Booking.objects.mongo_update_many(
+        dict({'_id': {'$in': ids}, 'appointment_status': 'confirmed'}, **unclaimed),
+        {'$set': {f'reminded_at.{name}': {'at': now, 'by': token}}},
+    )
+    claimed = Booking.objects.mongo_find({'_id': {'$in': ids}, f'reminded_at.{name}.by': token}, {c: 1 for c in COLUMNS})
+    return ([to_row(Booking, doc, COLUMNS) for doc in claimed])
+
+def _reminder_email(first_name, doctor, booking):
+    start = timezone.localtime(booking['start_time'])
+    return (f"""
+                Dear {first_name},
+
+                This is a reminder that you have an appointment with Dr. {doctor.get('first_name')} {doctor.get('last_name')} on {start:%A, %d %B %Y} at {start:%H:%M}.
+
+                If you can no longer attend, please cancel it so the slot can go to another patient.
+
+                Best regards,
+                HealthSync Team
+                """)
+
+def send_reminders(bookings):
+    if not bookings:
+        return (0)
+    patient_ids = list({booking['patient_id'] for booking in bookings})
+    doctor_ids = list({booking['doctor_id'] for booking in bookings})
+    emails = {
+        doc['user_id']: doc['email']
+        for doc in Authentication.objects.mongo_find({'user_id': {'$in': patient_ids}, 'user_type': 'patient'}, {'user_id': 1, 'email': 1})
+    }
+    names = {
+        doc['patient_id']: doc.get('first_name')
+        for doc in Patient.objects.mongo_find({'patient_id': {'$in': patient_ids}}, {'patient_id': 1, 'first_name': 1})
+    }
+    doctors = {
+        doc['doctor_id']: doc
+        for doc in Doctor.objects.mongo_find({'doctor_id': {'$in': doctor_ids}}, {'doctor_id': 1, 'first_name': 1, 'last_name': 1})
+    }
+    subject = 'Appointment reminder'
+    messages = [
+        (subject, _reminder_email(names.get(booking['patient_id']), doctors.get(booking['doctor_id'], {}), booking), [emails[booking['patient_id']]])
+        for booking in bookings if booking['patient_id'] in emails
+    ]
+    send_custom_emails(messages)
+    return (len(messages))
+
+def run_once(batch_size, token, now=None):
+    now = now or timezone.now()
+    queued = {}
+    for name, _ in REMINDERS:
+        queued[name] = 0
+        # a short batch can mean another scheduler took part of it, so stop only on an empty claim
+        while True:
+            bookings = claim_due(name, now, batch_size, token)
+            if not bookings:
+                break
+            queued[name] += send_reminders(bookings)
+    return (queued)
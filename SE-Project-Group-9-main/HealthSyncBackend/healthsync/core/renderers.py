@@ -0,0 +1,48 @@
+import csv
+import io
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONRenderer(JSONRenderer):
+    # orjson gives the same compact, unicode bytes; indented output stays with JSONRenderer
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return (super().render(data, accepted_media_type, renderer_context))
+        try:
+            ret = orjson.dumps(data, default=self._default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return (super().render(data, accepted_media_type, renderer_context))
+        # same escaping of the JavaScript line separators as JSONRenderer
+        return (ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029'))
+
+class NDJSONRenderer(FastJSONRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return (b'')
+        return (super().render(data, accepted_media_type, renderer_context) + b'\n')
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return (b'')
+        rows = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return (buffer.getvalue().encode(self.charset))
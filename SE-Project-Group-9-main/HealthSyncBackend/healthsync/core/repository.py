@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db import connection
+from pymongo import ASCENDING
+from core.fastpath import parse_fieldset, row_columns, serialize_rows
+from core.pagination import decode_cursor, encode_cursor, get_limit, page_data, wants_pagination
+from core.utils import model_to_document
+
+# rows are the dicts queryset.values() would return, converted by the ORM's own converters
+
+def native_enabled():
+    return (getattr(settings, 'NATIVE_MONGO_REPOSITORY', False))
+
+_readers = {}
+
+def _reader(model, columns):
+    key = (model, tuple(columns))
+    if key not in _readers:
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        plan = []
+        for attname in columns:
+            field = fields[attname]
+            col = field.get_col(model._meta.db_table)
+            converters = connection.ops.get_db_converters(col) + col.get_db_converters(connection)
+            plan.append((attname, field.column, converters, col))
+        _readers[key] = plan
+    return (_readers[key])
+
+def to_row(model, document, columns):
+    row = {}
+    for attname, column, converters, col in _reader(model, columns):
+        value = document.get(column)
+        for converter in converters:
+            value = converter(value, col, connection)
+        row[attname] = value
+    return (row)
+
+def to_match(model, filters):
+    match = {}
+    for attname, value in filters.items():
+        field = model._meta.get_field(attname)
+        match[field.column] = field.get_db_prep_value(value, connection, prepared=False)
+    return (match)
+
+def find_rows(model, filters, columns, after=None, limit=None):
+    match = to_match(model, filters)
+    if after is not None:
+        match['_id'] = {'$gt': after}
+    cursor = model.objects.mongo_find(match, {model._meta.get_field(c).column: 1 for c in columns})
+    if limit is not None:
+        cursor = cursor.sort('_id', ASCENDING).limit(limit)
+    return ([to_row(model, document, columns) for document in cursor])
+
+def find_row(model, filters, columns):
+    document = model.objects.mongo_find_one(to_match(model, filters), {model._meta.get_field(c).column: 1 for c in columns})
+    return (None if document is None else to_row(model, document, columns))
+
+def get_page(request, model, filters, columns):
+    if not wants_pagination(request):
+        return (find_rows(model, filters, columns), None)
+    limit = get_limit(request)
+    cursor = request.query_params.get('cursor')
+    rows = find_rows(model, filters, columns, after=decode_cursor(cursor) if cursor else None, limit=limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return (rows, encode_cursor(rows[-1]['_id']))
+    return (rows, None)
+
+def paginated_data(request, model, filters, serializer_class):
+    fields = parse_fieldset(request, serializer_class)
+    rows, next_token = get_page(request, model, filters, row_columns(serializer_class, fields))
+    return (page_data(request, serialize_rows(rows, serializer_class, fields), next_token))
+
+def create(serializer):
+    if not native_enabled():
+        return (serializer.save())
+    instance = serializer.Meta.model(**serializer.validated_data)
+    # a direct insert, so model signals do not fire
+    instance._meta.model.objects.mongo_insert_one(model_to_document(instance))
+    serializer.instance = instance
+    return (instance)
@@ -0,0 +1,41 @@
+from datetime import datetime
+from django.utils import timezone
+from pymongo.errors import DuplicateKeyError
+from core.models import DoctorReservation
+
+def _key(doctor_id, day):
+    return (f"{doctor_id}:{day.isoformat()}")
+
+def _naive(value):
+    if timezone.is_aware(value):
+        return (timezone.make_naive(value, timezone.utc))
+    return (value)
+
+def claim_slot(doctor_id, day, start, end, booking_id):
+    start, end = _naive(start), _naive(end)
+    # an overlapping claim does not match, and its upsert then collides with the unique key
+    overlap = {'$elemMatch': {'start': {'$lt': end}, 'end': {'$gt': start}, 'booking_id': {'$ne': booking_id}}}
+    match = {'key': _key(doctor_id, day), 'intervals': {'$not': overlap}}
+    push = {'$push': {'intervals': {'booking_id': booking_id, 'start': start, 'end': end}}}
+    try:
+        DoctorReservation.objects.mongo_update_one(
+            match,
+            dict(push, **{'$setOnInsert': {'doctor_id': doctor_id, 'date': datetime(day.year, day.month, day.day)}}),
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # the day's document exists now, possibly created by a concurrent first claim
+        return (DoctorReservation.objects.mongo_update_one(match, push).matched_count == 1)
+    return (True)
+
+def release_slot(doctor_id, day, start, end, booking_id):
+    DoctorReservation.objects.mongo_update_one(
+        {'key': _key(doctor_id, day)},
+        {'$pull': {'intervals': {'booking_id': booking_id, 'start': _naive(start), 'end': _naive(end)}}},
+    )
+
+def release_bookings(doctor_id, date_from, date_to, booking_ids):
+    DoctorReservation.objects.mongo_update_many(
+        {'doctor_id': doctor_id, 'date': {'$gte': datetime(date_from.year, date_from.month, date_from.day), '$lte': datetime(date_to.year, date_to.month, date_to.day)}},
+        {'$pull': {'intervals': {'booking_id': {'$in': list(booking_ids)}}}},
+    )
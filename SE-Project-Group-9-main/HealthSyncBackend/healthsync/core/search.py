@@ -0,0 +1,38 @@
+import re
+import unicodedata
+from core.models import Doctor
+
+# anchored, case-sensitive regexes on the multikey name_tokens index are index range scans
+
+_WORD = re.compile(r'\w+')
+
+def normalize(value):
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return (_WORD.findall(stripped.casefold()))
+
+def name_tokens(first_name, last_name):
+    return (list(dict.fromkeys(normalize(first_name) + normalize(last_name))))
+
+def search_doctors(q='', specialization=None, hospital=None, limit=10, projection=None):
+    words = normalize(q)
+    match = {}
+    if words:
+        match['$and'] = [{'name_tokens': {'$regex': '^' + re.escape(word)}} for word in words]
+    if specialization:
+        match['specialization'] = specialization
+    if hospital:
+        match['hospital_name'] = hospital
+    first_token = {'$arrayElemAt': ['$name_tokens', 0]}
+    # ranked inside the query, so $sort + $limit keeps only the top `limit` in memory
+    pipeline = [
+        {'$match': match},
+        {'$addFields': {
+            '_whole': {'$size': {'$setIntersection': [{'$ifNull': ['$name_tokens', []]}, words]}},
+            '_first': {'$anyElementTrue': [[{'$eq': [{'$indexOfCP': [{'$ifNull': [first_token, '']}, word]}, 0]} for word in words]]},
+        }},
+        {'$sort': {'_whole': -1, '_first': -1, 'last_name': 1, 'first_name': 1, '_id': 1}},
+        {'$limit': limit},
+        {'$project': dict(projection or {}, first_name=1, last_name=1)},
+    ]
+    return (list(Doctor.objects.mongo_aggregate(pipeline)))
@@ -4,7 +4,7 @@ from core.models import Authentication
 class AuthenticationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Authentication
-        fields = '__all__'
+        exclude = ['email_key']
         extra_kwargs = {
             'password': {'write_only': True}
         }
\ No newline at end of file
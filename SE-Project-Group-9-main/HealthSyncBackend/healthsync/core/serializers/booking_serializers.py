@@ -5,4 +5,4 @@ class BookingSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Booking
-        fields = '__all__'
+        exclude = ['reminded_at', 'cancelled_by']
@@ -4,7 +4,7 @@ from core.models import Doctor
 class DoctorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Doctor
-        fields = '__all__'
+        exclude = ['name_tokens']
 
 class DoctorSummarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,7 @@
+from rest_framework import serializers
+from core.models import Hospital
+
+class HospitalSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Hospital
+        fields = '__all__'
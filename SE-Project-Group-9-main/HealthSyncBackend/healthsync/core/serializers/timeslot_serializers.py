@@ -5,3 +5,8 @@ class TimeSlotSerializer(serializers.ModelSerializer):
     class Meta:
         model = TimeSlot
         fields = '__all__'
+
+class TimeSlotScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TimeSlot
+        fields = ['doctor_id', 'date', 'start_time', 'end_time', 'fee', 'availability_status']
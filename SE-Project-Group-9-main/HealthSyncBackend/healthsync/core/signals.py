@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from core.cache import invalidate_doctor
+from core.models import Authentication, Doctor, normalize_email
+from core.search import name_tokens
+
+@receiver([post_save, post_delete], sender=Doctor)
+def invalidate_doctor_cache(sender, instance, **kwargs):
+    invalidate_doctor(instance.doctor_id)
+
+@receiver(pre_save, sender=Doctor)
+def index_doctor_name(sender, instance, **kwargs):
+    instance.name_tokens = name_tokens(instance.first_name, instance.last_name)
+
+@receiver(pre_save, sender=Authentication)
+def index_email(sender, instance, **kwargs):
+    instance.email_key = normalize_email(instance.email)
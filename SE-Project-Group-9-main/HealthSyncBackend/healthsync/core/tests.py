@@ -1,2 +1,1207 @@
-from django.test import TestCase
+import csv
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
+from django.contrib.auth.hashers import check_password
+from django.core import mail
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from pymongo.errors import DuplicateKeyError
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from core import async_repository, hashers, metrics, repository, utils
+from core.benchmark import monitor
+from core.conditional import conditional_response
+from core.cache import LRUCache, doctor_cache
+from core.indexes import MANAGED_INDEXES, ensure_indexes
+from core.export import _csv_value, stream_csv, stream_ndjson
+from core.fastpath import as_rows, parse_fieldset, parse_ids, row_columns, row_serializer
+from core.models import Authentication, Booking, BookingRollup, Doctor, DoctorCalendar, Hospital, Patient, DoctorReservation, EmailOutbox, TimeSlot, normalize_email
+from core.outbox import claim_batch, deliver_batch, drain_once, enqueue_email
+from core.pagination import get_page, page_data
+from core.search import search_doctors
+from core.reminders import _reminder_email, claim_due, run_once
+from core.reservations import claim_slot, release_slot
+from core.serializers.authentication_serializers import AuthenticationSerializer
+from core.serializers.booking_serializers import BookingSerializer
+from core.serializers.timeslot_serializers import TimeSlotSerializer
+from core.utils import model_to_document, next_sequential_id, next_sequential_ids
 
+START = timezone.make_aware(datetime(2030, 3, 4, 9, 0))
+
+def _booking(n, **overrides):
+    values = {
+        'booking_id': f"B{n}",
+        'patient_id': f"P{n % 3}",
+        'doctor_id': f"D{n % 2}",
+        'timeslot_id': f"T{n % 4}",
+        'date': (START + timedelta(days=n % 3)).date(),
+        'start_time': START + timedelta(days=n % 3, minutes=30 * n),
+        'end_time': START + timedelta(days=n % 3, minutes=30 * n + 30),
+        'appointment_status': 'confirmed' if n % 5 else 'cancelled',
+    }
+    values.update(overrides)
+    return (Booking(**values))
+
+def _timeslot(n, **overrides):
+    values = {
+        'timeslot_id': f"T{n}",
+        'doctor_id': f"D{n % 2}",
+        'date': None if n % 3 == 0 else date(2030, 3, 4) + timedelta(days=n),
+        'start_time': time(9 + n % 8, 0),
+        'end_time': time(10 + n % 8, 30),
+        'fee': Decimal('1500.50') if n % 4 else None,
+        'availability_status': 'available' if n % 2 else 'unavailable',
+    }
+    values.update(overrides)
+    return (TimeSlot(**values))
+
+def _doctor(n, first_name, last_name, **overrides):
+    values = {
+        'doctor_id': f"D{n}",
+        'first_name': first_name,
+        'last_name': last_name,
+        'gender': 'Female',
+        'date_of_birth': date(1980, 1, 1),
+        'age': 50,
+        'cnic': f"{n:013d}",
+        'education': [],
+        'specialization': 'Cardiology',
+        'hospital_name': 'City',
+    }
+    values.update(overrides)
+    return (Doctor.objects.create(**values))
+
+def _request(query=''):
+    return (Request(APIRequestFactory().get('/' + query)))
+
+class DocumentRowTests(SimpleTestCase):
+    def assertSameOutput(self, model, serializer_class, instance):
+        columns = row_columns(serializer_class)
+        row = repository.to_row(model, model_to_document(instance), columns)
+        self.assertEqual(row_serializer(serializer_class)(row), dict(serializer_class(instance).data))
+
+    def test_booking(self):
+        for n in range(6):
+            self.assertSameOutput(Booking, BookingSerializer, _booking(n))
+
+    def test_timeslot_with_and_without_date_and_fee(self):
+        for n in range(6):
+            self.assertSameOutput(TimeSlot, TimeSlotSerializer, _timeslot(n))
+
+    def test_missing_fields_read_as_none(self):
+        row = repository.to_row(TimeSlot, {'timeslot_id': 'T1'}, ['timeslot_id', 'date', 'fee', 'updated_at'])
+        self.assertEqual(row, {'timeslot_id': 'T1', 'date': None, 'fee': None, 'updated_at': None})
+
+    def test_filters_match_stored_values(self):
+        match = repository.to_match(Booking, {'doctor_id': 'D1', 'date': date(2030, 3, 4)})
+        self.assertEqual(match, {'doctor_id': 'D1', 'date': model_to_document(_booking(0, date=date(2030, 3, 4)))['date']})
+
+class PageDataTests(SimpleTestCase):
+    def test_requests_without_limit_or_cursor_get_every_row(self):
+        rows, next_token = get_page(_request('?doctor_id=D1'), list(range(120)))
+        self.assertEqual((len(rows), next_token), (120, None))
+        self.assertEqual(page_data(_request(), rows, next_token), rows)
+
+    def test_explicit_pages_keep_the_envelope(self):
+        request = _request('?limit=2')
+        self.assertEqual(page_data(request, [1, 2], 'abc'), {'results': [1, 2], 'next': 'abc'})
+
+class FieldsetTests(SimpleTestCase):
+    def fieldset(self, query, serializer_class=BookingSerializer):
+        return (parse_fieldset(_request(query), serializer_class))
+
+    def test_fields_keep_serializer_order(self):
+        self.assertIsNone(self.fieldset('?doctor_id=D1'))
+        self.assertEqual(self.fieldset('?fields=date, booking_id'), ['booking_id', 'date'])
+        self.assertNotIn('date', self.fieldset('?exclude=date'))
+
+    def test_unknown_and_write_only_fields_are_rejected(self):
+        for query in ('?fields=nope', '?exclude=booking_id,nope', '?fields=cancelled_by'):
+            with self.assertRaises(ParseError):
+                self.fieldset(query)
+        with self.assertRaises(ParseError):
+            self.fieldset('?fields=email,password', AuthenticationSerializer)
+        self.assertEqual(self.fieldset('?fields=email', AuthenticationSerializer), ['email'])
+
+    def test_projection_is_pushed_down(self):
+        self.assertEqual(row_columns(BookingSerializer, ['booking_id', 'date']), ['_id', 'booking_id', 'date'])
+        self.assertEqual(row_columns(BookingSerializer, ['booking_id'], ['doctor_id']), ['_id', 'booking_id', 'doctor_id'])
+        queryset = as_rows(Booking.objects.all(), BookingSerializer, ['booking_id'])
+        self.assertEqual(list(queryset.query.values_select), ['_id', 'booking_id'])
+        with self.settings(FAST_LIST_SERIALIZATION=False):
+            queryset = as_rows(Booking.objects.all(), BookingSerializer, ['booking_id'])
+        self.assertEqual(queryset.query.deferred_loading, ({'_id', 'booking_id'}, False))
+
+class ConditionalResponseTests(SimpleTestCase):
+    def respond(self, etag, if_none_match=None, status_code=200):
+        headers = {'HTTP_IF_NONE_MATCH': if_none_match} if if_none_match else {}
+        request = Request(APIRequestFactory().get('/', **headers))
+        render = mock.Mock(return_value=Response({'ok': True}, status=status_code))
+        return (conditional_response(request, etag, render), render)
+
+    def test_matching_tag_skips_rendering(self):
+        for header in ('"abc"', '"x", "abc"', '*'):
+            response, render = self.respond('"abc"', header)
+            self.assertEqual((response.status_code, response['ETag']), (304, '"abc"'))
+            render.assert_not_called()
+
+    def test_other_responses_render(self):
+        response, render = self.respond('"abc"', '"old"')
+        self.assertEqual((response.status_code, response['ETag']), (200, '"abc"'))
+        render.assert_called_once()
+        self.assertFalse(self.respond('"abc"', status_code=404)[0].has_header('ETag'))
+        self.assertFalse(self.respond(None, '*')[0].has_header('ETag'))
+
+class _Rows(list):
+    def iterator(self, chunk_size):
+        return (iter(self))
+
+class ExportStreamTests(SimpleTestCase):
+    def setUp(self):
+        self.bookings = [_booking(n) for n in range(4)]
+        self.rows = _Rows(repository.to_row(Booking, model_to_document(b), row_columns(BookingSerializer)) for b in self.bookings)
+
+    def test_ndjson_is_one_serialized_booking_per_line(self):
+        lines = b''.join(stream_ndjson(self.rows, BookingSerializer)).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [json.loads(json.dumps(BookingSerializer(b).data)) for b in self.bookings])
+
+    def test_csv_has_a_header_and_the_selected_fields(self):
+        text = ''.join(stream_csv(self.rows, BookingSerializer, ['booking_id', 'appointment_status']))
+        self.assertEqual(list(csv.reader(text.splitlines())), [
+            ['booking_id', 'appointment_status'],
+            ['B0', 'cancelled'], ['B1', 'confirmed'], ['B2', 'confirmed'], ['B3', 'confirmed'],
+        ])
+
+    def test_nested_csv_values_are_json(self):
+        self.assertEqual(_csv_value([{'degree': 'MBBS'}]), '[{"degree": "MBBS"}]')
+        self.assertEqual(_csv_value('x'), 'x')
+
+class MetricsTests(SimpleTestCase):
+    def test_server_timing_lists_each_phase(self):
+        self.assertEqual(
+            metrics.server_timing(0.0125, {'mongo': 0.004, 'hash': 0.0021}, {'mongo': 3, 'hash': 1}),
+            'hash;dur=2.10;desc="1 call", mongo;dur=4.00;desc="3 calls", total;dur=12.50',
+        )
+
+    def test_histogram_exposition(self):
+        histogram = metrics.Histogram('t_seconds', 'Test.', ('route',), (0.1, 1.0))
+        histogram.observe(0.05, '/a')
+        histogram.observe(0.5, '/a')
+        self.assertEqual(histogram.expose(), [
+            '# HELP t_seconds Test.', '# TYPE t_seconds histogram',
+            't_seconds_bucket{route="/a",le="0.1"} 1', 't_seconds_bucket{route="/a",le="1.0"} 2',
+            't_seconds_bucket{route="/a",le="+Inf"} 2', 't_seconds_sum{route="/a"} 0.55', 't_seconds_count{route="/a"} 2',
+        ])
+
+    def test_responses_carry_server_timing(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^total;dur=\d+\.\d\d$')
+        self.assertIn('healthsync_request_duration_seconds_count{method="GET",route="/metrics",status="200"}', self.client.get('/metrics').content.decode())
+        with self.settings(METRICS_ENABLED=False):
+            self.assertFalse(self.client.get('/metrics').has_header('Server-Timing'))
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+class AsyncViewMethodTests(SimpleTestCase):
+    def test_async_endpoints_are_read_only(self):
+        for method in (self.client.post, self.client.put, self.client.delete):
+            response = method('/api/async/bookings/B1/')
+            self.assertEqual((response.status_code, response['Allow']), (405, 'GET, HEAD'))
+
+class ParseIdsTests(SimpleTestCase):
+    def test_ids_are_split_and_deduplicated_in_order(self):
+        self.assertIsNone(parse_ids(_request('?doctor_id=D1')))
+        self.assertEqual(parse_ids(_request('?ids=D2, D1,D2,,D3')), ['D2', 'D1', 'D3'])
+
+    @override_settings(API_MAX_IDS=2)
+    def test_empty_and_oversized_lists_are_rejected(self):
+        for query in ('?ids=', '?ids=,', '?ids=D1,D2,D3'):
+            with self.assertRaises(ParseError):
+                parse_ids(_request(query))
+        self.assertEqual(parse_ids(_request('?ids=D1,D2,D1')), ['D1', 'D2'])
+
+class RepositoryParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(12):
+            _booking(n).save()
+        for n in range(8):
+            _timeslot(n).save()
+
+    def orm_rows(self, model, filters, columns):
+        return (list(model.objects.filter(**filters).values(*columns).order_by('_id')))
+
+    def native_rows(self, model, filters, columns):
+        return (sorted(repository.find_rows(model, filters, columns), key=lambda row: row['_id']))
+
+    def test_booking_lists(self):
+        columns = row_columns(BookingSerializer)
+        for filters in (
+            {},
+            {'doctor_id': 'D1'},
+            {'patient_id': 'P2'},
+            {'date': START.date()},
+            {'doctor_id': 'D0', 'date': (START + timedelta(days=1)).date()},
+            {'doctor_id': 'D9'},
+        ):
+            with self.subTest(filters=filters):
+                self.assertEqual(self.native_rows(Booking, filters, columns), self.orm_rows(Booking, filters, columns))
+
+    def test_timeslot_lists(self):
+        columns = row_columns(TimeSlotSerializer)
+        for filters in ({}, {'doctor_id': 'D0'}, {'doctor_id': 'D1'}):
+            with self.subTest(filters=filters):
+                self.assertEqual(self.native_rows(TimeSlot, filters, columns), self.orm_rows(TimeSlot, filters, columns))
+
+    def test_projected_columns(self):
+        fields = ['booking_id', 'start_time']
+        columns = row_columns(BookingSerializer, fields, ['patient_id'])
+        self.assertEqual(self.native_rows(Booking, {}, columns), self.orm_rows(Booking, {}, columns))
+
+    def test_find_row(self):
+        row = repository.find_row(TimeSlot, {'timeslot_id': 'T3'}, ['availability_status'])
+        self.assertEqual(row, TimeSlot.objects.filter(timeslot_id='T3').values('availability_status').first())
+        self.assertIsNone(repository.find_row(TimeSlot, {'timeslot_id': 'T404'}, ['availability_status']))
+
+    def test_keyset_pages(self):
+        columns = row_columns(BookingSerializer)
+        filters = {'doctor_id': 'D0'}
+        cursor = ''
+        while True:
+            request = _request(f"?limit=2{'&cursor=' + cursor if cursor else ''}")
+            native, native_next = repository.get_page(request, Booking, filters, columns)
+            orm, orm_next = get_page(request, Booking.objects.filter(**filters).values(*columns))
+            self.assertEqual(native, orm)
+            self.assertEqual(native_next, orm_next)
+            if not native_next:
+                break
+            cursor = native_next
+
+    def test_paginated_data(self):
+        request = _request('?doctor_id=D1&fields=timeslot_id,fee,date')
+        native = repository.paginated_data(request, TimeSlot, {'doctor_id': 'D1'}, TimeSlotSerializer)
+        orm = TimeSlotSerializer(TimeSlot.objects.filter(doctor_id='D1').order_by('_id'), many=True).data
+        self.assertEqual(
+            sorted(native, key=lambda item: item['timeslot_id']),
+            sorted(({'timeslot_id': i['timeslot_id'], 'fee': i['fee'], 'date': i['date']} for i in orm), key=lambda item: item['timeslot_id']),
+        )
+
+    @override_settings(API_PAGE_SIZE=5)
+    def test_legacy_lists_are_not_capped(self):
+        client = APIClient()
+        for native in (False, True):
+            with self.subTest(native=native), override_settings(NATIVE_MONGO_REPOSITORY=native):
+                self.assertEqual(len(client.get('/api/bookings/').json()), 12)
+                self.assertEqual(len(client.get('/api/timeslots/').json()), 8)
+                page = client.get('/api/bookings/?limit=5').json()
+                self.assertEqual(len(page['results']), 5)
+                self.assertIsNotNone(page['next'])
+
+    def test_create(self):
+        data = {
+            'booking_id': 'B100', 'patient_id': 'P1', 'doctor_id': 'D1', 'timeslot_id': 'T1', 'date': '2030-04-01',
+            'start_time': '2030-04-01T10:00:00', 'end_time': '2030-04-01T10:30:00', 'appointment_status': 'confirmed',
+        }
+        serializer = BookingSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with override_settings(NATIVE_MONGO_REPOSITORY=True):
+            repository.create(serializer)
+        native = dict(serializer.data)
+        stored = dict(BookingSerializer(Booking.objects.get(booking_id='B100')).data)
+        native.pop('updated_at')
+        updated_at = stored.pop('updated_at')
+        self.assertEqual(native, stored)
+        self.assertIsNotNone(updated_at)
+
+def _at(day, hour, minute=0):
+    return (timezone.make_aware(datetime.combine(day, time(hour, minute))))
+
+class SlotClaimTests(TransactionTestCase):
+    day = date(2030, 3, 4)
+
+    def claim(self, booking_id, hour, minute=0, day=None):
+        day = day or self.day
+        return (claim_slot('D1', day, _at(day, hour, minute), _at(day, hour, minute + 30), booking_id))
+
+    def test_disjoint_and_overlapping_claims_on_a_fresh_day(self):
+        self.assertTrue(self.claim('B1', 9))
+        self.assertTrue(self.claim('B2', 10))
+        self.assertFalse(self.claim('B3', 9, 15))
+        self.assertEqual(len(DoctorReservation.objects.get(key=f"D1:{self.day.isoformat()}").intervals), 2)
+
+    def test_losing_the_first_upsert_retries_without_upsert(self):
+        self.assertTrue(self.claim('B1', 9))
+        update_one = DoctorReservation.objects.mongo_update_one
+
+        def collide(match, update, **kwargs):
+            # as if a concurrent first claim had created the document between find and insert
+            if kwargs.get('upsert'):
+                raise DuplicateKeyError('E11000 duplicate key')
+            return (update_one(match, update, **kwargs))
+
+        with mock.patch.object(DoctorReservation.objects, 'mongo_update_one', side_effect=collide):
+            self.assertTrue(self.claim('B2', 10))
+            self.assertFalse(self.claim('B3', 10, 15))
+
+    def test_concurrent_first_claims_of_a_day(self):
+        days = [self.day + timedelta(days=n) for n in range(10)]
+        claims = [(f"B{n}{hour}", hour, day) for n, day in enumerate(days) for hour in (9, 10)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda claim: self.claim(claim[0], claim[1], day=claim[2]), claims))
+        self.assertEqual(results, [True] * len(claims))
+
+    def test_released_slot_can_be_claimed_again(self):
+        self.assertTrue(self.claim('B1', 9))
+        release_slot('D1', self.day, _at(self.day, 9), _at(self.day, 9, 30), 'B1')
+        self.assertTrue(self.claim('B2', 9))
+
+class BookingUpdateTests(TestCase):
+    day = date(2030, 3, 4)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def book(self, booking_id, hour, status='confirmed'):
+        booking = _booking(0, booking_id=booking_id, doctor_id='D1', date=self.day,
+                           start_time=_at(self.day, hour), end_time=_at(self.day, hour, 30), appointment_status=status)
+        booking.save()
+        if status == 'confirmed':
+            self.assertTrue(claim_slot('D1', self.day, booking.start_time, booking.end_time, booking_id))
+        return (booking)
+
+    def intervals(self):
+        reservation = DoctorReservation.objects.filter(key=f"D1:{self.day.isoformat()}").first()
+        return (sorted((i['booking_id'], i['start'].hour, i['start'].minute) for i in reservation.intervals) if reservation else [])
+
+    def put(self, booking_id, data):
+        return (self.client.put(f"/api/bookings/{booking_id}/", data, format='json'))
+
+    def test_reschedule_moves_the_interval_and_recomputes_end_time(self):
+        self.book('B1', 9)
+        response = self.put('B1', {'start_time': _at(self.day, 11).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        booking = Booking.objects.get(booking_id='B1')
+        self.assertEqual(booking.end_time - booking.start_time, timedelta(minutes=30))
+        self.assertEqual(self.intervals(), [('B1', 11, 0)])
+        self.assertTrue(claim_slot('D1', self.day, _at(self.day, 9), _at(self.day, 9, 30), 'B2'))
+
+    def test_reschedule_onto_a_booked_slot_conflicts(self):
+        self.book('B1', 9)
+        self.book('B2', 10)
+        response = self.put('B1', {'start_time': _at(self.day, 10, 15).isoformat()})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.get(booking_id='B1').start_time, _at(self.day, 9))
+
+    def test_reconfirming_a_cancelled_booking_claims_its_slot(self):
+        self.book('B1', 9, status='cancelled')
+        response = self.put('B1', {'appointment_status': 'confirmed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.intervals(), [('B1', 9, 0)])
+
+    def test_reconfirming_onto_a_taken_slot_conflicts(self):
+        self.book('B1', 9, status='cancelled')
+        self.book('B2', 9)
+        response = self.put('B1', {'appointment_status': 'confirmed'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.get(booking_id='B1').appointment_status, 'cancelled')
+
+    def test_failed_save_releases_the_new_claim(self):
+        self.book('B1', 9)
+        with mock.patch.object(BookingSerializer, 'save', side_effect=RuntimeError('write failed')):
+            with self.assertRaises(RuntimeError):
+                self.put('B1', {'start_time': _at(self.day, 11).isoformat()})
+        self.assertEqual(self.intervals(), [('B1', 9, 0)])
+
+class SequentialIdTests(TransactionTestCase):
+    def setUp(self):
+        # each test starts from an unseeded counter
+        patcher = mock.patch.object(utils, '_seeded_counters', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def next_id(self):
+        return (next_sequential_id(Booking, 'booking_id', 'B'))
+
+    def test_first_id_of_an_empty_collection(self):
+        self.assertEqual(self.next_id(), 'B0')
+        self.assertEqual(self.next_id(), 'B1')
+
+    def test_counter_is_seeded_past_existing_ids(self):
+        for booking_id in ('B3', 'B12', 'Bx7', 'X40'):
+            _booking(0, booking_id=booking_id).save()
+        self.assertEqual(self.next_id(), 'B13')
+
+    def test_batch_reserves_consecutive_ids(self):
+        self.assertEqual(next_sequential_ids(Booking, 'booking_id', 'B', 3), ['B0', 'B1', 'B2'])
+        self.assertEqual(self.next_id(), 'B3')
+
+    def test_concurrent_allocations_are_unique(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda _: self.next_id(), range(50)))
+        self.assertEqual(sorted(ids), sorted(f"B{n}" for n in range(50)))
+
+def _later(seconds):
+    return (mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=seconds)))
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_BACKOFF_SECONDS=30, EMAIL_OUTBOX_LEASE_SECONDS=300)
+class OutboxTests(TransactionTestCase):
+    def enqueue(self, n):
+        return ([enqueue_email(f"Subject {i}", 'Body', [f"user{i}@example.com"]) for i in range(n)])
+
+    def test_claim_takes_each_due_message_once(self):
+        self.enqueue(3)
+        EmailOutbox.objects.mongo_update_one({'subject': 'Subject 2'}, {'$set': {'next_attempt_at': timezone.now() + timedelta(hours=1)}})
+        claimed = claim_batch(10)
+        self.assertEqual(sorted(doc['subject'] for doc in claimed), ['Subject 0', 'Subject 1'])
+        self.assertEqual({doc['attempts'] for doc in claimed}, {1})
+        self.assertEqual(claim_batch(10), [])
+
+    def test_concurrent_claims_do_not_overlap(self):
+        self.enqueue(40)
+
+        def drain(_):
+            claimed = []
+            while True:
+                batch = claim_batch(5)
+                if not batch:
+                    return (claimed)
+                claimed += batch
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            ids = [doc['_id'] for claimed in pool.map(drain, range(4)) for doc in claimed]
+        self.assertEqual(len(ids), 40)
+        self.assertEqual(len(set(ids)), 40)
+
+    def test_expired_lease_is_claimed_again_as_a_new_attempt(self):
+        self.enqueue(1)
+        self.assertEqual(len(claim_batch(10)), 1)
+        with _later(299):
+            self.assertEqual(claim_batch(10), [])
+        with _later(301):
+            self.assertEqual([doc['attempts'] for doc in claim_batch(10)], [2])
+
+    def test_lease_expiring_on_the_last_attempt_fails_the_message(self):
+        self.enqueue(1)
+        for n in range(3):
+            with _later(301 * n):
+                self.assertEqual(len(claim_batch(10)), 1)
+        with _later(301 * 3):
+            self.assertEqual(claim_batch(10), [])
+        self.assertEqual(EmailOutbox.objects.get().status, 'failed')
+
+    def test_failed_sends_back_off_exponentially(self):
+        self.enqueue(1)
+        with mock.patch('core.outbox.EmailMessage.send', side_effect=OSError('connection reset')):
+            self.assertEqual(drain_once(10), (1, 0))
+            message = EmailOutbox.objects.get()
+            self.assertEqual((message.status, message.attempts, message.last_error), ('pending', 1, 'connection reset'))
+            self.assertAlmostEqual((message.next_attempt_at - timezone.now()).total_seconds(), 30, delta=5)
+            self.assertEqual(claim_batch(10), [])
+            with _later(31):
+                deliver_batch(claim_batch(10))
+            message = EmailOutbox.objects.get()
+            self.assertEqual(message.attempts, 2)
+            self.assertAlmostEqual((message.next_attempt_at - timezone.now()).total_seconds(), 31 + 60, delta=5)
+            with _later(92):
+                deliver_batch(claim_batch(10))
+        message = EmailOutbox.objects.get()
+        self.assertEqual((message.status, message.attempts), ('failed', 3))
+
+    def test_retry_is_delivered(self):
+        self.enqueue(1)
+        with mock.patch('core.outbox.EmailMessage.send', side_effect=OSError('connection reset')):
+            drain_once(10)
+        with _later(31):
+            self.assertEqual(drain_once(10), (1, 1))
+        message = EmailOutbox.objects.get()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('sent', 2, ''))
+        self.assertEqual(mail.outbox[0].to, ['user0@example.com'])
+
+class ReminderTests(TransactionTestCase):
+    now = timezone.make_aware(datetime(2030, 3, 4, 8, 0))
+
+    def book(self, n, lead, status='confirmed'):
+        start = self.now + lead
+        _booking(n, booking_id=f"B{n}", patient_id=f"P{n}", date=start.date(), start_time=start,
+                 end_time=start + timedelta(minutes=30), appointment_status=status).save()
+
+    def test_each_reminder_claims_its_own_window(self):
+        self.book(1, timedelta(minutes=30))
+        self.book(2, timedelta(hours=5))
+        self.book(3, timedelta(hours=23, minutes=59))
+        self.book(4, timedelta(hours=30))
+        self.book(5, timedelta(hours=5), status='cancelled')
+        self.assertEqual(sorted(row['booking_id'] for row in claim_due('24h', self.now, 10, 't1')), ['B2', 'B3'])
+        self.assertEqual([row['booking_id'] for row in claim_due('1h', self.now, 10, 't1')], ['B1'])
+        self.assertEqual(claim_due('24h', self.now, 10, 't2'), [])
+
+    def test_concurrent_schedulers_claim_each_booking_once(self):
+        for n in range(30):
+            self.book(n, timedelta(hours=2, minutes=n))
+
+        def scheduler(token):
+            claimed = []
+            while True:
+                rows = claim_due('24h', self.now, 4, token)
+                if not rows:
+                    return (claimed)
+                claimed += [row['booking_id'] for row in rows]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            claimed = [booking_id for rows in pool.map(scheduler, ['t1', 't2', 't3', 't4']) for booking_id in rows]
+        self.assertEqual(sorted(claimed), sorted(f"B{n}" for n in range(30)))
+
+    def test_run_once_queues_every_due_reminder(self):
+        for n in range(5):
+            self.book(n, timedelta(hours=2, minutes=n))
+            Authentication.objects.create(user_id=f"P{n}", phone_number='0300', email=f"p{n}@example.com", password='x')
+        with mock.patch('core.reminders.claim_due', wraps=claim_due) as claim:
+            self.assertEqual(run_once(2, 't1', now=self.now), {'24h': 5, '1h': 0})
+        self.assertEqual(claim.call_count, 5)
+        self.assertEqual(EmailOutbox.objects.count(), 5)
+
+    def test_email_gives_the_appointment_date_and_time(self):
+        booking = {'start_time': timezone.make_aware(datetime(2030, 3, 5, 9, 30))}
+        message = _reminder_email('Ali', {'first_name': 'Sara', 'last_name': 'Khan'}, booking)
+        self.assertIn('with Dr. Sara Khan on Tuesday, 05 March 2030 at 09:30.', message)
+
+class DoctorSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _doctor(1, 'Alina', 'Ahmed')
+        _doctor(2, 'Sara', 'Aliyev', specialization='Neurology')
+        _doctor(3, 'Zoë', 'Ali', hospital_name='General')
+        _doctor(4, 'Khalid', 'Butt')
+
+    def names(self, q, **kwargs):
+        return ([f"{doc['first_name']} {doc['last_name']}" for doc in search_doctors(q, **kwargs)])
+
+    def test_words_match_name_prefixes_only(self):
+        self.assertEqual(sorted(self.names('al')), ['Alina Ahmed', 'Sara Aliyev', 'Zoë Ali'])
+        self.assertEqual(self.names('ali ahm'), ['Alina Ahmed'])
+        self.assertEqual(self.names('lid'), [])
+
+    def test_whole_words_rank_first_then_first_name_prefixes(self):
+        self.assertEqual(self.names('ali'), ['Zoë Ali', 'Alina Ahmed', 'Sara Aliyev'])
+        self.assertEqual(self.names('ali', limit=1), ['Zoë Ali'])
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(self.names('ZOE'), ['Zoë Ali'])
+        self.assertEqual(self.names('zoë'), ['Zoë Ali'])
+
+    def test_specialization_and_hospital_filters(self):
+        self.assertEqual(self.names('ali', specialization='Neurology'), ['Sara Aliyev'])
+        self.assertEqual(self.names('', hospital='General'), ['Zoë Ali'])
+        self.assertEqual(self.names('', specialization='Cardiology', hospital='City'), ['Alina Ahmed', 'Khalid Butt'])
+
+    def test_view_returns_ranked_rows(self):
+        response = APIClient().get('/api/doctors/search/?q=ali&limit=2&fields=doctor_id')
+        self.assertEqual(response.json(), [{'doctor_id': 'D3'}, {'doctor_id': 'D1'}])
+
+class DoctorCancelDayTests(TransactionTestCase):
+    day = date(2030, 3, 4)
+
+    def setUp(self):
+        self.client = APIClient()
+        _doctor(1, 'Sara', 'Khan')
+        for n, (doctor_id, offset, hour, status) in enumerate([
+            ('D1', 0, 9, 'confirmed'), ('D1', 1, 10, 'confirmed'), ('D1', 0, 11, 'cancelled'),
+            ('D1', 5, 9, 'confirmed'), ('D2', 0, 9, 'confirmed'),
+        ], start=1):
+            day = self.day + timedelta(days=offset)
+            _booking(n, booking_id=f"B{n}", patient_id=f"P{n}", doctor_id=doctor_id, date=day,
+                     start_time=_at(day, hour), end_time=_at(day, hour, 30), appointment_status=status).save()
+            if status == 'confirmed':
+                claim_slot(doctor_id, day, _at(day, hour), _at(day, hour, 30), f"B{n}")
+            Authentication.objects.create(user_id=f"P{n}", phone_number='0300', email=f"p{n}@example.com", password='x')
+
+    def cancel(self, data, doctor_id='D1'):
+        return (self.client.post(f"/api/doctors/{doctor_id}/cancel-day/", data, format='json'))
+
+    def statuses(self):
+        return (dict(Booking.objects.values_list('booking_id', 'appointment_status')))
+
+    def test_cancels_and_notifies_only_the_rows_it_changed(self):
+        response = self.cancel({'date_from': '2030-03-04', 'date_to': '2030-03-05'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['cancelled'], sorted(body['booking_ids']), body['notified']), (2, ['B1', 'B2'], 2))
+        self.assertEqual(self.statuses(), {'B1': 'cancelled', 'B2': 'cancelled', 'B3': 'cancelled', 'B4': 'confirmed', 'B5': 'confirmed'})
+        self.assertTrue(claim_slot('D1', self.day, _at(self.day, 9), _at(self.day, 9, 30), 'B9'))
+        messages = sorted(EmailOutbox.objects.values_list('message', flat=True))
+        self.assertEqual(len(messages), 2)
+        self.assertIn('with Dr. Sara Khan on Monday, 04 March 2030 at 09:00 has been cancelled.', messages[0])
+
+    def test_repeated_call_cancels_and_sends_nothing(self):
+        self.cancel({'date': '2030-03-04'})
+        response = self.cancel({'date': '2030-03-04'})
+        self.assertEqual(response.json(), {'cancelled': 0, 'booking_ids': [], 'notified': 0})
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_concurrent_calls_notify_each_booking_once(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            bodies = [response.json() for response in pool.map(lambda _: self.cancel({'date': '2030-03-04'}), range(4))]
+        self.assertEqual(sum(body['cancelled'] for body in bodies), 1)
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.cancel({'date': '2030-03-04'}, doctor_id='D404').status_code, 404)
+        self.assertEqual(self.cancel({'date': '04/03/2030'}).status_code, 400)
+        self.assertEqual(self.cancel({'date_from': '2030-03-05', 'date_to': '2030-03-04'}).status_code, 400)
+        self.assertEqual(self.cancel({'date_from': '2030-03-01', 'date_to': '2030-06-01'}).status_code, 400)
+
+class HospitalExpandTests(TransactionTestCase):
+    def setUp(self):
+        doctors = [_doctor(n, f"First{n}", f"Last{n}") for n in range(6)]
+        for n in range(5):
+            Hospital.objects.create(
+                hospital_id=f"H{n}", name=f"Hospital {n}", address='Main Road', phone_number='0300',
+                email=f"h{n}@example.com", type='hospital', opening_time=time(8), closing_time=time(20),
+                doctor_ids=[str(doctor._id) for doctor in doctors[n:n + 2]] + ['not-an-id'],
+            )
+
+    def get(self, path):
+        counter = monitor.install()
+        before = counter.count
+        response = APIClient().get(path)
+        return (response, counter.count - before)
+
+    def test_list_expands_every_page_in_two_queries(self):
+        response, queries = self.get('/api/hospitals/?expand=doctors')
+        self.assertEqual(queries, 2)
+        hospitals = response.json()
+        self.assertEqual(len(hospitals), 5)
+        self.assertEqual([doctor['doctor_id'] for doctor in hospitals[4]['doctors']], ['D4', 'D5'])
+
+    def test_detail_expansion_follows_stored_order(self):
+        hospital = Hospital.objects.get(hospital_id='H0')
+        hospital.doctor_ids = [str(Doctor.objects.get(doctor_id=doctor_id)._id) for doctor_id in ('D1', 'D0')]
+        hospital.save()
+        response, _ = self.get('/api/hospitals/H0/?expand=doctors')
+        self.assertEqual([doctor['doctor_id'] for doctor in response.json()['doctors']], ['D1', 'D0'])
+
+    def test_writes_are_not_routed(self):
+        self.assertEqual(APIClient().post('/api/hospitals/', {}, format='json').status_code, 405)
+        self.assertEqual(APIClient().delete('/api/hospitals/H0/').status_code, 405)
+
+class AvailabilityTests(TestCase):
+    day = date(2030, 3, 4)
+
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(1, 5):
+            _doctor(n, f"First{n}", f"Last{n}", specialization='Neurology' if n == 4 else 'Cardiology')
+        for n, doctor_id in ((1, 'D1'), (3, 'D3'), (4, 'D4')):
+            TimeSlot.objects.create(timeslot_id=f"T{n}", doctor_id=doctor_id, date=cls.day, start_time=time(9), end_time=time(10), fee=Decimal('500.00'))
+        # D2's only slot is unavailable, so D2 has no free window
+        TimeSlot.objects.create(timeslot_id='T2', doctor_id='D2', date=cls.day, start_time=time(9), end_time=time(10), availability_status='unavailable')
+        _booking(1, booking_id='B1', doctor_id='D1', date=cls.day, start_time=_at(cls.day, 9), end_time=_at(cls.day, 9, 30)).save()
+
+    def get(self, query):
+        return (APIClient().get(f"/api/availability/?date_from=2030-03-04{query}"))
+
+    def test_booked_windows_are_left_out(self):
+        results = self.get('&specialization=Cardiology').json()['results']
+        self.assertEqual([doctor['doctor_id'] for doctor in results], ['D1', 'D3'])
+        self.assertEqual(results[0]['windows'], [{
+            'timeslot_id': 'T1', 'date': '2030-03-04', 'start_time': '2030-03-04T09:30:00', 'end_time': '2030-03-04T10:00:00', 'fee': '500.00',
+        }])
+        self.assertEqual(len(results[1]['windows']), 2)
+
+    def test_pages_are_full_when_a_doctor_has_no_windows(self):
+        first = self.get('&limit=1').json()
+        self.assertEqual([doctor['doctor_id'] for doctor in first['results']], ['D1'])
+        second = self.get(f"&limit=1&cursor={first['next']}").json()
+        self.assertEqual([doctor['doctor_id'] for doctor in second['results']], ['D3'])
+        third = self.get(f"&limit=1&cursor={second['next']}").json()
+        self.assertEqual(([doctor['doctor_id'] for doctor in third['results']], third['next']), (['D4'], None))
+
+    def test_date_range_validation(self):
+        self.assertEqual(self.get('&date_to=2030-03-01').status_code, 400)
+        self.assertEqual(self.get('&date_to=2030-04-30').status_code, 400)
+        self.assertEqual(APIClient().get('/api/availability/?date_from=04-03-2030').status_code, 400)
+
+class DoctorCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for patcher in (
+            mock.patch.object(doctor_cache, 'local', LRUCache(16, 60)),
+            mock.patch.object(doctor_cache, '_counts', {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        _doctor(1, 'Sara', 'Khan')
+
+    def stats(self):
+        return (self.client.get('/api/doctors/cache/stats/').json())
+
+    def first_name(self, doctor_id='D1'):
+        return (self.client.get(f"/api/doctors/{doctor_id}/").json().get('first_name'))
+
+    def test_reads_go_through_the_cache(self):
+        self.assertEqual(self.first_name(), 'Sara')
+        Doctor.objects.filter(doctor_id='D1').update(first_name='Changed')
+        self.assertEqual(self.first_name(), 'Sara')
+        self.client.get('/api/doctors/D1/summary/')
+        stats = self.stats()
+        self.assertEqual((stats['misses'], stats['local_hits'], stats['size'], stats['hit_ratio']), (2, 1, 2, 0.3333))
+
+    def test_put_invalidates_once(self):
+        self.first_name()
+        self.client.put('/api/doctors/D1/', {'first_name': 'Zara'}, format='json')
+        self.assertEqual(self.first_name(), 'Zara')
+        self.assertEqual(self.stats()['invalidations'], 1)
+
+    def test_renaming_the_id_invalidates_the_old_entry(self):
+        self.first_name()
+        self.client.put('/api/doctors/D1/', {'doctor_id': 'D9'}, format='json')
+        self.assertEqual(self.client.get('/api/doctors/D1/').status_code, 404)
+        self.assertEqual(self.stats()['invalidations'], 2)
+
+    def test_model_save_and_delete_invalidate(self):
+        self.first_name()
+        doctor = Doctor.objects.get(doctor_id='D1')
+        doctor.first_name = 'Zara'
+        doctor.save()
+        self.assertEqual(self.first_name(), 'Zara')
+        doctor.delete()
+        self.assertEqual(self.client.get('/api/doctors/D1/').status_code, 404)
+        self.assertEqual(self.stats()['invalidations'], 2)
+
+@override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=0)
+class HashingPoolTests(SimpleTestCase):
+    def setUp(self):
+        for patcher in (mock.patch.object(hashers, '_pool', None), mock.patch.object(hashers, '_slots', None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: hashers._pool and hashers._pool.shutdown())
+
+    def test_full_pool_raises_busy(self):
+        started, release = threading.Event(), threading.Event()
+        def slow():
+            started.set()
+            release.wait(5)
+            return ('done')
+        with ThreadPoolExecutor(max_workers=1) as caller:
+            first = caller.submit(hashers._run, slow)
+            started.wait(5)
+            with self.assertRaises(hashers.HashingBusy):
+                hashers._run(lambda: 'second')
+            release.set()
+            self.assertEqual(first.result(5), 'done')
+        self.assertEqual(hashers._run(lambda: 'third'), 'third')
+
+    @override_settings(PASSWORD_HASH_WORKERS=0)
+    def test_no_workers_hashes_inline(self):
+        self.assertEqual(hashers._run(threading.current_thread), threading.current_thread())
+        self.assertIsNone(hashers._pool)
+
+@override_settings(PASSWORD_HASH_WORKERS=0, PASSWORD_HASH_ITERATIONS=2000)
+class AuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        _doctor(1, 'Sara', 'Khan')
+
+    def register(self, email, phone_number='03001234567'):
+        return (self.client.post('/api/authentication/', {
+            'user_id': 'D1', 'user_type': 'doctor', 'phone_number': phone_number, 'email': email, 'password': 'secret',
+        }, format='json'))
+
+    def login(self, email, password='secret'):
+        return (self.client.post('/api/authentication/login/', {'email': email, 'password': password}, format='json'))
+
+    def test_email_key_is_normalized(self):
+        self.assertEqual(normalize_email('  Sara@Example.COM '), 'sara@example.com')
+        self.assertEqual(self.register('Sara@Example.com').status_code, 201)
+        self.assertEqual(Authentication.objects.get(user_id='D1').email_key, 'sara@example.com')
+        self.assertEqual(self.register(' sara@EXAMPLE.com', phone_number='03007654321').status_code, 409)
+        self.assertEqual(self.login('SARA@example.com').json(), {'user_id': 'D1', 'user_type': 'doctor'})
+        self.assertEqual(self.client.get('/api/authentication/email/sara@EXAMPLE.com/').json()['user_id'], 'D1')
+        self.assertEqual(self.login('sara@example.com', 'wrong').status_code, 400)
+
+    def test_busy_pool_returns_503(self):
+        with mock.patch('core.views.authentication_views.hash_password', side_effect=hashers.HashingBusy):
+            response = self.register('sara@example.com')
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '1'))
+        self.assertFalse(Authentication.objects.exists())
+        self.assertEqual(self.register('sara@example.com').status_code, 201)
+        with mock.patch('core.views.authentication_views.verify_password', side_effect=hashers.HashingBusy):
+            response = self.login('sara@example.com')
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '1'))
+
+    def test_login_rehashes_an_outdated_hash(self):
+        old = hashers.ConfigurablePBKDF2PasswordHasher().encode('secret', 'oldsalt', iterations=1000)
+        Authentication.objects.create(user_id='D1', user_type='doctor', phone_number='03001234567', email='sara@example.com', password=old)
+        self.assertEqual(self.login('sara@example.com').status_code, 200)
+        stored = Authentication.objects.get(user_id='D1').password
+        self.assertTrue(stored.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(check_password('secret', stored))
+        self.assertEqual(self.login('sara@example.com').status_code, 200)
+        self.assertEqual(Authentication.objects.get(user_id='D1').password, stored)
+
+class RollupInvalidationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.today = timezone.localdate()
+        self.day = self.today - timedelta(days=3)
+        _doctor(1, 'Sara', 'Khan')
+        _timeslot(1, doctor_id='D1', date=self.day, start_time=time(9, 0), end_time=time(10, 0), availability_status='available').save()
+        _booking(1, doctor_id='D1', date=self.day, appointment_status='confirmed').save()
+
+    def report(self):
+        return (self.client.get(f"/api/analytics/bookings/?group_by=day,doctor&from={self.day - timedelta(days=1)}&to={self.today}").json()['results'])
+
+    def live(self):
+        BookingRollup.objects.mongo_delete_many({})
+        return (self.report())
+
+    def capacity(self, results, day):
+        return (next(row['capacity'] for row in results if row['date'] == day.isoformat()))
+
+    def test_rollups_match_live_output(self):
+        stored = self.report()
+        self.assertEqual(BookingRollup.objects.count(), 4)
+        self.assertEqual(stored, self.live())
+        self.assertEqual((self.capacity(stored, self.day), stored[0]['confirmed']), (2, 1))
+
+    def test_timeslot_writes_refresh_finished_days(self):
+        writes = [
+            lambda: self.client.put('/api/timeslots/T1/', {'end_time': '11:00:00'}, format='json'),
+            lambda: self.client.post('/api/timeslots/', {'doctor_id': 'D1', 'hospital_id': 'H1', 'start_time': '13:00:00', 'end_time': '14:00:00', 'fee': '100.00'}, format='json'),
+            lambda: self.client.post('/api/timeslots/bulk/', {
+                'doctor_id': 'D1', 'date_from': self.day.isoformat(), 'date_to': self.day.isoformat(), 'fee': '100.00',
+                'schedule': [{'weekday': self.day.weekday(), 'start': '15:00', 'end': '16:00'}],
+            }, format='json'),
+            lambda: self.client.delete('/api/timeslots/T1/'),
+        ]
+        capacities = []
+        for write in writes:
+            self.report()
+            self.assertLess(write().status_code, 300)
+            results = self.report()
+            self.assertEqual(results, self.live())
+            capacities.append(self.capacity(results, self.day))
+        self.assertEqual(capacities, [4, 6, 8, 4])
+
+class EnsureIndexesTests(TestCase):
+    def command(self, *args):
+        out = StringIO()
+        call_command('ensure_indexes', *args, stdout=out)
+        return (out.getvalue())
+
+    def test_check_reports_missing_indexes(self):
+        self.addCleanup(ensure_indexes)
+        self.assertIn('booking_doctor_updated', self.command())
+        self.assertIn('All managed indexes present', self.command('--check'))
+        Booking.objects.mongo_drop_index('booking_doctor_updated')
+        out = StringIO()
+        with self.assertRaises(SystemExit) as raised:
+            call_command('ensure_indexes', '--check', stdout=out)
+        self.assertEqual(raised.exception.code, 1)
+        self.assertEqual(out.getvalue().strip(), f"{Booking._meta.db_table}: missing booking_doctor_updated")
+
+    def test_ensure_is_idempotent(self):
+        first, second = ensure_indexes(), ensure_indexes()
+        self.assertEqual(first, second)
+        self.assertEqual(set(second), {model._meta.db_table for model in MANAGED_INDEXES})
+
+class TimeSlotBulkTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(utils, '_seeded_counters', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        _timeslot(1, doctor_id='D1', date=None, start_time=time(12, 0), end_time=time(13, 0)).save()
+        _timeslot(2, doctor_id='D1', date=date(2030, 3, 4), start_time=time(9, 0), end_time=time(9, 30)).save()
+        _timeslot(7, doctor_id='D2', date=date(2030, 3, 5), start_time=time(11, 0), end_time=time(13, 0)).save()
+
+    def post(self, schedule, **overrides):
+        data = dict({'doctor_id': 'D1', 'date_from': '2030-03-04', 'date_to': '2030-03-05', 'fee': '100.00', 'schedule': schedule}, **overrides)
+        return (self.client.post('/api/timeslots/bulk/', data, format='json'))
+
+    def test_conflicts_are_skipped_and_ids_come_from_one_block(self):
+        response = self.post([
+            {'weekday': 'monday', 'start': '09:00', 'end': '10:00'},
+            {'weekday': 0, 'start': '09:30', 'end': '10:30'},
+            {'weekday': 'Tuesday', 'start': '11:30', 'end': '12:30'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body['created'], 3)
+        self.assertEqual(
+            [(slot['timeslot_id'], slot['date'], slot['start_time']) for slot in body['timeslots']],
+            [('T8', '2030-03-04', '09:30:00'), ('T9', '2030-03-04', '10:00:00'), ('T10', '2030-03-05', '11:30:00')],
+        )
+        self.assertEqual(
+            [(conflict['date'], conflict['start_time'], conflict['conflicts_with']) for conflict in body['conflicts']],
+            [('2030-03-04', '09:00:00', 'T2'), ('2030-03-04', '09:30:00', None), ('2030-03-05', '12:00:00', 'T1')],
+        )
+        self.assertEqual(TimeSlot.objects.filter(doctor_id='D1').count(), 5)
+        self.assertEqual(next_sequential_id(TimeSlot, 'timeslot_id', 'T'), 'T11')
+
+    def test_fully_conflicting_schedule_creates_nothing(self):
+        response = self.post([{'weekday': 'tuesday', 'start': '12:00', 'end': '13:00'}])
+        self.assertEqual((response.status_code, response.json()['created'], len(response.json()['conflicts'])), (201, 0, 2))
+        self.assertEqual(next_sequential_id(TimeSlot, 'timeslot_id', 'T'), 'T8')
+
+    @override_settings(TIMESLOT_BULK_MAX_SLOTS=3)
+    def test_invalid_requests(self):
+        self.assertEqual(self.post([{'weekday': 'monday', 'start': '09:00', 'end': '11:00'}]).status_code, 400)
+        self.assertEqual(self.post([{'weekday': 'someday', 'start': '09:00', 'end': '10:00'}]).status_code, 400)
+        self.assertEqual(self.post([{'weekday': 0, 'start': '09:00', 'end': '10:00'}], date_to='2030-03-01').status_code, 400)
+        self.assertEqual(self.post([{'weekday': 0, 'start': '09:00', 'end': '10:00'}], slot_minutes=2).status_code, 400)
+        self.assertEqual(TimeSlot.objects.count(), 3)
+
+class BookingIncludeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        _doctor(1, 'Sara', 'Khan', picture=None, hospital_name='City')
+        for n, first_name in ((1, 'Ali'), (2, 'Hina')):
+            Patient.objects.create(
+                patient_id=f"P{n}", first_name=first_name, last_name='Raza', gender='Male', date_of_birth=date(1990, 1, 1),
+                age=40, cnic=f"{n + 100:013d}", emergency_contact='03000000000', blood_type='O+')
+        for n in (1, 2, 3):
+            _booking(n).save()
+
+    def get(self, query):
+        return (self.client.get('/api/bookings/' + query))
+
+    def test_summaries_are_embedded(self):
+        rows = {row['booking_id']: row for row in self.get('?include=doctor,patient').json()}
+        self.assertEqual(rows['B1']['doctor'], {'first_name': 'Sara', 'last_name': 'Khan', 'picture': None, 'specialization': 'Cardiology', 'hospital_name': 'City'})
+        self.assertEqual(rows['B1']['patient'], {'first_name': 'Ali', 'last_name': 'Raza', 'gender': 'Male', 'age': 40, 'blood_type': 'O+'})
+        self.assertEqual(rows['B2']['patient']['first_name'], 'Hina')
+        # missing related documents embed as null
+        self.assertIsNone(rows['B2']['doctor'])
+        self.assertIsNone(rows['B3']['patient'])
+
+    def test_include_works_with_a_narrow_fieldset(self):
+        rows = self.get('?include=doctor&fields=booking_id&doctor_id=D1').json()
+        self.assertEqual(rows, [
+            {'booking_id': 'B1', 'doctor': rows[0]['doctor']},
+            {'booking_id': 'B3', 'doctor': rows[0]['doctor']},
+        ])
+        self.assertEqual(rows[0]['doctor']['first_name'], 'Sara')
+
+    def test_no_include_embeds_nothing(self):
+        self.assertNotIn('doctor', self.get('').json()[0])
+
+    def test_unknown_include_is_rejected(self):
+        response = self.get('?include=doctor,hospital')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('hospital', str(response.json()))
+
+class FieldsetApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        _booking(1).save()
+
+    def test_fieldsets_on_lists_and_details(self):
+        self.assertEqual(self.client.get('/api/bookings/?fields=booking_id,doctor_id').json(), [{'booking_id': 'B1', 'doctor_id': 'D1'}])
+        self.assertEqual(self.client.get('/api/bookings/B1/?fields=appointment_status').json(), {'appointment_status': 'confirmed'})
+        self.assertEqual(self.client.get('/api/bookings/?fields=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/authentication/?fields=password').status_code, 400)
+
+    @override_settings(NATIVE_MONGO_REPOSITORY=True)
+    def test_native_reads_project_only_the_requested_columns(self):
+        with mock.patch('core.repository.find_rows', wraps=repository.find_rows) as find_rows:
+            response = self.client.get('/api/bookings/?fields=booking_id')
+        self.assertEqual(response.json(), [{'booking_id': 'B1'}])
+        self.assertEqual(find_rows.call_args[0][2], ['_id', 'booking_id'])
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        _timeslot(1, doctor_id='D1').save()
+
+    def get(self, path, etag=None):
+        return (self.client.get(path, HTTP_IF_NONE_MATCH=etag) if etag else self.client.get(path))
+
+    def test_detail_revalidates_until_written(self):
+        etag = self.get('/api/timeslots/T1/')['ETag']
+        response = self.get('/api/timeslots/T1/', etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+        self.assertNotEqual(self.get('/api/timeslots/T1/?fields=fee')['ETag'], etag)
+        self.client.put('/api/timeslots/T1/', {'availability_status': 'unavailable'}, format='json')
+        response = self.get('/api/timeslots/T1/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_filtered_list_changes_with_the_collection(self):
+        etag = self.get('/api/timeslots/?doctor_id=D1')['ETag']
+        self.assertEqual(self.get('/api/timeslots/?doctor_id=D1', etag).status_code, 304)
+        _timeslot(2, doctor_id='D2').save()
+        self.assertEqual(self.get('/api/timeslots/?doctor_id=D1', etag).status_code, 304)
+        _timeslot(3, doctor_id='D1').save()
+        self.assertEqual(self.get('/api/timeslots/?doctor_id=D1', etag).status_code, 200)
+
+    def test_unfiltered_list_and_missing_documents_carry_no_etag(self):
+        self.assertFalse(self.get('/api/timeslots/').has_header('ETag'))
+        self.assertEqual(self.get('/api/timeslots/T9/', '*').status_code, 404)
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class BookingExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for n in range(5):
+            _booking(n).save()
+
+    def export(self, query):
+        return (self.client.get('/api/bookings/export/' + query))
+
+    def test_ndjson_export(self):
+        response = self.export('?format=ndjson&doctor_id=D1')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bookings.ndjson"')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['booking_id'] for row in rows], ['B1', 'B3'])
+        self.assertEqual(rows[0], self.client.get('/api/bookings/B1/').json())
+
+    def test_csv_export_from_the_accept_header(self):
+        response = self.client.get('/api/bookings/export/?fields=booking_id,doctor_id', HTTP_ACCEPT='text/csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        text = b''.join(response.streaming_content).decode()
+        self.assertEqual(list(csv.reader(text.splitlines())), [['booking_id', 'doctor_id']] + [[f"B{n}", f"D{n % 2}"] for n in range(5)])
+
+    def test_bad_filters_are_rejected_before_streaming(self):
+        self.assertEqual(self.export('?format=csv&date=03-04-2030').status_code, 400)
+        self.assertEqual(self.export('?format=csv&fields=nope').status_code, 400)
+
+class RequestTimingTests(TestCase):
+    def test_mongo_time_is_reported_per_request(self):
+        _timeslot(1, doctor_id='D1').save()
+        response = APIClient().get('/api/timeslots/?doctor_id=D1')
+        self.assertRegex(response['Server-Timing'], r'mongo;dur=[\d.]+;desc="\d+ calls?"')
+        self.assertIn('route="/api/timeslots/",phase="mongo"', metrics.exposition())
+
+class DoctorCalendarTests(TestCase):
+    days = [date(2030, 3, 4), date(2030, 3, 5)]
+
+    def setUp(self):
+        patcher = mock.patch.object(utils, '_seeded_counters', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        _doctor(1, 'Sara', 'Khan')
+        Patient.objects.create(patient_id='P1', first_name='Ali', last_name='Raza', gender='Male', date_of_birth=date(1990, 1, 1),
+                               age=40, cnic='0000000000101', emergency_contact='03000000000')
+        Authentication.objects.create(user_id='P1', phone_number='0300', email='p1@example.com', password='x')
+        _timeslot(1, doctor_id='D1', date=self.days[0], start_time=time(9, 0), end_time=time(10, 0)).save()
+        _timeslot(2, doctor_id='D1', date=None, start_time=time(14, 0), end_time=time(15, 0)).save()
+
+    def calendars(self):
+        documents = [self.client.get(f"/api/doctors/D1/calendar/?date={day}").json() for day in self.days]
+        for document in documents:
+            document.pop('updated_at')
+        return (documents)
+
+    def assertPatchedMatchesRebuilt(self):
+        patched = self.calendars()
+        DoctorCalendar.objects.mongo_delete_many({})
+        self.assertEqual(patched, self.calendars())
+        return (patched)
+
+    def ids(self, documents, field, key):
+        return ([[entry[key] for entry in document[field]] for document in documents])
+
+    def test_booking_writes_patch_the_calendar(self):
+        self.calendars()
+        response = self.client.post('/api/bookings/', {
+            'patient_id': 'P1', 'doctor_id': 'D1', 'timeslot_id': 'T1', 'date': '2030-03-04', 'start_time': '2030-03-04T09:00:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        booking_id = response.json()['booking_id']
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'bookings', 'booking_id'), [[booking_id], []])
+        self.client.put(f"/api/bookings/{booking_id}/", {'date': '2030-03-05', 'start_time': _at(self.days[1], 11).isoformat()}, format='json')
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'bookings', 'booking_id'), [[], [booking_id]])
+        self.client.post('/api/doctors/D1/cancel-day/', {'date': '2030-03-05'}, format='json')
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'bookings', 'appointment_status'), [[], ['cancelled']])
+        self.client.delete(f"/api/bookings/{booking_id}/")
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'bookings', 'booking_id'), [[], []])
+
+    def test_timeslot_writes_patch_the_calendar(self):
+        self.assertEqual(self.ids(self.calendars(), 'slots', 'timeslot_id'), [['T1', 'T2'], ['T2']])
+        self.client.post('/api/timeslots/', {'doctor_id': 'D1', 'hospital_id': 'H1', 'start_time': '08:00:00', 'end_time': '08:30:00', 'fee': '100.00'}, format='json')
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'slots', 'timeslot_id'), [['T3', 'T1', 'T2'], ['T3', 'T2']])
+        self.client.put('/api/timeslots/T1/', {'date': '2030-03-05', 'start_time': '16:00:00', 'end_time': '17:00:00'}, format='json')
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'slots', 'timeslot_id'), [['T3', 'T2'], ['T3', 'T2', 'T1']])
+        self.client.post('/api/timeslots/bulk/', {
+            'doctor_id': 'D1', 'date_from': '2030-03-04', 'date_to': '2030-03-04', 'fee': '100.00',
+            'schedule': [{'weekday': 'monday', 'start': '10:00', 'end': '10:30'}],
+        }, format='json')
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'slots', 'timeslot_id'), [['T3', 'T4', 'T2'], ['T3', 'T2', 'T1']])
+        self.client.delete('/api/timeslots/T2/')
+        self.assertEqual(self.ids(self.assertPatchedMatchesRebuilt(), 'slots', 'timeslot_id'), [['T3', 'T4'], ['T3', 'T1']])
+
+@skipIf(async_repository.AsyncIOMotorClient is None, 'the async endpoints need motor')
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        _doctor(1, 'Sara', 'Khan')
+        for n in range(1, 5):
+            _booking(n).save()
+            _timeslot(n).save()
+
+    def test_async_views_match_the_sync_views(self):
+        for path in (
+            'bookings/?doctor_id=D1&include=doctor,patient', 'bookings/?limit=2', 'bookings/B1/?fields=date,start_time',
+            'timeslots/?doctor_id=D1', 'timeslots/T2/', 'doctors/', 'doctors/D1/?fields=first_name',
+            'bookings/B9/', 'doctors/D9/', 'bookings/?include=hospital', 'timeslots/?fields=nope',
+        ):
+            sync, async_ = self.client.get('/api/' + path), self.client.get('/api/async/' + path)
+            self.assertEqual((async_.status_code, async_.json()), (sync.status_code, sync.json()), path)
+
+    def test_async_pages_follow_the_cursor(self):
+        first = self.client.get('/api/async/bookings/?limit=3').json()
+        rest = self.client.get(f"/api/async/bookings/?limit=3&cursor={first['next']}").json()
+        self.assertEqual([row['booking_id'] for row in first['results'] + rest['results']], ['B1', 'B2', 'B3', 'B4'])
+        self.assertIsNone(rest['next'])
+
+    def test_async_conditional_get(self):
+        etag = self.client.get('/api/async/timeslots/T1/')['ETag']
+        self.assertEqual(self.client.get('/api/async/timeslots/T1/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        etag = self.client.get('/api/async/doctors/D1/')['ETag']
+        Doctor.objects.filter(doctor_id='D1').update(first_name='Zara')
+        self.assertEqual(self.client.get('/api/async/doctors/D1/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+class MultiGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        _doctor(1, 'Sara', 'Khan')
+        _doctor(2, 'Omar', 'Ali')
+        for n in range(1, 5):
+            _timeslot(n).save()
+
+    def get(self, path):
+        return (self.client.get('/api/' + path).json())
+
+    def test_results_follow_the_requested_order(self):
+        body = self.get('doctors/?ids=D2,D9,D1&fields=doctor_id,first_name')
+        self.assertEqual(body, {
+            'results': [{'doctor_id': 'D2', 'first_name': 'Omar'}, {'doctor_id': 'D1', 'first_name': 'Sara'}],
+            'missing': ['D9'],
+        })
+        self.assertEqual(self.get('doctors/?ids=D1')['results'][0], self.get('doctors/D1/'))
+
+    def test_other_filters_still_apply(self):
+        body = self.get('timeslots/?ids=T1,T2,T3&doctor_id=D1')
+        self.assertEqual(([row['timeslot_id'] for row in body['results']], body['missing']), (['T1', 'T3'], ['T2']))
+
+    @override_settings(API_MAX_IDS=2)
+    def test_too_many_ids(self):
+        response = self.client.get('/api/timeslots/?ids=T1,T2,T3')
+        self.assertEqual(response.status_code, 400)
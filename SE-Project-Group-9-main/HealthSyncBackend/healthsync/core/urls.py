@@ -1,8 +1,11 @@
 from django.urls import path
-from .views.doctor_views import DoctorView, DoctorDetailView, DoctorSummaryDetailView
+from .views.doctor_views import DoctorView, DoctorDetailView, DoctorSummaryDetailView, DoctorCalendarView, DoctorCacheStatsView, DoctorSearchView
 from .views.patient_views import PatientView, PatientDetailView
-from .views.timeslot_views import TimeSlotView, TimeSlotDetailView
-from .views.booking_views import BookingView, BookingDetailView
+from .views.timeslot_views import TimeSlotView, TimeSlotDetailView, TimeSlotBulkView
+from .views.booking_views import BookingView, BookingDetailView, BookingExportView, DoctorCancelDayView
+from .views.availability_views import AvailabilityView
+from .views.hospital_views import HospitalView, HospitalDetailView
+from .views.analytics_views import BookingAnalyticsView
 from .views.authentication_views import (
     AuthenticationView,
     AuthenticationDetailView,
@@ -13,18 +16,30 @@ from . import views
 
 urlpatterns = [
     path('doctors/', DoctorView.as_view(), name='doctor-list'),
+    path('doctors/search/', DoctorSearchView.as_view(), name='doctor-search'),
+    path('doctors/cache/stats/', DoctorCacheStatsView.as_view(), name='doctor-cache-stats'),
     path('doctors/<str:doctor_id>/', DoctorDetailView.as_view(), name='doctor-detail'),
     path('doctors/<str:doctor_id>/summary/', DoctorSummaryDetailView.as_view(), name='doctor-summary'),
+    path('doctors/<str:doctor_id>/calendar/', DoctorCalendarView.as_view(), name='doctor-calendar'),
+    path('doctors/<str:doctor_id>/cancel-day/', DoctorCancelDayView.as_view(), name='doctor-cancel-day'),
 
     path('patients/', PatientView.as_view()),
     path('patients/<str:patient_id>/', PatientDetailView.as_view()),
 
     path('timeslots/', TimeSlotView.as_view()),                   
+    path('timeslots/bulk/', TimeSlotBulkView.as_view(), name='timeslot-bulk'),
     path('timeslots/<str:timeslot_id>/', TimeSlotDetailView.as_view()),
 
     path('bookings/', BookingView.as_view()),
+    path('bookings/export/', BookingExportView.as_view(), name='booking-export'),
     path('bookings/<str:booking_id>/', BookingDetailView.as_view()),
 
+    path('availability/', AvailabilityView.as_view(), name='availability'),
+    path('analytics/bookings/', BookingAnalyticsView.as_view(), name='booking-analytics'),
+
+    path('hospitals/', HospitalView.as_view(), name='hospital-list'),
+    path('hospitals/<str:hospital_id>/', HospitalDetailView.as_view(), name='hospital-detail'),
+
     path('authentication/', AuthenticationView.as_view()),
     path('authentication/email/<str:email>/', AuthenticationByEmailView.as_view(), name='auth-by-email'),
     path("authentication/login/", AuthenticationLoginView.as_view(), name="auth-login"),
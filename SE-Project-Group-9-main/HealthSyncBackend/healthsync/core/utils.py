@@ -1,16 +1,74 @@
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import connection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import logging
+from core.metrics import timed
+from core.models import Counter, EmailOutbox
+from core.outbox import DEFAULT_FROM_EMAIL, enqueue_email
+
+logger = logging.getLogger(__name__)
+
+_seeded_counters = set()
 
 def send_custom_email(subject, message, recipient_list):
     try:
-        send_mail(
-            subject,
-            message,
-            'healthsync009@yourdomain.com',  
-            recipient_list,
-            fail_silently=False,
-        )
-        return {"status": "success", "message": "Email sent successfully"}
+        with timed('email'):
+            enqueue_email(subject, message, recipient_list)
+        return {"status": "queued", "message": "Email queued for delivery"}
+    except Exception as e:
+        logger.error(f"Could not queue email '{subject}': {e}")
+        return {"status": "failure", "message": str(e)}
+
+def send_custom_emails(messages):
+    if not messages:
+        return {"status": "queued", "message": "No emails to queue"}
+    try:
+        with timed('email'):
+            EmailOutbox.objects.mongo_insert_many([
+                model_to_document(EmailOutbox(subject=subject, message=message, from_email=DEFAULT_FROM_EMAIL, recipient_list=list(recipients)))
+                for subject, message, recipients in messages
+            ])
+        return {"status": "queued", "message": f"{len(messages)} emails queued for delivery"}
     except Exception as e:
-        return {"status": "failure", "message": str(e)}
\ No newline at end of file
+        logger.error(f"Could not queue {len(messages)} emails: {e}")
+        return {"status": "failure", "message": str(e)}
+
+def _highest_existing_id(model, field, prefix):
+    highest = -1
+    for value in model.objects.values_list(field, flat=True):
+        suffix = (value or '')[len(prefix):]
+        if value and value.startswith(prefix) and suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return (highest)
+
+def _seed_counter(model, field, prefix):
+    # start past the ids the old count()-based allocation handed out
+    if Counter.objects.mongo_find_one({'name': field}, {'_id': 1}) is None:
+        highest = _highest_existing_id(model, field, prefix)
+        try:
+            Counter.objects.mongo_update_one({'name': field}, {'$max': {'seq': highest}}, upsert=True)
+        except DuplicateKeyError:
+            Counter.objects.mongo_update_one({'name': field}, {'$max': {'seq': highest}})
+    _seeded_counters.add(field)
+
+def next_sequential_ids(model, field, prefix, count):
+    if field not in _seeded_counters:
+        _seed_counter(model, field, prefix)
+    counter = Counter.objects.mongo_find_one_and_update(
+        {'name': field},
+        {'$inc': {'seq': count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    first = counter['seq'] - count + 1
+    return ([f"{prefix}{n}" for n in range(first, counter['seq'] + 1)])
+
+def next_sequential_id(model, field, prefix):
+    return (next_sequential_ids(model, field, prefix, 1)[0])
+
+def model_to_document(instance):
+    return ({
+        field.column: field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for field in instance._meta.concrete_fields
+    })
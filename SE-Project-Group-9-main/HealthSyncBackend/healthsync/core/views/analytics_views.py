@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from core.analytics import GROUP_KEYS, booking_rollups
+
+class BookingAnalyticsView(APIView):
+    def get(self, request):
+        params = request.query_params
+        group_by = [name for name in params.get('group_by', 'doctor').split(',') if name]
+        unknown = [name for name in group_by if name not in GROUP_KEYS]
+        if unknown:
+            return Response(
+                {'error': f"Unknown group_by: {', '.join(unknown)}; use {', '.join(GROUP_KEYS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            date_to = datetime.strptime(params['to'], '%Y-%m-%d').date() if params.get('to') else timezone.localdate()
+            date_from = datetime.strptime(params['from'], '%Y-%m-%d').date() if params.get('from') else date_to - timedelta(days=29)
+        except ValueError:
+            return Response({'error': 'Invalid date format – use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        max_days = getattr(settings, 'ANALYTICS_MAX_DAYS', 366)
+        if date_to < date_from:
+            return Response({'error': 'to must not be before from'}, status=status.HTTP_400_BAD_REQUEST)
+        if (date_to - date_from).days + 1 > max_days:
+            return Response({'error': f'Date range is limited to {max_days} days'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'group_by': group_by,
+            'results': booking_rollups(date_from, date_to, list(dict.fromkeys(group_by))),
+        }, status=status.HTTP_200_OK)
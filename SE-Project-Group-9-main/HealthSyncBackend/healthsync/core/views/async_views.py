@@ -0,0 +1,122 @@
+from functools import wraps
+from django.http import HttpResponse
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from core import async_repository
+from core.conditional import content_etag
+from core.fastpath import parse_fieldset, row_columns, row_serializer, serialize_row, serialize_rows
+from core.models import Booking, Doctor, TimeSlot
+from core.pagination import page_data
+from core.renderers import FastJSONRenderer
+from core.repository import to_match
+from core.serializers.booking_serializers import BookingSerializer
+from core.serializers.doctor_serializers import DoctorSerializer
+from core.serializers.timeslot_serializers import TimeSlotSerializer
+from core.views.booking_views import BOOKING_INCLUDES, booking_query
+
+_renderer = FastJSONRenderer()
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return (HttpResponse(_renderer.render(data), status=status_code, content_type='application/json'))
+
+NOT_FOUND = {'detail': 'Not found.'}
+
+def async_get(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = json_response({'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+            response['Allow'] = 'GET, HEAD'
+            return (response)
+        try:
+            return (await view(Request(request), *args, **kwargs))
+        except APIException as e:
+            return (json_response(e.detail, e.status_code))
+    return (wrapper)
+
+async def conditional_response(request, etag, render):
+    if etag is not None:
+        client_tags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in client_tags or '*' in client_tags:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return (response)
+    response = await render()
+    if etag is not None and response.status_code == status.HTTP_200_OK:
+        response['ETag'] = etag
+    return (response)
+
+async def _detail(request, model, serializer_class, **lookup):
+    fields = parse_fieldset(request, serializer_class)
+
+    async def render():
+        row = await async_repository.find_row(model, lookup, row_columns(serializer_class, fields))
+        if row is None:
+            return (json_response(NOT_FOUND, status.HTTP_404_NOT_FOUND))
+        return (json_response(serialize_row(row, serializer_class, fields)))
+
+    return (await conditional_response(request, await async_repository.document_etag(request, model, **lookup), render))
+
+async def _embed_related(rows, data, name):
+    model, key, serializer_class = BOOKING_INCLUDES[name]
+    related = await async_repository.find_in(model, key, {row[key] for row in rows}, [key] + list(serializer_class.Meta.fields))
+    encode = row_serializer(serializer_class)
+    for row, item in zip(rows, data):
+        item[name] = encode(related[row[key]]) if row[key] in related else None
+
+@async_get
+async def booking_list(request):
+    filters, include = booking_query(request.query_params)
+    fields = parse_fieldset(request, BookingSerializer)
+    extra = [BOOKING_INCLUDES[name][1] for name in include]
+
+    async def render():
+        rows, next_token = await async_repository.get_page(request, Booking, filters, row_columns(BookingSerializer, fields, extra))
+        data = serialize_rows(rows, BookingSerializer, fields)
+        for name in include:
+            await _embed_related(rows, data, name)
+        return (json_response(page_data(request, data, next_token)))
+
+    etag = await async_repository.collection_etag(request, Booking, to_match(Booking, filters))
+    return (await conditional_response(request, etag, render))
+
+@async_get
+async def booking_detail(request, booking_id):
+    return (await _detail(request, Booking, BookingSerializer, booking_id=booking_id))
+
+@async_get
+async def timeslot_list(request):
+    doctor_id = request.query_params.get('doctor_id')
+    filters = {'doctor_id': doctor_id} if doctor_id else {}
+
+    async def render():
+        return (json_response(await async_repository.paginated_data(request, TimeSlot, filters, TimeSlotSerializer)))
+
+    return (await conditional_response(request, await async_repository.collection_etag(request, TimeSlot, filters), render))
+
+@async_get
+async def timeslot_detail(request, timeslot_id):
+    return (await _detail(request, TimeSlot, TimeSlotSerializer, timeslot_id=timeslot_id))
+
+@async_get
+async def doctor_list(request):
+    async def render():
+        return (json_response(await async_repository.paginated_data(request, Doctor, {}, DoctorSerializer)))
+
+    return (await conditional_response(request, await async_repository.collection_etag(request, Doctor, {}), render))
+
+@async_get
+async def doctor_detail(request, doctor_id):
+    fields = parse_fieldset(request, DoctorSerializer)
+    row = await async_repository.find_row(Doctor, {'doctor_id': doctor_id}, row_columns(DoctorSerializer))
+    if row is None:
+        return (json_response(NOT_FOUND, status.HTTP_404_NOT_FOUND))
+    # the ETag is taken over the full payload, like the cached sync view
+    data = serialize_row(row, DoctorSerializer)
+
+    async def render():
+        return (json_response(data if fields is None else {name: data[name] for name in fields}))
+
+    return (await conditional_response(request, content_etag(request, data), render))
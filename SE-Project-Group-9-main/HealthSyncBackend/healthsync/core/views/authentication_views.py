@@ -1,22 +1,29 @@
 from django.shortcuts import get_object_or_404
-from django.contrib.auth.hashers import make_password, check_password
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 import traceback
 import logging
-from core.models import Authentication, Patient, Doctor
+from core.models import Authentication, Patient, Doctor, normalize_email
 from core.serializers.authentication_serializers import AuthenticationSerializer
 from core.utils import send_custom_email
+from core.pagination import paginated_data
+from core.fastpath import get_serialized_or_404, parse_fieldset
+from core.conditional import collection_etag, conditional_response, document_etag
+from core.hashers import HashingBusy, hash_password, verify_password
 
 logger = logging.getLogger(__name__)
 
+def hashing_busy():
+    return (Response({"error": "Server busy, please retry"}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'}))
+
 class AuthenticationView(APIView):
     def get(self, request):
         auth_records = Authentication.objects.all()
-        serializer = AuthenticationSerializer(auth_records, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return conditional_response(request, collection_etag(request, Authentication, {}), lambda: Response(
+            paginated_data(request, auth_records, AuthenticationSerializer), status=status.HTTP_200_OK))
 
     def post(self, request):
         required = ['user_id', 'user_type', 'phone_number', 'email', 'password']
@@ -41,7 +48,7 @@ class AuthenticationView(APIView):
                     {"error": "Invalid user_id - doctor not found"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        if Authentication.objects.filter(email=request.data['email']).exists():
+        if Authentication.objects.filter(email_key=normalize_email(request.data['email'])).exists():
             return Response(
                 {"error": "Email already registered"},
                 status=status.HTTP_409_CONFLICT
@@ -52,7 +59,10 @@ class AuthenticationView(APIView):
                 status=status.HTTP_409_CONFLICT
             )
         data = request.data.copy()
-        data['password'] = make_password(data['password'])
+        try:
+            data['password'] = hash_password(data['password'])
+        except HashingBusy:
+            return hashing_busy()
         serializer = AuthenticationSerializer(data=data)
         try:
             serializer.is_valid(raise_exception=True)
@@ -92,15 +102,19 @@ class AuthenticationView(APIView):
 
 class AuthenticationDetailView(APIView):
     def get(self, request, user_id):
-        auth_record = get_object_or_404(Authentication, user_id=user_id)
-        serializer = AuthenticationSerializer(auth_record)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fieldset(request, AuthenticationSerializer)
+        return conditional_response(request, document_etag(request, Authentication, user_id=user_id), lambda: Response(
+            get_serialized_or_404(Authentication.objects.all(), AuthenticationSerializer, fields, user_id=user_id),
+            status=status.HTTP_200_OK))
 
     def put(self, request, user_id):
         auth_record = get_object_or_404(Authentication, user_id=user_id)
         data = request.data.copy()
         if 'password' in data:
-            data['password'] = make_password(data['password'])
+            try:
+                data['password'] = hash_password(data['password'])
+            except HashingBusy:
+                return hashing_busy()
         serializer = AuthenticationSerializer(auth_record, data=data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -115,7 +129,7 @@ class AuthenticationDetailView(APIView):
 class AuthenticationByEmailView(APIView):
     def get(self, request, email):
         try:
-            auth_record = Authentication.objects.get(email=email)
+            auth_record = Authentication.objects.get(email_key=normalize_email(email))
             return Response({
                 'user_id':   auth_record.user_id,
                 'user_type': auth_record.user_type,
@@ -128,17 +142,29 @@ class AuthenticationByEmailView(APIView):
 
 class AuthenticationLoginView(APIView):
     def post(self, request):
-        email = request.data.get("email", "").lower().strip()
+        email = normalize_email(request.data.get("email"))
         raw_pw = request.data.get("password", "")
         if not email or not raw_pw:
             return Response({"error": "Email and password required"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            auth_rec = Authentication.objects.get(email__iexact=email)
-        except Authentication.DoesNotExist:
+        auth_rec = Authentication.objects.mongo_find_one(
+            {"email_key": email},
+            {"user_id": 1, "user_type": 1, "password": 1},
+        )
+        if auth_rec is None:
             return Response({"error": "No account for that email"}, status=status.HTTP_404_NOT_FOUND)
-        if not check_password(raw_pw, auth_rec.password):
+        try:
+            password_ok, new_hash = verify_password(raw_pw, auth_rec["password"])
+        except HashingBusy:
+            return hashing_busy()
+        if not password_ok:
             return Response({"error": "Password is incorrect"}, status=status.HTTP_400_BAD_REQUEST)
+        if new_hash:
+            # work factor or algorithm changed since this hash was stored
+            Authentication.objects.mongo_update_one(
+                {"_id": auth_rec["_id"], "password": auth_rec["password"]},
+                {"$set": {"password": new_hash, "updated_at": timezone.now()}},
+            )
         return Response({
-            "user_id":   auth_rec.user_id,
-            "user_type": auth_rec.user_type,
+            "user_id":   auth_rec["user_id"],
+            "user_type": auth_rec["user_type"],
         }, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from core.models import Doctor, TimeSlot, Booking
+from core.pagination import decode_cursor, encode_cursor, get_limit
+
+WINDOW_MINUTES = 30
+WINDOW_MS = WINDOW_MINUTES * 60 * 1000
+DAY_MS = 24 * 60 * 60 * 1000
+# djongo stores TimeField values as datetimes on 1900-01-01
+TIME_EPOCH = datetime(1900, 1, 1)
+
+def _concat(arrays):
+    return ({'$reduce': {'input': arrays, 'initialValue': [], 'in': {'$concatArrays': ['$$value', '$$this']}}})
+
+def _minutes_ms(field):
+    return ({'$toInt': {'$subtract': [field, TIME_EPOCH]}})
+
+def availability_pipeline(match, date_from, days, limit, now):
+    date_to = date_from + timedelta(days=days - 1)
+    day_start = {'$add': [date_from, {'$multiply': ['$$d', DAY_MS]}]}
+    # undated timeslots repeat every day; dated ones only apply on their own day
+    slots_for_day = {'$filter': {
+        'input': '$timeslots',
+        'as': 't',
+        'cond': {'$in': [{'$ifNull': ['$$t.date', None]}, [None, day_start]]},
+    }}
+    # every 30-minute window inside each available timeslot, for each requested day
+    candidate_windows = _concat({'$map': {
+        'input': {'$range': [0, days]},
+        'as': 'd',
+        'in': _concat({'$map': {
+            'input': slots_for_day,
+            'as': 't',
+            'in': {'$map': {
+                'input': {'$range': [
+                    _minutes_ms('$$t.start_time'),
+                    {'$add': [_minutes_ms('$$t.end_time'), 1 - WINDOW_MS]},
+                    WINDOW_MS,
+                ]},
+                'as': 'offset',
+                'in': {
+                    'timeslot_id': '$$t.timeslot_id',
+                    'fee': '$$t.fee',
+                    'start': {'$add': [day_start, '$$offset']},
+                },
+            }},
+        }}),
+    }})
+    overlaps_booking = {'$anyElementTrue': [{'$map': {
+        'input': '$bookings',
+        'as': 'b',
+        'in': {'$and': [
+            {'$lt': ['$$b.start_time', {'$add': ['$$w.start', WINDOW_MS]}]},
+            {'$gt': ['$$b.end_time', '$$w.start']},
+        ]},
+    }}]}
+    return ([
+        {'$match': match},
+        {'$sort': {'_id': 1}},
+        {'$lookup': {
+            'from': TimeSlot._meta.db_table,
+            'let': {'doctor_id': '$doctor_id'},
+            'pipeline': [
+                {'$match': {
+                    '$expr': {'$eq': ['$doctor_id', '$$doctor_id']},
+                    'availability_status': 'available',
+                    'start_time': {'$ne': None},
+                    'end_time': {'$ne': None},
+                    '$or': [{'date': None}, {'date': {'$gte': date_from, '$lte': date_to}}],
+                }},
+                {'$project': {'_id': 0, 'timeslot_id': 1, 'date': 1, 'start_time': 1, 'end_time': 1, 'fee': 1}},
+            ],
+            'as': 'timeslots',
+        }},
+        {'$lookup': {
+            'from': Booking._meta.db_table,
+            'let': {'doctor_id': '$doctor_id'},
+            'pipeline': [
+                {'$match': {
+                    '$expr': {'$eq': ['$doctor_id', '$$doctor_id']},
+                    'appointment_status': 'confirmed',
+                    'date': {'$gte': date_from, '$lte': date_to},
+                }},
+                {'$project': {'_id': 0, 'start_time': 1, 'end_time': 1}},
+            ],
+            'as': 'bookings',
+        }},
+        {'$project': {
+            'doctor_id': 1,
+            'first_name': 1,
+            'last_name': 1,
+            'specialization': 1,
+            'hospital_name': 1,
+            'windows': {'$filter': {
+                'input': candidate_windows,
+                'as': 'w',
+                'cond': {'$and': [{'$gt': ['$$w.start', now]}, {'$not': [overlaps_booking]}]},
+            }},
+        }},
+        # drop doctors with nothing free before the page is cut, so a full page is never short
+        {'$match': {'windows.0': {'$exists': True}}},
+        {'$limit': limit + 1},
+    ])
+
+def _format_window(window):
+    start = window['start']
+    fee = window.get('fee')
+    return ({
+        'timeslot_id': window['timeslot_id'],
+        'date': start.date().isoformat(),
+        'start_time': start.isoformat(),
+        'end_time': (start + timedelta(minutes=WINDOW_MINUTES)).isoformat(),
+        'fee': str(fee.to_decimal()) if fee is not None else None,
+    })
+
+class AvailabilityView(APIView):
+    def get(self, request):
+        params = request.query_params
+        try:
+            date_from = datetime.strptime(params.get('date_from') or timezone.localdate().isoformat(), '%Y-%m-%d')
+            date_to = datetime.strptime(params['date_to'], '%Y-%m-%d') if params.get('date_to') else date_from
+        except ValueError:
+            return Response({'error': 'Invalid date format – use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        days = (date_to - date_from).days + 1
+        max_days = getattr(settings, 'AVAILABILITY_MAX_DAYS', 14)
+        if days < 1:
+            return Response({'error': 'date_to must not be before date_from'}, status=status.HTTP_400_BAD_REQUEST)
+        if days > max_days:
+            return Response({'error': f'Date range is limited to {max_days} days'}, status=status.HTTP_400_BAD_REQUEST)
+        match = {}
+        if params.get('specialization'):
+            match['specialization'] = params['specialization']
+        if params.get('hospital'):
+            match['hospital_name'] = params['hospital']
+        if params.get('cursor'):
+            match['_id'] = {'$gt': decode_cursor(params['cursor'])}
+        limit = get_limit(request)
+        docs = list(Doctor.objects.mongo_aggregate(availability_pipeline(match, date_from, days, limit, timezone.now())))
+        next_token = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_token = encode_cursor(docs[-1]['_id'])
+        results = [
+            {
+                'doctor_id': doc['doctor_id'],
+                'first_name': doc['first_name'],
+                'last_name': doc['last_name'],
+                'specialization': doc['specialization'],
+                'hospital_name': doc.get('hospital_name'),
+                'windows': [_format_window(w) for w in doc['windows']],
+            }
+            for doc in docs
+        ]
+        return Response({'results': results, 'next': next_token}, status=status.HTTP_200_OK)
@@ -1,33 +1,90 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ParseError
 from core.models import Patient, Doctor
 from core.models import Booking, TimeSlot, Authentication
 from core.serializers.booking_serializers import BookingSerializer
-from datetime import datetime, timedelta, date as date_class
-from core.utils import send_custom_email
+from core.serializers.doctor_serializers import DoctorSummarySerializer
+from core.serializers.patient_serializers import PatientSummarySerializer
+import uuid
+from datetime import datetime, time, timedelta, date as date_class
+from django.conf import settings
+from django.utils import timezone
+from core.utils import send_custom_email, send_custom_emails, next_sequential_id
+from core.pagination import get_page, page_data
+from core.fastpath import as_rows, get_serialized_or_404, parse_fieldset, row_columns, row_value, serialize_rows
+from core import repository
+from core import doctor_calendar
+from core import analytics
+from core.reservations import claim_slot, release_bookings, release_slot
+from core.conditional import collection_etag, conditional_response, document_etag
+from core.export import stream_csv, stream_ndjson
+from core.renderers import CSVRenderer, NDJSONRenderer
+
+BOOKING_LENGTH = timedelta(minutes=30)
+
+def _slot(booking, changes=None):
+    changes = changes or {}
+    fields = ('doctor_id', 'date', 'start_time', 'end_time', 'appointment_status')
+    return (tuple(changes.get(f, getattr(booking, f)) for f in fields))
+
+# include name -> (model, key field, summary serializer)
+BOOKING_INCLUDES = {
+    'doctor': (Doctor, 'doctor_id', DoctorSummarySerializer),
+    'patient': (Patient, 'patient_id', PatientSummarySerializer),
+}
+
+def embed_related(bookings, data, name):
+    model, key, serializer_class = BOOKING_INCLUDES[name]
+    wanted = {row_value(booking, key) for booking in bookings}
+    fields = [key] + list(serializer_class.Meta.fields)
+    related = model.objects.filter(**{f'{key}__in': list(wanted)}).only(*fields) if wanted else []
+    summaries = {getattr(obj, key): serializer_class(obj).data for obj in related}
+    for booking, item in zip(bookings, data):
+        item[name] = summaries.get(row_value(booking, key))
+    return (data)
+
+def booking_query(params):
+    filters = {}
+    doctor_id  = params.get("doctor_id")
+    patient_id = params.get("patient_id")
+    date_str   = params.get("date")
+    if doctor_id:
+        filters['doctor_id'] = doctor_id
+    if patient_id:
+        filters['patient_id'] = patient_id
+    if date_str:
+        try:
+            filters['date'] = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            raise ParseError({"error": "Invalid date format – use YYYY-MM-DD"})
+    include = [name for name in params.get("include", "").split(",") if name]
+    unknown = [name for name in include if name not in BOOKING_INCLUDES]
+    if unknown:
+        raise ParseError({"error": f"Unknown include: {', '.join(unknown)}"})
+    return (filters, include)
 
 class BookingView(APIView):
     def get(self, request):
-        qs = Booking.objects.all()
-        doctor_id  = request.query_params.get("doctor_id")
-        patient_id = request.query_params.get("patient_id")
-        date_str   = request.query_params.get("date")
-        if doctor_id:
-            qs = qs.filter(doctor_id=doctor_id)
-        if patient_id:
-            qs = qs.filter(patient_id=patient_id)
-        if date_str:
-            try:
-                qs = qs.filter(date=date_str)
-            except ValueError:
-                return Response(
-                    {"error": "Invalid date format – use YYYY-MM-DD"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        serializer = BookingSerializer(qs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        filters, include = booking_query(request.query_params)
+        fields = parse_fieldset(request, BookingSerializer)
+        extra = [BOOKING_INCLUDES[name][1] for name in include]
+
+        def render():
+            if repository.native_enabled():
+                rows, next_token = repository.get_page(request, Booking, filters, row_columns(BookingSerializer, fields, extra))
+            else:
+                rows, next_token = get_page(request, as_rows(Booking.objects.filter(**filters), BookingSerializer, fields, extra))
+            bookings = list(rows)
+            data = serialize_rows(bookings, BookingSerializer, fields)
+            for name in include:
+                embed_related(bookings, data, name)
+            return Response(page_data(request, data, next_token), status=status.HTTP_200_OK)
+
+        return conditional_response(request, collection_etag(request, Booking, repository.to_match(Booking, filters)), render)
 
     def post(self, request):
         data = request.data.copy()
@@ -38,41 +95,36 @@ class BookingView(APIView):
                 {'error': f'Missing fields: {", ".join(missing)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        try:
-            ts = TimeSlot.objects.get(timeslot_id=data['timeslot_id'])
-            if ts.availability_status != 'available':
-                return Response({'error': 'Timeslot no longer available'}, status=400)
-        except TimeSlot.DoesNotExist:
+        if repository.native_enabled():
+            ts = repository.find_row(TimeSlot, {'timeslot_id': data['timeslot_id']}, ['availability_status'])
+        else:
+            ts = TimeSlot.objects.filter(timeslot_id=data['timeslot_id']).values('availability_status').first()
+        if ts is None:
             return Response({'error': 'Invalid timeslot'}, status=400)
+        if ts['availability_status'] != 'available':
+            return Response({'error': 'Timeslot no longer available'}, status=400)
         try:
             book_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
             start_time_obj = datetime.fromisoformat(data['start_time'])
             if book_date < date_class.today() or start_time_obj < datetime.now():
                 return Response({'error': 'Booking must be in the future.'}, status=status.HTTP_400_BAD_REQUEST)
-            end_time_obj = start_time_obj + timedelta(minutes=30)
+            end_time_obj = start_time_obj + BOOKING_LENGTH
             data['start_time'] = start_time_obj.isoformat()
             data['end_time']   = end_time_obj.isoformat()
         except Exception:
             return Response({'error': 'Invalid date/start_time'}, status=status.HTTP_400_BAD_REQUEST)
-        overlap = Booking.objects.filter(
-            doctor_id=data['doctor_id'],
-            appointment_status='confirmed',
-            date=book_date,
-            start_time__lt=end_time_obj,
-            end_time__gt=start_time_obj,
-        )
-        if overlap.exists():
-            return Response({'error': 'Doctor already booked in that slot'}, status=status.HTTP_409_CONFLICT)
-        new_id = Booking.objects.count()
-        booking_id = f'B{new_id}'
-        while Booking.objects.filter(booking_id=booking_id).exists():
-            new_id += 1
-            booking_id = f'B{new_id}'
-        data['booking_id'] = booking_id
+        data['booking_id'] = next_sequential_id(Booking, 'booking_id', 'B')
         data['appointment_status'] = 'confirmed'
         serializer = BookingSerializer(data=data)
         if serializer.is_valid():
-            booking = serializer.save()
+            if not claim_slot(data['doctor_id'], book_date, start_time_obj, end_time_obj, data['booking_id']):
+                return Response({'error': 'Doctor already booked in that slot'}, status=status.HTTP_409_CONFLICT)
+            try:
+                booking = repository.create(serializer)
+            except Exception:
+                release_slot(data['doctor_id'], book_date, start_time_obj, end_time_obj, data['booking_id'])
+                raise
+            doctor_calendar.booking_saved(booking)
             patient = get_object_or_404(Patient, patient_id=booking.patient_id)
             doctor  = get_object_or_404(Doctor, doctor_id=booking.doctor_id)
             subject = "Your Appointment is Confirmed"
@@ -95,17 +147,55 @@ class BookingView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+class BookingExportView(APIView):
+    # ?format=ndjson|csv (or the Accept header) picks the renderer
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        filters, _ = booking_query(request.query_params)
+        qs = Booking.objects.filter(**filters)
+        fields = parse_fieldset(request, BookingSerializer)
+        rows = as_rows(qs.order_by("_id"), BookingSerializer, fields)
+        renderer = request.accepted_renderer
+        stream = stream_csv if renderer.format == "csv" else stream_ndjson
+        response = StreamingHttpResponse(
+            stream(rows, BookingSerializer, fields),
+            content_type=f"{renderer.media_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="bookings.{renderer.format}"'
+        return response
+
 class BookingDetailView(APIView):
     def get(self, request, booking_id):
-        booking = get_object_or_404(Booking, booking_id=booking_id)
-        serializer = BookingSerializer(booking)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fieldset(request, BookingSerializer)
+        return conditional_response(request, document_etag(request, Booking, booking_id=booking_id), lambda: Response(
+            get_serialized_or_404(Booking.objects.all(), BookingSerializer, fields, booking_id=booking_id),
+            status=status.HTTP_200_OK))
 
     def put(self, request, booking_id):
         booking = get_object_or_404(Booking, booking_id=booking_id)
         serializer = BookingSerializer(booking, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            if 'start_time' in serializer.validated_data:
+                serializer.validated_data['end_time'] = serializer.validated_data['start_time'] + BOOKING_LENGTH
+            old = _slot(booking)
+            new = _slot(booking, serializer.validated_data)
+            claimed = new != old and new[-1] == 'confirmed'
+            if claimed and not claim_slot(new[0], new[1], new[2], new[3], booking.booking_id):
+                return Response({'error': 'Doctor already booked in that slot'}, status=status.HTTP_409_CONFLICT)
+            if new[2] != old[2]:
+                # rescheduled: the reminders are due again for the new time
+                booking.reminded_at = {}
+            try:
+                serializer.save()
+            except Exception:
+                if claimed:
+                    release_slot(new[0], new[1], new[2], new[3], booking.booking_id)
+                raise
+            if new != old and old[-1] == 'confirmed':
+                release_slot(old[0], old[1], old[2], old[3], booking.booking_id)
+            doctor_calendar.booking_saved(booking, previous=old[:2])
+            analytics.invalidate(old[1], booking.date)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -135,5 +225,72 @@ class BookingDetailView(APIView):
                 message=email_message,
                 recipient_list=[recipient],
             )
+        if booking.appointment_status == 'confirmed':
+            release_slot(booking.doctor_id, booking.date, booking.start_time, booking.end_time, booking.booking_id)
         booking.delete()
+        doctor_calendar.booking_removed(booking.booking_id, booking.doctor_id, booking.date)
+        analytics.invalidate(booking.date)
         return Response({"message": "Booking deleted successfully, and cancellation email sent."}, status=status.HTTP_204_NO_CONTENT)
+
+def _cancellation_email(first_name, doctor, booking):
+    start = timezone.localtime(booking['start_time'])
+    return (f"""
+                Dear {first_name},
+
+                We regret to inform you that your appointment with Dr. {doctor['first_name']} {doctor['last_name']} on {start:%A, %d %B %Y} at {start:%H:%M} has been cancelled.
+
+                We apologize for any inconvenience this may cause. Please reach out if you have any questions or need to reschedule.
+
+                Best regards,
+                HealthSync Team
+                """)
+
+class DoctorCancelDayView(APIView):
+    def post(self, request, doctor_id):
+        doctor = Doctor.objects.filter(doctor_id=doctor_id).values('first_name', 'last_name').first()
+        if doctor is None:
+            return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+        data = request.data
+        try:
+            date_from = date_class.fromisoformat(data.get('date_from') or data['date'])
+            date_to = date_class.fromisoformat(data.get('date_to') or data.get('date') or data['date_from'])
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Give date, or date_from and date_to, as YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        max_days = getattr(settings, 'CANCEL_DAY_MAX_DAYS', 31)
+        if date_to < date_from or (date_to - date_from).days >= max_days:
+            return Response({'error': f'date_to must be on or after date_from, at most {max_days} days'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # stamp the rows this call changes, so a concurrent cancellation is never released or notified twice
+        token = uuid.uuid4().hex
+        in_range = {'doctor_id': doctor_id, 'date': {'$gte': datetime.combine(date_from, time()), '$lte': datetime.combine(date_to, time())}}
+        Booking.objects.mongo_update_many(
+            dict(in_range, appointment_status='confirmed'),
+            {'$set': {'appointment_status': 'cancelled', 'cancelled_by': token, 'updated_at': timezone.now()}},
+        )
+        columns = ['booking_id', 'patient_id', 'date', 'start_time']
+        bookings = [
+            repository.to_row(Booking, doc, columns)
+            for doc in Booking.objects.mongo_find(dict(in_range, cancelled_by=token), {column: 1 for column in columns})
+        ]
+        if not bookings:
+            return Response({'cancelled': 0, 'booking_ids': [], 'notified': 0}, status=status.HTTP_200_OK)
+        booking_ids = [booking['booking_id'] for booking in bookings]
+        release_bookings(doctor_id, date_from, date_to, booking_ids)
+        doctor_calendar.bookings_cancelled(doctor_id, date_from, date_to, booking_ids)
+        analytics.invalidate(*{booking['date'] for booking in bookings})
+
+        patient_ids = list({booking['patient_id'] for booking in bookings})
+        emails = {
+            doc['user_id']: doc['email']
+            for doc in Authentication.objects.mongo_find({'user_id': {'$in': patient_ids}, 'user_type': 'patient'}, {'user_id': 1, 'email': 1})
+        }
+        names = {
+            doc['patient_id']: doc.get('first_name')
+            for doc in Patient.objects.mongo_find({'patient_id': {'$in': patient_ids}}, {'patient_id': 1, 'first_name': 1})
+        }
+        messages = [
+            ("Your Appointment has been Cancelled", _cancellation_email(names.get(booking['patient_id']), doctor, booking), [emails[booking['patient_id']]])
+            for booking in bookings if booking['patient_id'] in emails
+        ]
+        send_custom_emails(messages)
+        return Response({'cancelled': len(booking_ids), 'booking_ids': booking_ids, 'notified': len(messages)}, status=status.HTTP_200_OK)
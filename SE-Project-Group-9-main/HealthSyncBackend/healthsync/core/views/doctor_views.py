@@ -4,17 +4,36 @@ from rest_framework.response import Response
 from rest_framework import status
 from core.models import Doctor
 from core.serializers.doctor_serializers import DoctorSerializer, DoctorSummarySerializer
-from datetime import date
+from datetime import date, datetime
+from django.utils import timezone
+from core.utils import next_sequential_id
+from core.pagination import paginated_data
+from core.cache import doctor_cache, invalidate_doctor
+from core.fastpath import get_serialized_or_404, parse_fieldset, parse_ids, row_columns, serialize_rows, serialized_by_ids
+from core.repository import to_row
+from core.search import search_doctors
+from django.conf import settings
+from core.conditional import collection_etag, conditional_response, content_etag
+from core import doctor_calendar
 from core.models import Doctor
 
 allowed_specializations = [
     'Cardiology', 'Dermatology', 'Orthopedics', 'Pediatrics', 'Neurology'
 ]
+def _select(data, fields):
+    # cached payloads hold every field; narrow them here instead of re-querying
+    return (data if fields is None else {name: data[name] for name in fields})
+
 class DoctorView(APIView):
     def get(self, request):
         doctors = Doctor.objects.all()
-        serializer = DoctorSerializer(doctors, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        ids = parse_ids(request)
+        if ids is not None:
+            return conditional_response(request, collection_etag(request, Doctor, {'doctor_id': {'$in': ids}}), lambda: Response(
+                serialized_by_ids(doctors, DoctorSerializer, 'doctor_id', ids, parse_fieldset(request, DoctorSerializer)),
+                status=status.HTTP_200_OK))
+        return conditional_response(request, collection_etag(request, Doctor, {}), lambda: Response(
+            paginated_data(request, doctors, DoctorSerializer), status=status.HTTP_200_OK))
 
     def post(self, request):
         data = request.data.copy()
@@ -35,17 +54,12 @@ class DoctorView(APIView):
             data['age'] = age
         except Exception:
             return Response({'error': 'Invalid date_of_birth format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
-        existing_ids = set(Doctor.objects.values_list('doctor_id', flat=True))
-        new_id = 0
-        while f"D{str(new_id)}" in existing_ids:
-            new_id += 1
-        doctor_id = f"D{new_id}"
-        data['doctor_id'] = doctor_id
         edu = data.get('education')
         if not isinstance(edu, dict) or not all(key in edu for key in ['degree', 'school', 'year']):
             return Response({'error': 'Education must be a JSON object with degree, school, and year.'}, status=status.HTTP_400_BAD_REQUEST)
         if not isinstance(data.get('specialization'), str):
             return Response({'error': 'Specialization must be a string.'}, status=status.HTTP_400_BAD_REQUEST)
+        data['doctor_id'] = next_sequential_id(Doctor, 'doctor_id', 'D')
         serializer = DoctorSerializer(data=data)
         if serializer.is_valid():
             doctor = serializer.save()
@@ -54,15 +68,23 @@ class DoctorView(APIView):
 
 class DoctorDetailView(APIView):
     def get(self, request, doctor_id):
-        doctor = get_object_or_404(Doctor, doctor_id=doctor_id)
-        serializer = DoctorSerializer(doctor)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fieldset(request, DoctorSerializer)
+        data = doctor_cache.get_or_load(
+            f"detail:{doctor_id}",
+            lambda: get_serialized_or_404(Doctor.objects.all(), DoctorSerializer, doctor_id=doctor_id),
+        )
+        # the payload is already in memory, so hashing it costs no extra query
+        return conditional_response(request, content_etag(request, data), lambda: Response(
+            _select(data, fields), status=status.HTTP_200_OK))
 
     def put(self, request, doctor_id):
         doctor = get_object_or_404(Doctor, doctor_id=doctor_id)
         serializer = DoctorSerializer(doctor, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            doctor = serializer.save()
+            # the post_save signal invalidates the new id; a renamed doctor's old entries go here
+            if doctor.doctor_id != doctor_id:
+                invalidate_doctor(doctor_id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -73,6 +95,50 @@ class DoctorDetailView(APIView):
     
 class DoctorSummaryDetailView(APIView):
     def get(self, request, doctor_id):
-        doctor = get_object_or_404(Doctor, doctor_id=doctor_id)
-        serializer = DoctorSummarySerializer(doctor)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fieldset(request, DoctorSummarySerializer)
+        data = doctor_cache.get_or_load(
+            f"summary:{doctor_id}",
+            lambda: get_serialized_or_404(Doctor.objects.all(), DoctorSummarySerializer, doctor_id=doctor_id),
+        )
+        return conditional_response(request, content_etag(request, data), lambda: Response(
+            _select(data, fields), status=status.HTTP_200_OK))
+
+SEARCH_FIELDS = ['doctor_id', 'first_name', 'last_name', 'picture', 'specialization', 'hospital_name']
+
+class DoctorSearchView(APIView):
+    def get(self, request):
+        params = request.query_params
+        max_limit = getattr(settings, 'DOCTOR_SEARCH_MAX_LIMIT', 50)
+        try:
+            limit = int(params.get('limit') or 10)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        fields = parse_fieldset(request, DoctorSerializer) or SEARCH_FIELDS
+        columns = row_columns(DoctorSerializer, fields)
+        docs = search_doctors(
+            params.get('q', ''),
+            specialization=params.get('specialization'),
+            hospital=params.get('hospital'),
+            limit=min(limit, max_limit),
+            projection={column: 1 for column in columns},
+        )
+        rows = [to_row(Doctor, doc, columns) for doc in docs]
+        return Response(serialize_rows(rows, DoctorSerializer, fields), status=status.HTTP_200_OK)
+
+class DoctorCalendarView(APIView):
+    def get(self, request, doctor_id):
+        try:
+            day = datetime.strptime(request.query_params.get('date') or timezone.localdate().isoformat(), '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'Invalid date format – use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        document = doctor_calendar.get_day(doctor_id, day)
+        if document is None:
+            return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+        document['date'] = day.isoformat()
+        return Response(document, status=status.HTTP_200_OK)
+
+class DoctorCacheStatsView(APIView):
+    def get(self, request):
+        return Response(doctor_cache.stats(), status=status.HTTP_200_OK)
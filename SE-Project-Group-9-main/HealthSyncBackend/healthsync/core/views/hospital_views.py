@@ -0,0 +1,57 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from core.models import Hospital, Doctor, object_ids
+from core.serializers.hospital_serializers import HospitalSerializer
+from core.serializers.doctor_serializers import DoctorSerializer
+from core.pagination import get_page, page_data
+from core.fastpath import as_rows, parse_fieldset, row_value, serialize_row, serialize_rows
+from core.conditional import collection_etag, conditional_response, document_etag, make_etag
+
+def expand_doctors(hospitals, data):
+    hospital_doctors = [object_ids(row_value(hospital, 'doctor_ids')) for hospital in hospitals]
+    wanted = {oid for oids in hospital_doctors for oid in oids}
+    doctors = as_rows(Doctor.objects.filter(_id__in=list(wanted)), DoctorSerializer) if wanted else []
+    serialized = {row_value(doctor, '_id'): serialize_row(doctor, DoctorSerializer) for doctor in doctors}
+    for oids, item in zip(hospital_doctors, data):
+        item['doctors'] = [serialized[oid] for oid in oids if oid in serialized]
+    return (data)
+
+def _wants_doctors(request):
+    return ('doctors' in request.query_params.get('expand', '').split(','))
+
+def _with_doctors(request, etag, hospital_id):
+    # expanded responses embed doctors, so their edits must change the tag too
+    if etag is None or not _wants_doctors(request):
+        return (etag)
+    hospital = Hospital.objects.mongo_find_one({'hospital_id': hospital_id}, {'doctor_ids': 1}) or {}
+    return (make_etag(etag, collection_etag(request, Doctor, {'_id': {'$in': object_ids(hospital.get('doctor_ids'))}})))
+
+class HospitalView(APIView):
+    def get(self, request):
+        fields = parse_fieldset(request, HospitalSerializer)
+
+        def render():
+            rows, next_token = get_page(request, as_rows(Hospital.objects.all(), HospitalSerializer, fields, ['doctor_ids']))
+            hospitals = list(rows)
+            data = serialize_rows(hospitals, HospitalSerializer, fields)
+            if _wants_doctors(request):
+                data = expand_doctors(hospitals, data)
+            return Response(page_data(request, data, next_token), status=status.HTTP_200_OK)
+
+        return conditional_response(request, collection_etag(request, Hospital, {}), render)
+
+class HospitalDetailView(APIView):
+    def get(self, request, hospital_id):
+        fields = parse_fieldset(request, HospitalSerializer)
+
+        def render():
+            hospital = get_object_or_404(as_rows(Hospital.objects.all(), HospitalSerializer, fields, ['doctor_ids']), hospital_id=hospital_id)
+            data = serialize_row(hospital, HospitalSerializer, fields)
+            if _wants_doctors(request):
+                data = expand_doctors([hospital], [data])[0]
+            return Response(data, status=status.HTTP_200_OK)
+
+        etag = _with_doctors(request, document_etag(request, Hospital, hospital_id=hospital_id), hospital_id)
+        return conditional_response(request, etag, render)
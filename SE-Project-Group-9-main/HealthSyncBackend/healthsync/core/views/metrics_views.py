@@ -0,0 +1,10 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from core.metrics import exposition
+
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return (HttpResponse(status=401))
+    return (HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8'))
@@ -6,13 +6,21 @@ from rest_framework import status
 from core.models import Patient, Authentication
 from core.serializers.patient_serializers import PatientSerializer
 from datetime import date
-from core.utils import send_custom_email
+from core.utils import send_custom_email, next_sequential_id
+from core.pagination import paginated_data
+from core.fastpath import get_serialized_or_404, parse_fieldset, parse_ids, serialized_by_ids
+from core.conditional import collection_etag, conditional_response, document_etag
 
 class PatientView(APIView):
     def get(self, request):
         patients = Patient.objects.all()
-        serializer = PatientSerializer(patients, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        ids = parse_ids(request)
+        if ids is not None:
+            return conditional_response(request, collection_etag(request, Patient, {'patient_id': {'$in': ids}}), lambda: Response(
+                serialized_by_ids(patients, PatientSerializer, 'patient_id', ids, parse_fieldset(request, PatientSerializer)),
+                status=status.HTTP_200_OK))
+        return conditional_response(request, collection_etag(request, Patient, {}), lambda: Response(
+            paginated_data(request, patients, PatientSerializer), status=status.HTTP_200_OK))
 
     def post(self, request):
         try:
@@ -30,12 +38,7 @@ class PatientView(APIView):
                 data['age'] = age
             except Exception:
                 return Response({'error': 'Invalid date_of_birth format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
-            existing_ids = set(Patient.objects.values_list('patient_id', flat=True))
-            new_id = 0
-            while f"P{str(new_id)}" in existing_ids:
-                new_id += 1
-            patient_id = f"P{new_id}"
-            data['patient_id'] = patient_id
+            data['patient_id'] = next_sequential_id(Patient, 'patient_id', 'P')
             if 'emergency_contact' in data and data['emergency_contact'] in [None, '', 'null']:
                 data['emergency_contact'] = None
             if 'medical_history' in data and data['medical_history'] in [None, '', 'null']:
@@ -58,9 +61,10 @@ class PatientView(APIView):
 
 class PatientDetailView(APIView):
     def get(self, request, patient_id):
-        patient = get_object_or_404(Patient, patient_id=patient_id)
-        serializer = PatientSerializer(patient)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fieldset(request, PatientSerializer)
+        return conditional_response(request, document_etag(request, Patient, patient_id=patient_id), lambda: Response(
+            get_serialized_or_404(Patient.objects.all(), PatientSerializer, fields, patient_id=patient_id),
+            status=status.HTTP_200_OK))
 
     def put(self, request, patient_id):
         patient = get_object_or_404(Patient, patient_id=patient_id)
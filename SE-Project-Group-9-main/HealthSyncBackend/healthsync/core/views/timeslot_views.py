@@ -1,19 +1,36 @@
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from core.models import TimeSlot
-from core.serializers.timeslot_serializers import TimeSlotSerializer
+from core.serializers.timeslot_serializers import TimeSlotSerializer, TimeSlotScheduleSerializer
+from core.utils import next_sequential_id, next_sequential_ids, model_to_document
+from core.pagination import paginated_data
+from core.fastpath import get_serialized_or_404, parse_fieldset, parse_ids, serialized_by_ids
+from core import analytics, repository
+from core import doctor_calendar
+from core.conditional import collection_etag, conditional_response, document_etag
 
 class TimeSlotView(APIView):
     def get(self, request):
         doctor_id = request.query_params.get('doctor_id')
-        if doctor_id:
-            timeslots = TimeSlot.objects.filter(doctor_id=doctor_id)
-        else:
-            timeslots = TimeSlot.objects.all()
-        serializer = TimeSlotSerializer(timeslots, many=True)
-        return Response(serializer.data)
+        filters = {'doctor_id': doctor_id} if doctor_id else {}
+        ids = parse_ids(request)
+        if ids is not None:
+            match = dict(filters, timeslot_id={'$in': ids})
+            return conditional_response(request, collection_etag(request, TimeSlot, match), lambda: Response(
+                serialized_by_ids(TimeSlot.objects.filter(**filters), TimeSlotSerializer, 'timeslot_id', ids, parse_fieldset(request, TimeSlotSerializer)),
+                status=status.HTTP_200_OK))
+
+        def render():
+            if repository.native_enabled():
+                return Response(repository.paginated_data(request, TimeSlot, filters, TimeSlotSerializer))
+            return Response(paginated_data(request, TimeSlot.objects.filter(**filters), TimeSlotSerializer))
+
+        return conditional_response(request, collection_etag(request, TimeSlot, filters), render)
 
     def post(self, request):
         data = request.data.copy()
@@ -21,11 +38,7 @@ class TimeSlotView(APIView):
         missing = [f for f in required_fields if f not in data or not data[f]]
         if missing:
             return Response({'error': f'Missing fields: {", ".join(missing)}'}, status=status.HTTP_400_BAD_REQUEST)
-        existing_ids = set(TimeSlot.objects.values_list('timeslot_id', flat=True))
-        new_id = 0
-        while f"T{new_id}" in existing_ids:
-            new_id += 1
-        timeslot_id = f"T{new_id}"
+        timeslot_id = next_sequential_id(TimeSlot, 'timeslot_id', 'T')
         availability_status = data.get('availability_status', 'available')
         timeslot_data = {
             'timeslot_id': timeslot_id,
@@ -39,7 +52,9 @@ class TimeSlotView(APIView):
         try:
             serializer = TimeSlotSerializer(data=timeslot_data)
             if serializer.is_valid():
-                serializer.save()
+                timeslot = repository.create(serializer)
+                doctor_calendar.timeslots_saved([timeslot])
+                analytics.invalidate_timeslots(timeslot.date)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -49,19 +64,140 @@ class TimeSlotView(APIView):
         
 class TimeSlotDetailView(APIView):
     def get(self, request, timeslot_id):
-        timeslot = get_object_or_404(TimeSlot, timeslot_id=timeslot_id)
-        serializer = TimeSlotSerializer(timeslot)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fieldset(request, TimeSlotSerializer)
+        return conditional_response(request, document_etag(request, TimeSlot, timeslot_id=timeslot_id), lambda: Response(
+            get_serialized_or_404(TimeSlot.objects.all(), TimeSlotSerializer, fields, timeslot_id=timeslot_id),
+            status=status.HTTP_200_OK))
 
     def put(self, request, timeslot_id):
         timeslot = get_object_or_404(TimeSlot, timeslot_id=timeslot_id)
+        previous = (timeslot.doctor_id, timeslot.date)
         serializer = TimeSlotSerializer(timeslot, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            doctor_calendar.timeslots_saved([timeslot], previous=previous)
+            analytics.invalidate_timeslots(previous[1], timeslot.date)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, timeslot_id):
         timeslot = get_object_or_404(TimeSlot, timeslot_id=timeslot_id)
         timeslot.delete()
+        doctor_calendar.timeslot_removed(timeslot_id, timeslot.doctor_id, timeslot.date)
+        analytics.invalidate_timeslots(timeslot.date)
         return Response({"message": "Timeslot deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+def _parse_weekday(value):
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        value = int(value)
+        if 0 <= value <= 6:
+            return (value)
+    elif isinstance(value, str) and value.lower() in WEEKDAYS:
+        return (WEEKDAYS.index(value.lower()))
+    raise ValueError(f'Invalid weekday: {value}')
+
+def _parse_time(value):
+    return (datetime.strptime(value, '%H:%M:%S' if value.count(':') == 2 else '%H:%M').time())
+
+def expand_schedule(rules, date_from, date_to, slot_minutes):
+    step = timedelta(minutes=slot_minutes)
+    day = date_from
+    while day <= date_to:
+        for weekday, start, end in rules:
+            if day.weekday() != weekday:
+                continue
+            slot_start = datetime.combine(day, start)
+            while slot_start + step <= datetime.combine(day, end):
+                yield (day, slot_start.time(), (slot_start + step).time())
+                slot_start += step
+        day += timedelta(days=1)
+
+class TimeSlotBulkView(APIView):
+    def post(self, request):
+        data = request.data
+        required_fields = ['doctor_id', 'date_from', 'date_to', 'fee', 'schedule']
+        missing = [f for f in required_fields if not data.get(f)]
+        if missing:
+            return Response({'error': f'Missing fields: {", ".join(missing)}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date_from = date.fromisoformat(data['date_from'])
+            date_to = date.fromisoformat(data['date_to'])
+        except (TypeError, ValueError):
+            return Response({'error': 'Invalid date format – use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        max_days = getattr(settings, 'TIMESLOT_BULK_MAX_DAYS', 366)
+        if date_to < date_from or (date_to - date_from).days >= max_days:
+            return Response({'error': f'date_to must be on or after date_from and within {max_days} days'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            slot_minutes = int(data.get('slot_minutes', 30))
+            if slot_minutes < 5:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response({'error': 'slot_minutes must be an integer of at least 5'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rules = [
+                (_parse_weekday(rule['weekday']), _parse_time(rule['start']), _parse_time(rule['end']))
+                for rule in data['schedule']
+            ]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return Response({'error': 'schedule must be a list of {weekday, start, end} entries with HH:MM times'}, status=status.HTTP_400_BAD_REQUEST)
+
+        slots = list(expand_schedule(rules, date_from, date_to, slot_minutes))
+        max_slots = getattr(settings, 'TIMESLOT_BULK_MAX_SLOTS', 2000)
+        if len(slots) > max_slots:
+            return Response({'error': f'Schedule expands to {len(slots)} slots; the limit is {max_slots}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # one query for every slot of this doctor that can collide with the schedule
+        existing = TimeSlot.objects.filter(doctor_id=data['doctor_id']).filter(
+            Q(date__isnull=True) | Q(date__gte=date_from, date__lte=date_to)
+        ).values('timeslot_id', 'date', 'start_time', 'end_time')
+        taken = {}
+        for other in existing:
+            if other['start_time'] and other['end_time']:
+                taken.setdefault(other['date'], []).append(other)
+        accepted, conflicts = [], []
+        for day, start, end in slots:
+            clash = next((
+                other for other in taken.get(None, []) + taken.get(day, [])
+                if other['start_time'] < end and other['end_time'] > start
+            ), None)
+            if clash is not None:
+                conflicts.append({
+                    'date': day.isoformat(),
+                    'start_time': start.isoformat(),
+                    'end_time': end.isoformat(),
+                    'conflicts_with': clash['timeslot_id'],
+                })
+                continue
+            slot = {'timeslot_id': None, 'date': day, 'start_time': start, 'end_time': end}
+            taken.setdefault(day, []).append(slot)
+            accepted.append(slot)
+
+        rows = [
+            {
+                'doctor_id': data['doctor_id'],
+                'date': slot['date'],
+                'start_time': slot['start_time'],
+                'end_time': slot['end_time'],
+                'fee': data['fee'],
+                'availability_status': data.get('availability_status', 'available'),
+            }
+            for slot in accepted
+        ]
+        serializer = TimeSlotScheduleSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        timeslots = [TimeSlot(**values) for values in serializer.validated_data]
+        if timeslots:
+            ids = next_sequential_ids(TimeSlot, 'timeslot_id', 'T', len(timeslots))
+            for timeslot, timeslot_id in zip(timeslots, ids):
+                timeslot.timeslot_id = timeslot_id
+            TimeSlot.objects.mongo_insert_many([model_to_document(t) for t in timeslots], ordered=False)
+            doctor_calendar.timeslots_saved(timeslots)
+            analytics.invalidate_timeslots(*{timeslot.date for timeslot in timeslots})
+        return Response({
+            'created': len(timeslots),
+            'timeslots': TimeSlotSerializer(timeslots, many=True).data,
+            'conflicts': conflicts,
+        }, status=status.HTTP_201_CREATED)
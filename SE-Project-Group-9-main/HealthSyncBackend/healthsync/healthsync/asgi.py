@@ -4,4 +4,5 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthsync.settings')
 
+# serves /api/async/; keep /api/ on the WSGI workers
 application = get_asgi_application()
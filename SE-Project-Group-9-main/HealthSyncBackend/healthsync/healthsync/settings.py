@@ -21,7 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'core',
+    'core.apps.CoreConfig',
     'djongo',
     'corsheaders',
     'whitenoise.runserver_nostatic',
@@ -29,7 +29,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -106,4 +107,68 @@ EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT'))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
-EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
\ No newline at end of file
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = int(os.getenv('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 5))
+
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 200))
+API_MAX_IDS = int(os.getenv('API_MAX_IDS', 100))
+
+MONGO_INDEX_CHECK_ON_STARTUP = os.getenv('MONGO_INDEX_CHECK_ON_STARTUP', 'True') == 'True'
+
+AVAILABILITY_MAX_DAYS = int(os.getenv('AVAILABILITY_MAX_DAYS', 14))
+
+# DOCTOR_CACHE_BACKEND names an entry in CACHES to share doctor payloads across workers
+DOCTOR_CACHE_SIZE = int(os.getenv('DOCTOR_CACHE_SIZE', 1024))
+DOCTOR_CACHE_TTL = int(os.getenv('DOCTOR_CACHE_TTL', 60))
+DOCTOR_CACHE_BACKEND = os.getenv('DOCTOR_CACHE_BACKEND') or None
+
+TIMESLOT_BULK_MAX_DAYS = int(os.getenv('TIMESLOT_BULK_MAX_DAYS', 366))
+TIMESLOT_BULK_MAX_SLOTS = int(os.getenv('TIMESLOT_BULK_MAX_SLOTS', 2000))
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+FAST_LIST_SERIALIZATION = os.getenv('FAST_LIST_SERIALIZATION', 'True') == 'True'
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+# when set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+# booking/timeslot hot paths read and write through pymongo instead of djongo's SQL layer
+NATIVE_MONGO_REPOSITORY = os.getenv('NATIVE_MONGO_REPOSITORY', 'False') == 'True'
+
+ANALYTICS_MAX_DAYS = int(os.getenv('ANALYTICS_MAX_DAYS', 366))
+
+DOCTOR_SEARCH_MAX_LIMIT = int(os.getenv('DOCTOR_SEARCH_MAX_LIMIT', 50))
+
+# password hashing: work factor, and a bounded pool so a login surge cannot take every core
+PASSWORD_HASHERS = [
+    'core.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 216000))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 4))
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 32))
+
+# motor connection pool per ASGI worker for the /api/async/ endpoints
+ASYNC_MONGO_POOL_SIZE = int(os.getenv('ASYNC_MONGO_POOL_SIZE', 200))
+
+# longest date range one /doctors/<id>/cancel-day/ call may cancel
+CANCEL_DAY_MAX_DAYS = int(os.getenv('CANCEL_DAY_MAX_DAYS', 31))
+
+# appointment reminder scheduler (manage.py send_reminders)
+REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 200))
+REMINDER_POLL_SECONDS = float(os.getenv('REMINDER_POLL_SECONDS', 60))
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path
 from django.urls import path, include
+from core.views.metrics_views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include('core.async_urls')),
     path('api/', include('core.urls')), 
+    path('metrics', metrics_view, name='metrics'),
 ]